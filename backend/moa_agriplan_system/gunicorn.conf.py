@@ -0,0 +1,21 @@
+"""
+Gunicorn settings, read from the environment.
+
+SERVER_INTERFACE=wsgi (default) serves moa_agriplan_system.wsgi with sync
+workers. SERVER_INTERFACE=asgi serves moa_agriplan_system.asgi with uvicorn
+workers, so async views run on the worker's event loop instead of one
+short-lived loop per request.
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '3'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+
+if os.environ.get('SERVER_INTERFACE', 'wsgi').lower() == 'asgi':
+    wsgi_app = 'moa_agriplan_system.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'moa_agriplan_system.wsgi:application'
+    worker_class = 'sync'
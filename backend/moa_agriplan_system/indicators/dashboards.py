@@ -0,0 +1,362 @@
+"""
+State-minister dashboard for one sector.
+
+``build_state_minister_dashboard`` computes the ``state_minister_dashboard``
+body for an already resolved sector, so the same data can be precomputed
+into snapshots (see ``users.snapshots``).
+"""
+
+from django.db.models import Sum, Q
+
+from plans.models import AnnualPlan, QuarterlyBreakdown, QuarterlyPerformance
+from .models import StateMinisterSector, Department, Indicator, IndicatorGroup
+
+
+def build_state_minister_dashboard(sector_id, year, quarter_months):
+    """Hierarchical indicator group performance of ``sector_id``."""
+    # Get root indicator groups for this sector (groups with no parent)
+    # Include label groups for structure but they won't be calculated
+    root_groups = IndicatorGroup.objects.filter(
+        Q(department__sector_id=sector_id) | Q(sector_id=sector_id),
+        parent__isnull=True
+    ).select_related('department', 'sector').prefetch_related(
+        'children__indicators',
+        'indicators'
+    ).distinct()
+    
+    # Get all ungrouped indicators for this sector
+    ungrouped_indicators = Indicator.objects.filter(
+        Q(department__sector_id=sector_id),
+        groups__isnull=True
+    ).select_related('department')
+    
+    # Helper function to calculate individual indicator performance percentage
+    def calculate_indicator_percentage(indicator, year):
+        """Calculate a single indicator's performance percentage."""
+        annual_plan = AnnualPlan.objects.filter(indicator=indicator, year=year).first()
+        if not annual_plan:
+            return None
+        
+        breakdown = QuarterlyBreakdown.objects.filter(plan=annual_plan).first()
+        
+        if quarter_months:
+            quarter_months_map = {1: 3, 2: 6, 3: 9, 4: 12}
+            filtered_quarters = [
+                q for q in [1, 2, 3, 4]
+                if quarter_months_map[q] <= quarter_months
+            ]
+            performance = QuarterlyPerformance.objects.filter(
+                plan=annual_plan, quarter__in=filtered_quarters
+            ).aggregate(total=Sum('value'))['total'] or 0
+            
+            quarterly_target = 0
+            if breakdown:
+                if quarter_months == 3:
+                    quarterly_target = float(breakdown.q1 or 0)
+                elif quarter_months == 6:
+                    quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0)
+                elif quarter_months == 9:
+                    quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0) + float(breakdown.q3 or 0)
+                elif quarter_months == 12:
+                    quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0) + float(breakdown.q3 or 0) + float(breakdown.q4 or 0)
+            else:
+                quarterly_target = (float(annual_plan.target) * quarter_months) / 12
+            target = quarterly_target
+        else:
+            # For incremental indicators, full-year performance = Q4 value only
+            if indicator.is_incremental:
+                q4_perf = QuarterlyPerformance.objects.filter(plan=annual_plan, quarter=4).first()
+                performance = float(q4_perf.value) if q4_perf and q4_perf.value is not None else 0
+            else:
+                performance = QuarterlyPerformance.objects.filter(plan=annual_plan).aggregate(
+                    total=Sum('value')
+                )['total'] or 0
+            target = float(annual_plan.target) if annual_plan.target else 0
+        
+        if target > 0:
+            return (float(performance) / float(target)) * 100
+        return None
+
+    # Helper function to calculate group performance using average-of-percentages
+    def calculate_group_performance(group, year, children_data=None):
+        """
+        Calculate group performance as the average of:
+        - Direct indicator percentages (is_aggregatable=True only)
+        - Child group percentages (recursively, but only from non-label groups)
+        
+        Label groups (is_label=True) are excluded from performance calculations.
+        """
+        # Skip label groups entirely - they don't have performance percentages
+        if group.is_label:
+            return {
+                'performance_percentage': None,
+                'total_components': 0,
+                'is_label': True
+            }
+        
+        percentages = []
+        
+        # Collect direct indicator percentages (only aggregatable)
+        for indicator in group.indicators.filter(is_aggregatable=True):
+            pct = calculate_indicator_percentage(indicator, year)
+            if pct is not None:
+                percentages.append(pct)
+        
+        # Collect child group percentages (only from non-label children)
+        if children_data:
+            for child in children_data:
+                # Skip child groups that are label groups
+                if child.get('is_label'):
+                    continue
+                if child.get('performance_percentage') is not None:
+                    percentages.append(child['performance_percentage'])
+        
+        performance_percentage = (sum(percentages) / len(percentages)) if percentages else None
+        
+        return {
+            'performance_percentage': performance_percentage,
+            'total_components': len(percentages),
+            'is_label': group.is_label
+        }
+    
+    # Helper function to build group tree with performance (bottom-up)
+    def build_group_tree(groups, year):
+        result = []
+        for group in groups:
+            # Build children FIRST (bottom-up) so we have their percentages
+            children_data = build_group_tree(group.children.all(), year)
+            
+            # Get indicators with their performance
+            indicators_data = []
+            for indicator in group.indicators.all():
+                annual_plan = AnnualPlan.objects.filter(indicator=indicator, year=year).first()
+                if annual_plan:
+                    # Get quarterly breakdown for target calculation
+                    breakdown = QuarterlyBreakdown.objects.filter(plan=annual_plan).first()
+                    
+                    if quarter_months:
+                        # Filter performance for specified months
+                        quarter_months_map = {1: 3, 2: 6, 3: 9, 4: 12}
+                        filtered_quarters = [
+                            q for q in [1, 2, 3, 4] 
+                            if quarter_months_map[q] <= quarter_months
+                        ]
+                        performance = QuarterlyPerformance.objects.filter(
+                            plan=annual_plan, quarter__in=filtered_quarters
+                        ).aggregate(total=Sum('value'))['total'] or 0
+                        
+                        # Calculate quarterly target
+                        quarterly_target = 0
+                        if breakdown:
+                            if quarter_months == 3:
+                                quarterly_target = float(breakdown.q1 or 0)
+                            elif quarter_months == 6:
+                                quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0)
+                            elif quarter_months == 9:
+                                quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0) + float(breakdown.q3 or 0)
+                        else:
+                            # Fallback to proportional
+                            quarterly_target = (float(annual_plan.target) * quarter_months) / 12
+                        
+                        target = quarterly_target
+                    else:
+                        # Get all quarters performance
+                        # For incremental indicators, full-year performance = Q4 value only
+                        if indicator.is_incremental:
+                            q4_perf = QuarterlyPerformance.objects.filter(plan=annual_plan, quarter=4).first()
+                            performance = float(q4_perf.value) if q4_perf and q4_perf.value is not None else 0
+                        else:
+                            performance = QuarterlyPerformance.objects.filter(plan=annual_plan).aggregate(
+                                total=Sum('value')
+                            )['total'] or 0
+                        target = annual_plan.target
+                    
+                    indicators_data.append({
+                        'id': indicator.id,
+                        'name': indicator.name,
+                        'unit': indicator.unit,
+                        'description': indicator.description,
+                        'is_aggregatable': indicator.is_aggregatable,
+                        'target': target,
+                        'achieved': performance,
+                        'performance_percentage': (performance / target * 100) if target > 0 else None
+                    })
+            
+            # Calculate group performance using average-of-percentages (bottom-up)
+            performance_data = calculate_group_performance(group, year, children_data)
+            
+            group_data = {
+                'id': group.id,
+                'name': group.name,
+                'level': group.level,
+                'hierarchy_path': group.hierarchy_path,
+                'is_parent': group.is_parent,
+                'children': children_data,
+                'indicators': indicators_data,
+                **performance_data
+            }
+            result.append(group_data)
+        return result
+    
+    # Build the data structure
+    root_groups_data = build_group_tree(root_groups, year)
+    
+    # Get ungrouped indicators with performance
+    ungrouped_data = []
+    for indicator in ungrouped_indicators:
+        annual_plan = AnnualPlan.objects.filter(indicator=indicator, year=year).first()
+        if annual_plan:
+            # Get quarterly breakdown for target calculation
+            breakdown = QuarterlyBreakdown.objects.filter(plan=annual_plan).first()
+            
+            if quarter_months:
+                # Filter performance for specified months
+                quarter_months_map = {1: 3, 2: 6, 3: 9, 4: 12}
+                filtered_quarters = [
+                    q for q in [1, 2, 3, 4] 
+                    if quarter_months_map[q] <= quarter_months
+                ]
+                performance = QuarterlyPerformance.objects.filter(
+                    plan=annual_plan, quarter__in=filtered_quarters
+                ).aggregate(total=Sum('value'))['total'] or 0
+                
+                # Calculate quarterly target
+                quarterly_target = 0
+                if breakdown:
+                    if quarter_months == 3:
+                        quarterly_target = float(breakdown.q1 or 0)
+                    elif quarter_months == 6:
+                        quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0)
+                    elif quarter_months == 9:
+                        quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0) + float(breakdown.q3 or 0)
+                else:
+                    # Fallback to proportional
+                    quarterly_target = (float(annual_plan.target) * quarter_months) / 12
+                
+                target = quarterly_target
+            else:
+                # Get all quarters performance
+                # For incremental indicators, full-year performance = Q4 value only
+                if indicator.is_incremental:
+                    q4_perf = QuarterlyPerformance.objects.filter(plan=annual_plan, quarter=4).first()
+                    performance = float(q4_perf.value) if q4_perf and q4_perf.value is not None else 0
+                else:
+                    performance = QuarterlyPerformance.objects.filter(plan=annual_plan).aggregate(
+                        total=Sum('value')
+                    )['total'] or 0
+                target = annual_plan.target
+            
+            ungrouped_data.append({
+                'id': indicator.id,
+                'name': indicator.name,
+                'unit': indicator.unit,
+                'description': indicator.description,
+                'is_aggregatable': indicator.is_aggregatable,
+                'target': target,
+                'achieved': performance,
+                'performance_percentage': (performance / target * 100) if target > 0 else None
+            })
+    
+    # Calculate KPIs
+    all_indicators = []
+    def collect_all_indicators(groups):
+        for group in groups:
+            all_indicators.extend(group['indicators'])
+            collect_all_indicators(group['children'])
+    
+    collect_all_indicators(root_groups_data)
+    all_indicators.extend(ungrouped_data)
+    
+    total_indicators = len(all_indicators)
+    
+    # Count groups on track vs lagging (excluding label groups)
+    def count_group_performance(groups):
+        on_track = 0
+        lagging = 0
+        for group in groups:
+            # Skip label groups - they don't have performance metrics
+            if group.get('is_label'):
+                child_on_track, child_lagging = count_group_performance(group['children'])
+                on_track += child_on_track
+                lagging += child_lagging
+                continue
+                
+            if group.get('performance_percentage') is not None:
+                if group['performance_percentage'] >= 85:
+                    on_track += 1
+                else:
+                    lagging += 1
+            child_on_track, child_lagging = count_group_performance(group['children'])
+            on_track += child_on_track
+            lagging += child_lagging
+        return on_track, lagging
+    
+    groups_on_track, groups_lagging = count_group_performance(root_groups_data)
+    
+    # Get department performance using average-of-percentages
+    department_performance = []
+    quarterly_trends = []
+    
+    # Get all departments in the sector
+    departments = Department.objects.filter(sector_id=sector_id)
+    
+    for dept in departments:
+        # Get all indicators for this department that are aggregatable
+        dept_indicators = Indicator.objects.filter(department=dept, is_aggregatable=True)
+        
+        # Calculate each indicator's percentage individually
+        indicator_percentages = []
+        indicator_count_dept = 0
+        
+        for indicator in dept_indicators:
+            pct = calculate_indicator_percentage(indicator, year)
+            indicator_count_dept += 1
+            if pct is not None:
+                indicator_percentages.append(pct)
+        
+        # Department performance = average of indicator percentages
+        avg_performance = (sum(indicator_percentages) / len(indicator_percentages)) if indicator_percentages else None
+        
+        # Add to department performance list
+        if indicator_count_dept > 0:
+            department_performance.append({
+                'department_id': dept.id,
+                'department_name': dept.name,
+                'average_performance': avg_performance,
+                'total_indicators': indicator_count_dept,
+            })
+            
+            # Generate simplified quarterly trend data for this department
+            for quarter in range(1, 5):
+                quarterly_trends.append({
+                    'quarter': f'Q{quarter}',
+                    'department_name': dept.name,
+                    'performance_percentage': avg_performance,
+                })
+    
+    # Sector overall performance = average of department percentages
+    dept_percentages = [
+        d['average_performance'] for d in department_performance
+        if d['average_performance'] is not None
+    ]
+    overall_performance = (sum(dept_percentages) / len(dept_percentages)) if dept_percentages else None
+    
+    # Get sector info
+    sector = StateMinisterSector.objects.filter(id=sector_id).first()
+    
+    return {
+        'sector': {
+            'id': sector.id if sector else 0,
+            'name': sector.name if sector else 'Unknown'
+        },
+        'root_groups': root_groups_data,
+        'ungrouped_indicators': ungrouped_data,
+        'kpis': {
+            'total_indicators': total_indicators,
+            'overall_performance': overall_performance,
+            'groups_on_track': groups_on_track,
+            'groups_lagging': groups_lagging,
+        },
+        'department_performance': department_performance,
+        'quarterly_trends': quarterly_trends,
+    }
@@ -0,0 +1,52 @@
+import factory
+from factory import fuzzy
+
+from .models import Department, Indicator, IndicatorGroup, StateMinisterSector
+
+UNITS = ('%', 'Ha', 'Quintal', 'Number', 'Tons', 'Km', 'Head', 'ETB (million)')
+
+
+class StateMinisterSectorFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = StateMinisterSector
+        django_get_or_create = ('name',)
+
+    name = factory.Sequence(lambda n: f'Sector {n}')
+
+
+class DepartmentFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Department
+
+    name = factory.Sequence(lambda n: f'Department {n}')
+    sector = factory.SubFactory(StateMinisterSectorFactory)
+
+
+class IndicatorGroupFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = IndicatorGroup
+
+    name = factory.Sequence(lambda n: f'Indicator group {n}')
+    department = factory.SubFactory(DepartmentFactory)
+    sector = None
+    parent = None
+    unit = fuzzy.FuzzyChoice(UNITS)
+    is_label = False
+
+
+class IndicatorFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Indicator
+
+    name = factory.Sequence(lambda n: f'Indicator {n}')
+    unit = fuzzy.FuzzyChoice(UNITS)
+    description = factory.Faker('sentence', nb_words=12)
+    department = factory.SubFactory(DepartmentFactory)
+    is_aggregatable = True
+    is_incremental = False
+    applicable_quarters = factory.LazyFunction(list)
+
+    @factory.post_generation
+    def groups(self, create, extracted, **kwargs):
+        if create and extracted:
+            self.groups.set(extracted)
@@ -0,0 +1,149 @@
+"""
+Per-process stale-while-revalidate cache of reference-data lists.
+
+Sectors, departments, indicator groups and indicators change a handful of
+times a year, but the frontend's dropdowns list them on almost every page.
+``CachedReferenceListMixin`` keeps each serialized list in memory, keyed by
+viewset, the caller's role scope and query parameters:
+
+* younger than ``REFERENCE_CACHE_SOFT_TTL``: served as is;
+* older: still served, while a background thread reloads it;
+* older than ``REFERENCE_CACHE_MAX_AGE`` (e.g. the refresh keeps failing):
+  reloaded before answering.
+
+Any save or delete of those models bumps a shared version stamp (see
+``moa_agriplan_system.shared_state``), which drops every entry in every
+worker, so admin edits show up on the next request.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.response import Response
+
+from moa_agriplan_system.shared_state import get_version, bump_version
+from users.scope import get_scope
+
+logger = logging.getLogger(__name__)
+
+VERSION_NAME = 'reference-data'
+
+
+class _Entry:
+    __slots__ = ('data', 'loaded_at', 'refreshing')
+
+    def __init__(self, data):
+        self.data = data
+        self.loaded_at = time.monotonic()
+        self.refreshing = False
+
+
+class ReferenceDataCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def current_version(self):
+        """Read the shared stamp, dropping local state if it has moved on."""
+        version = get_version(VERSION_NAME)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._entries = OrderedDict()
+                    self._version = version
+        return version
+
+    def get(self, key, load):
+        """Return the cached ``load()`` result for ``key``; see the module docstring."""
+        version = self.current_version()
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.loaded_at < getattr(settings, 'REFERENCE_CACHE_MAX_AGE', 3600):
+            self.hits += 1
+            if now - entry.loaded_at >= getattr(settings, 'REFERENCE_CACHE_SOFT_TTL', 300):
+                self._refresh_in_background(key, entry, load, version)
+            return entry.data
+
+        self.misses += 1
+        data = load()
+        self._store(key, _Entry(data), version)
+        return data
+
+    def _store(self, key, entry, version):
+        with self._lock:
+            # Loaded against an older version: an admin write raced the load.
+            if version != self._version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > getattr(settings, 'REFERENCE_CACHE_SIZE', 512):
+                self._entries.popitem(last=False)
+
+    def _refresh_in_background(self, key, entry, load, version):
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+
+        def refresh():
+            try:
+                self._store(key, _Entry(load()), version)
+                self.refreshes += 1
+            except Exception:
+                logger.exception('Refreshing reference data %r failed', key)
+                entry.refreshing = False
+            finally:
+                connection.close()
+
+        threading.Thread(target=refresh, name='reference-cache-refresh', daemon=True).start()
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._version = None
+
+
+reference_cache = ReferenceDataCache()
+
+
+def invalidate_reference_data():
+    """Drop cached reference lists in every worker once the current transaction commits."""
+    reference_cache.clear()
+    bump_version(VERSION_NAME)
+
+
+class CachedReferenceListMixin:
+    """Serve a viewset's ``list`` from ``reference_cache``.
+
+    ``uncached_params`` names query parameters whose responses depend on
+    more than reference data and must always be computed.
+    """
+
+    uncached_params = ()
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'REFERENCE_CACHE', True) or any(
+            request.query_params.get(param) for param in self.uncached_params
+        ):
+            return super().list(request, *args, **kwargs)
+
+        scope = get_scope(request)
+        key = (
+            self.basename,
+            (scope.is_superuser, scope.role, scope.sector_id, scope.department_id),
+            tuple(sorted((name, tuple(values)) for name, values in request.query_params.lists())),
+        )
+
+        def load():
+            queryset = self.filter_queryset(self.get_queryset())
+            return list(self.get_serializer(queryset, many=True).data)
+
+        return Response(reference_cache.get(key, load))
@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import StateMinisterSector, Department, Indicator, IndicatorGroup
+from .reference_cache import invalidate_reference_data
+
+
+@receiver(post_save, sender=StateMinisterSector)
+@receiver(post_delete, sender=StateMinisterSector)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=IndicatorGroup)
+@receiver(post_delete, sender=IndicatorGroup)
+@receiver(post_save, sender=Indicator)
+@receiver(post_delete, sender=Indicator)
+@receiver(m2m_changed, sender=Indicator.groups.through)
+def reference_data_changed(sender, **kwargs):
+    # Other workers must not reload before the change is visible to them
+    transaction.on_commit(invalidate_reference_data)
@@ -0,0 +1,38 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'task',
+        'status',
+        'priority',
+        'attempts',
+        'max_attempts',
+        'run_after',
+        'locked_by',
+        'created_by',
+        'created_at',
+        'finished_at',
+    )
+    list_filter = (
+        'status',
+        'task',
+    )
+    search_fields = (
+        'task',
+        'dedupe_key',
+    )
+    readonly_fields = (
+        'attempts',
+        'locked_by',
+        'locked_until',
+        'result',
+        'error',
+        'created_by',
+        'created_at',
+        'started_at',
+        'finished_at',
+    )
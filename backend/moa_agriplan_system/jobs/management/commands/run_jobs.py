@@ -0,0 +1,65 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.models import JobStatus
+from jobs.queue import claim, purge_finished, run, worker_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs. Any number of workers may run against the "
+        "same database; each claims jobs with SELECT ... FOR UPDATE SKIP LOCKED. "
+        "SIGTERM/SIGINT stop the worker after its current job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", action="store_true", help="Exit once no job is due instead of polling.")
+        parser.add_argument("--max-jobs", type=int, default=0, help="Exit after running this many jobs (0: no limit).")
+        parser.add_argument("--sleep", type=float, default=None, help="Seconds between polls when idle (default JOB_POLL_SECONDS).")
+        parser.add_argument("--task", action="append", dest="tasks", help="Only run this task; repeatable.")
+
+    def handle(self, *args, **options):
+        sleep = options["sleep"] if options["sleep"] is not None else getattr(settings, "JOB_POLL_SECONDS", 2)
+        worker = worker_id()
+        stopping = []
+
+        def stop(signum, frame):
+            self.stdout.write(f"Signal {signum}: finishing current job, then exiting.")
+            stopping.append(signum)
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Worker {worker} started.")
+        done = 0
+        last_purge = 0.0
+        while not stopping:
+            if time.monotonic() - last_purge > 3600:
+                purged = purge_finished()
+                if purged:
+                    self.stdout.write(f"Purged {purged} finished jobs.")
+                last_purge = time.monotonic()
+
+            close_old_connections()
+            job = claim(worker, options["tasks"])
+            if job is None:
+                if options["burst"]:
+                    break
+                time.sleep(sleep)
+                continue
+
+            self.stdout.write(f"Running {job.task} #{job.pk} (attempt {job.attempts}/{job.max_attempts}).")
+            started = time.perf_counter()
+            outcome = run(job)
+            elapsed = time.perf_counter() - started
+            style = self.style.SUCCESS if outcome == JobStatus.SUCCEEDED else self.style.WARNING
+            self.stdout.write(style(f"{job.task} #{job.pk}: {outcome} in {elapsed:.2f}s."))
+
+            done += 1
+            if options["max_jobs"] and done >= options["max_jobs"]:
+                break
+        self.stdout.write(f"Worker {worker} stopped after {done} jobs.")
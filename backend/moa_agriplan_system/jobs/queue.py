@@ -0,0 +1,186 @@
+"""
+Enqueueing, claiming and running jobs.
+
+Workers claim the next due job with ``SELECT ... FOR UPDATE SKIP LOCKED``,
+so any number of ``run_jobs`` processes can share the table without a
+broker. A claimed job holds a lease (``JOB_LEASE_SECONDS``) that the
+running worker renews; if the worker dies the lease runs out and another
+worker picks the job up again as a new attempt, or marks it FAILED once it
+has used up ``max_attempts``.
+"""
+
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ACTIVE_STATUSES, Job, JobStatus
+from .registry import get_task
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, 'JOB_LEASE_SECONDS', 300))
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(task_name, payload=None, *, priority=None, dedupe_key=None, run_after=None, user=None):
+    """Queue ``task_name`` and return its ``Job``.
+
+    With a ``dedupe_key``, a queued or running job with the same key is
+    returned instead of creating a second one.
+    """
+    registered = get_task(task_name)
+    if registered is None:
+        raise UnknownTask(task_name)
+    fields = dict(
+        task=task_name,
+        payload=payload or {},
+        priority=registered.priority if priority is None else priority,
+        max_attempts=registered.max_attempts,
+        dedupe_key=dedupe_key,
+        run_after=run_after or timezone.now(),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    if dedupe_key is None:
+        return Job.objects.create(**fields)
+    existing = Job.objects.filter(dedupe_key=dedupe_key, status__in=ACTIVE_STATUSES).first()
+    if existing is not None:
+        return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(**fields)
+    except IntegrityError:
+        # Lost a race with another enqueue of the same key.
+        existing = Job.objects.filter(dedupe_key=dedupe_key, status__in=ACTIVE_STATUSES).first()
+        if existing is None:
+            raise
+        return existing
+
+
+def cancel(job):
+    """Cancel a job that has not started. Returns True if it was cancelled."""
+    updated = Job.objects.filter(pk=job.pk, status=JobStatus.QUEUED).update(
+        status=JobStatus.CANCELLED, finished_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return bool(updated)
+
+
+def claim(worker, tasks=None):
+    """Lock and mark RUNNING the next due job, or return None.
+
+    A job whose worker died holding it, with no attempts left, is marked
+    FAILED instead, so a job that keeps killing its worker is not retried
+    forever.
+    """
+    while True:
+        now = timezone.now()
+        due = Q(status=JobStatus.QUEUED, run_after__lte=now) | Q(status=JobStatus.RUNNING, locked_until__lt=now)
+        with transaction.atomic():
+            candidates = Job.objects.select_for_update(skip_locked=True).filter(due)
+            if tasks:
+                candidates = candidates.filter(task__in=tasks)
+            job = candidates.order_by('-priority', 'run_after', 'id').first()
+            if job is None:
+                return None
+            # Compare-and-set as well, for databases without row locks (SQLite).
+            current = Job.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts)
+            if job.status == JobStatus.RUNNING and job.attempts >= job.max_attempts:
+                current.update(
+                    status=JobStatus.FAILED,
+                    error=f'Worker lost: {job.locked_by} stopped renewing the lease on attempt {job.attempts} of {job.max_attempts}.',
+                    finished_at=now,
+                    locked_until=None,
+                )
+                continue
+            claimed = current.update(
+                status=JobStatus.RUNNING,
+                attempts=F('attempts') + 1,
+                locked_by=worker,
+                locked_until=now + _lease(),
+                started_at=now,
+            )
+        if not claimed:
+            return None
+        job.refresh_from_db()
+        return job
+
+
+class _Heartbeat:
+    """Renews a running job's lease from a background thread."""
+
+    def __init__(self, job):
+        self.job = job
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-{job.pk}-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        interval = _lease().total_seconds() / 3
+        try:
+            while not self._stop.wait(interval):
+                Job.objects.filter(pk=self.job.pk, status=JobStatus.RUNNING, locked_by=self.job.locked_by).update(
+                    locked_until=timezone.now() + _lease(),
+                )
+        finally:
+            connection.close()
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'JOB_RETRY_BACKOFF_SECONDS', 30)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def run(job):
+    """Execute a claimed job and record the outcome. Returns the final status."""
+    registered = get_task(job.task)
+    owned = Job.objects.filter(pk=job.pk, status=JobStatus.RUNNING, locked_by=job.locked_by)
+    if registered is None:
+        owned.update(status=JobStatus.FAILED, error=f'Unknown task {job.task!r}', finished_at=timezone.now())
+        return JobStatus.FAILED
+    try:
+        with _Heartbeat(job):
+            result = registered.func(job, **job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            owned.update(
+                status=JobStatus.QUEUED,
+                error=error,
+                run_after=timezone.now() + _retry_delay(job.attempts),
+                locked_by='',
+                locked_until=None,
+            )
+            return JobStatus.QUEUED
+        owned.update(status=JobStatus.FAILED, error=error, finished_at=timezone.now(), locked_until=None)
+        return JobStatus.FAILED
+    owned.update(status=JobStatus.SUCCEEDED, result=result, error='', finished_at=timezone.now(), locked_until=None)
+    return JobStatus.SUCCEEDED
+
+
+def purge_finished(days=None):
+    """Delete finished jobs older than ``days`` (default ``JOB_RETENTION_DAYS``)."""
+    days = getattr(settings, 'JOB_RETENTION_DAYS', 30) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.exclude(status__in=ACTIVE_STATUSES).filter(finished_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,47 @@
+"""
+Task registry.
+
+Apps declare tasks in their ``tasks.py`` (imported by ``JobsConfig.ready``)::
+
+    @task('plans.backfill_na_performances', max_attempts=1)
+    def backfill(job, user_id=None):
+        ...
+
+A task is called with its ``Job`` and the job payload as keyword
+arguments; its return value, which must be JSON-serialisable, is stored as
+the job result. Raising marks the attempt as failed.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: Callable
+    max_attempts: int = 3
+    priority: int = 0
+    # Whether superusers may enqueue it through POST /api/jobs/.
+    api: bool = False
+
+
+_tasks = {}
+
+
+def task(name, *, max_attempts=3, priority=0, api=False):
+    def register(func):
+        if name in _tasks and _tasks[name].func is not func:
+            raise ValueError(f'Task {name!r} is already registered')
+        _tasks[name] = Task(name=name, func=func, max_attempts=max_attempts, priority=priority, api=api)
+        return func
+    return register
+
+
+def get_task(name):
+    """The registered ``Task`` called ``name``, or None."""
+    return _tasks.get(name)
+
+
+def registered_tasks():
+    return dict(_tasks)
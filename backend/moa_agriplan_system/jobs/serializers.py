@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from .models import Job
+from .registry import get_task
+
+
+class JobSerializer(serializers.ModelSerializer):
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True, default=None)
+    is_finished = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'task', 'payload', 'status', 'is_finished', 'priority', 'dedupe_key',
+            'attempts', 'max_attempts', 'run_after', 'result', 'error',
+            'created_by', 'created_by_username', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+
+class JobCreateSerializer(serializers.Serializer):
+    task = serializers.CharField(max_length=100)
+    payload = serializers.DictField(required=False, default=dict)
+    priority = serializers.IntegerField(required=False, min_value=-32768, max_value=32767)
+    dedupe_key = serializers.CharField(max_length=200, required=False)
+
+    def validate_task(self, value):
+        registered = get_task(value)
+        if registered is None or not registered.api:
+            raise serializers.ValidationError(f"Unknown task '{value}'.")
+        return value
@@ -0,0 +1,71 @@
+from django.urls import reverse
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Job
+from .queue import cancel, enqueue
+from .serializers import JobCreateSerializer, JobSerializer
+
+
+def accepted_response(request, job):
+    """202 pointing the client at the job's status URL, for endpoints that
+    hand their work to the queue instead of answering inline."""
+    url = request.build_absolute_uri(reverse('job-detail', args=[job.pk]))
+    return Response(
+        {'job_id': job.pk, 'status': job.status, 'status_url': url},
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': url},
+    )
+
+
+class JobCreatePermission(permissions.BasePermission):
+    """Anyone signed in may watch their own jobs; only superusers start
+    arbitrary tasks or cancel them."""
+
+    def has_permission(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return False
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return request.user.is_superuser
+
+
+class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [JobCreatePermission]
+
+    def get_queryset(self):
+        qs = Job.objects.select_related('created_by')
+        if not self.request.user.is_superuser:
+            qs = qs.filter(created_by=self.request.user)
+        status_param = self.request.query_params.get('status')
+        if status_param:
+            qs = qs.filter(status=status_param.upper())
+        task = self.request.query_params.get('task')
+        if task:
+            qs = qs.filter(task=task)
+        return qs
+
+    def create(self, request):
+        serializer = JobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job = enqueue(
+            data['task'],
+            data['payload'],
+            priority=data.get('priority'),
+            dedupe_key=data.get('dedupe_key'),
+            user=request.user,
+        )
+        return accepted_response(request, job)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if not cancel(job):
+            return Response(
+                {'detail': f'Only queued jobs can be cancelled; this one is {job.status}.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(self.get_serializer(job).data)
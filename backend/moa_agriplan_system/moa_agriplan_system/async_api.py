@@ -0,0 +1,108 @@
+"""
+Helpers for plain Django ``async def`` API views.
+
+DRF views are synchronous, so async endpoints are Django views that reuse
+DRF's authentication, permissions and renderer through ``authorize`` and
+``render``.
+
+``gather_queries`` runs independent ORM calls at the same time. Django's
+async ORM methods (``aget``, ``acount`` ...) all go through one shared
+thread and so never overlap; these calls run instead on a dedicated pool of
+``DASHBOARD_QUERY_THREADS`` threads per process, each with its own database
+connection. The pool size therefore also bounds the extra connections
+(or pool checkouts) a process can hold.
+
+Async views work under both servers: gunicorn's WSGI workers run them in a
+per-request event loop, the ASGI worker (``SERVER_INTERFACE=asgi``) on its
+own loop.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from monitoring.queries import propagate
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _query_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'DASHBOARD_QUERY_THREADS', 4),
+                    thread_name_prefix='query-fanout',
+                )
+    return _executor
+
+
+def _run_query(func, args):
+    # Same connection handling Django applies around a request, so stale or
+    # broken connections in pool threads are replaced and CONN_MAX_AGE holds.
+    # The request's query counters and SQL capture are installed on this
+    # thread's connections too, so the fanned-out queries are measured.
+    close_old_connections()
+    try:
+        with propagate():
+            return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def gather_queries(*calls):
+    """Run ``(func, *args)`` calls concurrently; return their results in order.
+
+    Each call runs in a copy of the caller's context, so per-request state
+    such as the read-replica choice carries over.
+    """
+    loop = asyncio.get_running_loop()
+    executor = _query_executor()
+    return await asyncio.gather(*(
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run_query, func, args)
+        for func, *args in calls
+    ))
+
+
+def _authorize(request, permission_classes):
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = drf_request.user
+        for permission in permission_classes:
+            if not permission().has_permission(drf_request, None):
+                if user is None or not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+    except exceptions.APIException as exc:
+        response = render({'detail': exc.detail}, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = drf_request.authenticators[0].authenticate_header(drf_request) if drf_request.authenticators else None
+            if header:
+                response['WWW-Authenticate'] = header
+        return drf_request, response
+    return drf_request, None
+
+
+async def authorize(request, permission_classes):
+    """Authenticate with the DRF authenticators and check ``permission_classes``.
+
+    Returns ``(drf_request, error_response)``; ``error_response`` is None when
+    the request may proceed.
+    """
+    return await sync_to_async(_authorize)(request, permission_classes)
+
+
+def render(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data, renderer.media_type, {}), status=status, content_type=renderer.media_type)
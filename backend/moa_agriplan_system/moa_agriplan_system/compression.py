@@ -0,0 +1,166 @@
+"""
+Compression of large JSON API responses.
+
+The indicator-performance and dashboard responses for a full ministry are
+megabytes of highly repetitive JSON; gzip shrinks them by roughly 10x and
+brotli (used when the optional ``brotli`` package is installed) a little
+more. Only JSON bodies of at least ``API_COMPRESSION_MIN_BYTES`` are
+compressed: below that the saving does not pay for the CPU.
+
+Code that caches a rendered payload can compress it once with
+``precompress`` and hand the result back with ``attach_precompressed``; the
+middleware then serves the stored bytes and skips compression entirely.
+
+API responses carry no secrets in the body (authentication is a header), so
+the BREACH padding Django's ``GZipMiddleware`` adds for HTML is not applied;
+that also keeps precompressed bytes reproducible.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+
+# Preferred first when the client accepts several with equal weight.
+SUPPORTED_ENCODINGS = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+JSON_CONTENT_TYPES = ('application/json',)
+
+
+def _min_bytes():
+    return getattr(settings, 'API_COMPRESSION_MIN_BYTES', 1024)
+
+
+def compress(body, encoding):
+    """Compress ``body`` with ``encoding`` ('gzip' or 'br')."""
+    if encoding == BROTLI:
+        return brotli.compress(
+            body,
+            mode=brotli.MODE_TEXT,
+            quality=getattr(settings, 'API_COMPRESSION_BROTLI_QUALITY', 5),
+        )
+    return gzip.compress(
+        body,
+        compresslevel=getattr(settings, 'API_COMPRESSION_GZIP_LEVEL', 6),
+        mtime=0,
+    )
+
+
+def precompress(body):
+    """Return ``{encoding: bytes}`` for every supported encoding worth using.
+
+    Empty when ``body`` is below the size threshold.
+    """
+    if len(body) < _min_bytes():
+        return {}
+    encoded = {}
+    for encoding in SUPPORTED_ENCODINGS:
+        data = compress(body, encoding)
+        if len(data) < len(body):
+            encoded[encoding] = data
+    return encoded
+
+
+def attach_precompressed(response, encodings):
+    """Let ``CompressionMiddleware`` serve ``encodings`` (from ``precompress``)
+    instead of compressing ``response`` again.
+
+    The response body must be the exact bytes that were precompressed.
+    """
+    response.precompressed = encodings
+    return response
+
+
+def accepted_encodings(header):
+    """Parse ``Accept-Encoding`` into the set of acceptable codings.
+
+    Honours ``q=0`` (explicitly refused) and the ``*`` wildcard.
+    """
+    accepted = set()
+    refused = set()
+    wildcard = False
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == '*':
+            wildcard = q > 0
+        elif q > 0:
+            accepted.add(coding)
+        else:
+            refused.add(coding)
+    if wildcard:
+        accepted.update(e for e in SUPPORTED_ENCODINGS if e not in refused)
+    return accepted
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for encoding in SUPPORTED_ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Compress JSON responses above the size threshold with br or gzip."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'API_COMPRESSION', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type not in JSON_CONTENT_TYPES:
+            return response
+
+        precompressed = getattr(response, 'precompressed', None)
+        body = response.content
+        if precompressed is None and len(body) < _min_bytes():
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if precompressed is not None:
+            data = precompressed.get(encoding)
+            if data is None:
+                return response
+        else:
+            data = compress(body, encoding)
+            if len(data) >= len(body):
+                return response
+
+        response.content = data
+        response.headers['Content-Length'] = str(len(data))
+        response.headers['Content-Encoding'] = encoding
+        # A strong ETag no longer matches the transferred bytes (RFC 9110 8.8.1).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
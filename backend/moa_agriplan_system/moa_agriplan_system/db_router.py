@@ -0,0 +1,181 @@
+"""
+Read-replica routing.
+
+When a ``replica`` database is configured (``DB_REPLICA_HOST`` or
+``DB_REPLICA_NAME``), ``ReplicaRoutingMiddleware`` lets safe-method requests
+to the dashboard and list endpoints read from it; everything else - writes,
+workflow transitions, detail views, management commands - uses ``default``.
+
+Read-your-writes: after a client sends a write, its later requests read
+from ``default`` for ``READ_YOUR_WRITES_SECONDS``, so it never sees the
+replica lagging behind its own change. Clients are identified by a hash of
+their credential (token header or session cookie) and the time of the last
+write is kept as a file in ``SHARED_STATE_DIR``, so every worker sees it.
+About one write in ``_PRUNE_EVERY`` also deletes the stamps that have aged
+out of the window.
+"""
+
+import contextvars
+import hashlib
+import os
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .shared_state import state_dir
+
+REPLICA = 'replica'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Aggregation-heavy read-only endpoints that may read from the replica, in
+# addition to every router ``*-list`` action.
+REPLICA_VIEW_NAMES = frozenset({
+    'api-admin-stats',
+    'api-admin-targets-by-sector',
+    'api-admin-indicators-by-department',
+    'api-activity-logs',
+    'api-minister-dashboard',
+    'api-minister-dashboard-async',
+    'api-state-minister-dashboard',
+    'api-indicator-performance',
+    'api-indicator-detail',
+    'api-indicator-detail-batch',
+    'api-minister-review-summary',
+    'annualplan-export',
+    'annualplan-fact-table',
+    'breakdown-export',
+    'performance-export',
+})
+
+# Always read from the primary: credentials must work the moment they are
+# issued, the submission-window caches are invalidated by version stamps
+# written after primary commits, and job status is polled right after enqueue.
+PRIMARY_MODELS = frozenset({
+    'authtoken.token',
+    'jobs.job',
+    'sessions.session',
+    'plans.submissionwindow',
+})
+
+_read_alias = contextvars.ContextVar('db_read_alias', default=DEFAULT_DB_ALIAS)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a physical copy of the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _client_key(request):
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return hashlib.sha256(credential.encode()).hexdigest()[:32]
+
+
+_PRUNE_EVERY = 200
+
+
+def _stamp_dir():
+    return state_dir() / 'recent_writes'
+
+
+def _write_stamp(key):
+    return _stamp_dir() / key
+
+
+def _read_your_writes_seconds():
+    return getattr(settings, 'READ_YOUR_WRITES_SECONDS', 10)
+
+
+def prune_write_stamps():
+    """Delete the stamps of clients whose last write is outside the window."""
+    cutoff = time.time() - _read_your_writes_seconds()
+    removed = 0
+    try:
+        entries = os.scandir(_stamp_dir())
+    except FileNotFoundError:
+        return 0
+    with entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # Pruned by another worker.
+                pass
+    return removed
+
+
+def note_write(request):
+    key = _client_key(request)
+    if key is None:
+        return
+    path = _write_stamp(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    if random.randrange(_PRUNE_EVERY) == 0:
+        prune_write_stamps()
+
+
+def wrote_recently(request):
+    key = _client_key(request)
+    if key is None:
+        return False
+    try:
+        written_at = _write_stamp(key).stat().st_mtime
+    except FileNotFoundError:
+        return False
+    return time.time() - written_at < _read_your_writes_seconds()
+
+
+def replica_eligible(request, view_name):
+    if request.method not in SAFE_METHODS:
+        return False
+    if view_name not in REPLICA_VIEW_NAMES and not view_name.endswith('-list'):
+        return False
+    return not wrote_recently(request)
+
+
+class ReplicaRoutingMiddleware:
+    """Choose the read database per request; see the module docstring."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _read_alias.set(DEFAULT_DB_ALIAS)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        if request.method not in SAFE_METHODS:
+            note_write(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not replica_configured():
+            return None
+        match = request.resolver_match
+        if match and match.view_name and replica_eligible(request, match.view_name):
+            _read_alias.set(REPLICA)
+        return None
@@ -0,0 +1,33 @@
+"""
+JSON parser backed by orjson; the request-side counterpart of
+``moa_agriplan_system.renderers.ORJSONRenderer``.
+"""
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """Drop-in replacement for ``JSONParser``.
+
+    orjson only reads UTF-8; bodies declared in another charset go through
+    the stock parser. orjson rejects ``NaN``/``Infinity`` like DRF's strict
+    mode does.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -52,6 +52,9 @@ INSTALLED_APPS = [
     'users',
     'indicators',
     'plans',
+    'jobs',
+    'reports',
+    'monitoring',
 ]
 
 # ============================================
@@ -59,16 +62,46 @@ INSTALLED_APPS = [
 # ============================================
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'moa_agriplan_system.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'moa_agriplan_system.db_router.ReplicaRoutingMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
 ]
 
+# gzip (or brotli, when installed) for JSON responses of at least MIN_BYTES
+API_COMPRESSION = env.bool('API_COMPRESSION', default=True)
+API_COMPRESSION_MIN_BYTES = env.int('API_COMPRESSION_MIN_BYTES', default=1024)
+API_COMPRESSION_GZIP_LEVEL = env.int('API_COMPRESSION_GZIP_LEVEL', default=6)
+API_COMPRESSION_BROTLI_QUALITY = env.int('API_COMPRESSION_BROTLI_QUALITY', default=5)
+
+# Per-request query/timing metrics; returned as headers to superusers who send REQUEST_METRICS_HEADER
+REQUEST_METRICS = env.bool('REQUEST_METRICS', default=True)
+REQUEST_METRICS_HEADER = env('REQUEST_METRICS_HEADER', default='X-Debug-Metrics')
+REQUEST_METRICS_SLOWEST = env.int('REQUEST_METRICS_SLOWEST', default=5)
+
+# Prometheus /metrics: bearer token for scrapers; workers publish snapshots to SHARED_STATE_DIR/metrics
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_FLUSH_INTERVAL = env.int('METRICS_FLUSH_INTERVAL', default=15)
+METRICS_STALE_SECONDS = env.int('METRICS_STALE_SECONDS', default=300)
+
+# Request profiles for superusers sending PROFILE_HEADER / ?_profile=; PROFILE_SLOW_MS > 0 also samples every request and keeps slow ones
+PROFILING = env.bool('PROFILING', default=True)
+PROFILE_HEADER = env('PROFILE_HEADER', default='X-Profile')
+PROFILE_SLOW_MS = env.int('PROFILE_SLOW_MS', default=0)
+PROFILE_AUTO_COOLDOWN = env.int('PROFILE_AUTO_COOLDOWN', default=300)
+PROFILE_SAMPLE_INTERVAL_MS = env.int('PROFILE_SAMPLE_INTERVAL_MS', default=5)
+PROFILE_MAX_QUERIES = env.int('PROFILE_MAX_QUERIES', default=2000)
+PROFILE_MAX_CAPTURES = env.int('PROFILE_MAX_CAPTURES', default=100)
+PROFILE_RETENTION_DAYS = env.int('PROFILE_RETENTION_DAYS', default=7)
+
 ROOT_URLCONF = 'moa_agriplan_system.urls'
 
 # ============================================
@@ -104,9 +137,80 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD', default=''),
         'HOST': env('DB_HOST', default='localhost'),
         'PORT': env('DB_PORT', default='5432'),
+        # Seconds to keep a connection open across requests (0 = reconnect
+        # on every request). Health checks replace a connection that died
+        # while idle before it is reused.
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=True),
     }
 }
 
+# psycopg connection pool per worker (PostgreSQL only, needs psycopg[pool]).
+# Replaces persistent connections: Django requires CONN_MAX_AGE=0 with a pool.
+DB_POOL = env.bool('DB_POOL', default=False)
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=4),
+            'timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+            'max_idle': env.float('DB_POOL_MAX_IDLE', default=600.0),
+            'max_lifetime': env.float('DB_POOL_MAX_LIFETIME', default=3600.0),
+            'check': ConnectionPool.check_connection if DATABASES['default']['CONN_HEALTH_CHECKS'] else None,
+        },
+    }
+
+# Optional read replica of 'default'. Safe-method dashboard and list requests
+# read from it, except for READ_YOUR_WRITES_SECONDS after the same client wrote.
+DB_REPLICA_HOST = env('DB_REPLICA_HOST', default='')
+DB_REPLICA_NAME = env('DB_REPLICA_NAME', default='')
+if DB_REPLICA_HOST or DB_REPLICA_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DB_REPLICA_NAME or DATABASES['default']['NAME'],
+        'HOST': DB_REPLICA_HOST or DATABASES['default']['HOST'],
+        'PORT': env('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'USER': env('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': env('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['moa_agriplan_system.db_router.ReplicaRouter']
+READ_YOUR_WRITES_SECONDS = env.int('READ_YOUR_WRITES_SECONDS', default=10)
+
+# Threads per process that run independent dashboard queries concurrently
+# for the async endpoints; each may hold its own database connection.
+DASHBOARD_QUERY_THREADS = env.int('DASHBOARD_QUERY_THREADS', default=4)
+
+# Coalesce identical in-flight dashboard computations across worker processes
+# too (PostgreSQL advisory locks), waiting at most WAIT_SECONDS for another
+# process's result before computing independently. Keep WAIT_SECONDS well
+# below GUNICORN_TIMEOUT, or the worker is killed before it gets to compute.
+SINGLE_FLIGHT_ACROSS_PROCESSES = env.bool('SINGLE_FLIGHT_ACROSS_PROCESSES', default=True)
+SINGLE_FLIGHT_WAIT_SECONDS = env.int('SINGLE_FLIGHT_WAIT_SECONDS', default=20)
+
+# Rows fetched per round trip by the streaming CSV/XLSX exports
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
+
+# Rows per INSERT ... ON CONFLICT statement of the plan import
+IMPORT_BATCH_SIZE = env.int('IMPORT_BATCH_SIZE', default=2000)
+
+# Quarterly reports: processes rendering PDF/XLSX files in the job worker, and
+# an optional TTF font for PDFs (Helvetica has no Ethiopic glyphs)
+REPORT_RENDER_PROCESSES = env.int('REPORT_RENDER_PROCESSES', default=2)
+REPORT_PDF_FONT = env('REPORT_PDF_FONT', default='')
+
+# Background job queue (manage.py run_jobs): lease a worker holds on a running
+# job, idle poll interval, base of the exponential retry delay, and how long
+# finished jobs are kept.
+JOB_LEASE_SECONDS = env.int('JOB_LEASE_SECONDS', default=300)
+JOB_POLL_SECONDS = env.float('JOB_POLL_SECONDS', default=2.0)
+JOB_RETRY_BACKOFF_SECONDS = env.int('JOB_RETRY_BACKOFF_SECONDS', default=30)
+JOB_RETENTION_DAYS = env.int('JOB_RETENTION_DAYS', default=30)
+
 # ============================================
 # PASSWORD VALIDATION
 # ============================================
@@ -139,6 +243,16 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resumable attachment uploads (plans.uploads): where partial files live (not
+# under MEDIA_ROOT, which nginx serves), largest file and PUT chunk accepted,
+# session lifetime, and the stream-to-disk copy buffer. nginx's
+# client_max_body_size for /api/attachment-uploads/ must equal the chunk size
+UPLOAD_SESSION_DIR = env('UPLOAD_SESSION_DIR', default=str(BASE_DIR / 'var' / 'upload_sessions'))
+UPLOAD_MAX_BYTES = env.int('UPLOAD_MAX_BYTES', default=2 * 1024 ** 3)
+UPLOAD_CHUNK_MAX_BYTES = env.int('UPLOAD_CHUNK_MAX_BYTES', default=8 * 1024 * 1024)
+UPLOAD_SESSION_TTL = env.int('UPLOAD_SESSION_TTL', default=24 * 3600)
+UPLOAD_COPY_BUFFER = env.int('UPLOAD_COPY_BUFFER', default=1024 * 1024)
+
 # ============================================
 # DEFAULT PRIMARY KEY
 # ============================================
@@ -157,7 +271,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -165,6 +279,31 @@ REST_FRAMEWORK = {
     ),
 }
 
+# orjson-backed JSON renderer/parser; same output as DRF's, several times faster
+API_FAST_JSON = env.bool('API_FAST_JSON', default=False)
+if API_FAST_JSON:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (
+        'moa_agriplan_system.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = (
+        'moa_agriplan_system.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    )
+
+# Per-worker token -> user cache used by CachedTokenAuthentication
+TOKEN_AUTH_CACHE_SIZE = env.int('TOKEN_AUTH_CACHE_SIZE', default=1024)
+TOKEN_AUTH_CACHE_TTL = env.int('TOKEN_AUTH_CACHE_TTL', default=300)
+
+# Per-worker cache of sector/department/group/indicator lists: served as is for
+# SOFT_TTL seconds, then served stale while refreshing in the background, and
+# reloaded before answering after MAX_AGE. Admin writes invalidate it at once.
+REFERENCE_CACHE = env.bool('REFERENCE_CACHE', default=True)
+REFERENCE_CACHE_SOFT_TTL = env.int('REFERENCE_CACHE_SOFT_TTL', default=300)
+REFERENCE_CACHE_MAX_AGE = env.int('REFERENCE_CACHE_MAX_AGE', default=3600)
+REFERENCE_CACHE_SIZE = env.int('REFERENCE_CACHE_SIZE', default=512)
+
 # ============================================
 # CORS SETTINGS
 # ============================================
@@ -242,4 +381,18 @@ BREAKDOWN_WINDOW_START_DAY = env.int(
 BREAKDOWN_WINDOW_DURATION_DAYS = env.int(
     'BREAKDOWN_WINDOW_DURATION_DAYS',
     default=15
-)
\ No newline at end of file
+)
+
+# ============================================
+# SHARED PROCESS STATE
+# ============================================
+
+# Local directory shared by all gunicorn workers on a host. Used for
+# cross-worker cache version stamps; must be writable by the app user.
+SHARED_STATE_DIR = env(
+    'SHARED_STATE_DIR',
+    default=str(BASE_DIR / 'var' / 'shared_state')
+)
+
+# Where request profiles are stored (see PROFILE_* above)
+PROFILE_DIR = env('PROFILE_DIR', default=str(BASE_DIR / 'var' / 'profiles'))
@@ -0,0 +1,60 @@
+"""
+Cross-worker version stamps kept as files in a shared local directory.
+
+Gunicorn runs several worker processes that each hold their own in-process
+caches. When data behind one of those caches changes, the writing worker
+bumps a named stamp here; every other worker notices on its next read
+because the stamp file now holds a different random token. Reading a stamp
+is one small file read, so it is cheap enough to do on every request.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+
+def state_dir() -> Path:
+    """Directory shared by all worker processes on this host."""
+    return Path(settings.SHARED_STATE_DIR)
+
+
+def _stamp_path(name: str) -> Path:
+    return state_dir() / f'{name}.stamp'
+
+
+def get_version(name: str):
+    """Return an opaque token identifying the current version of ``name``.
+
+    The token changes every time ``bump_version`` is called for the same
+    name, in this or any other process sharing the state directory.
+    """
+    try:
+        with open(_stamp_path(name)) as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_atomic(target: Path, data) -> None:
+    """Replace ``target`` with ``data`` (str or bytes) so readers never see a
+    partial file."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.')
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as fh:
+            fh.write(data)
+        # Atomic rename: readers see either the old content or the new one.
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def bump_version(name: str) -> None:
+    """Invalidate every cache keyed on ``name`` across all workers."""
+    write_atomic(_stamp_path(name), f'{os.getpid()}:{os.urandom(8).hex()}')
@@ -0,0 +1,125 @@
+"""
+Single-flight coalescing of identical expensive computations.
+
+When a quarter window closes, many users open the same dashboard at once
+and every request would compute the identical result. ``SingleFlight.do``
+lets the first caller for a key compute while concurrent callers for the
+same key wait and receive its result.
+
+Within a process this is a lock and an event per in-flight key. With
+``shared=True`` the computation is also coalesced across worker processes
+(``SINGLE_FLIGHT_ACROSS_PROCESSES``, PostgreSQL only): the computing process
+holds a session advisory lock on the key and publishes its result, which
+must be ``bytes``, as a file in ``SHARED_STATE_DIR``; processes that find the
+lock taken wait for it and read that file instead of computing.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .shared_state import state_dir, write_atomic
+
+# How often a process waiting on another process's computation polls.
+_POLL_SECONDS = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        # Like the in-process caches: hits were served a result computed for
+        # another request, misses computed it.
+        self.hits = 0
+        self.misses = 0
+
+    def do(self, key, func, *, shared=False):
+        """Return ``func()``, sharing one computation among concurrent
+        callers with the same ``key`` (a string)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            self.hits += 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if shared and _across_processes():
+                call.result = self._do_across_processes(key, func)
+            else:
+                self.misses += 1
+                call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _do_across_processes(self, key, func):
+        digest = hashlib.sha256(f'{self.name}:{key}'.encode()).digest()
+        lock_id = int.from_bytes(digest[:8], 'big', signed=True)
+        result_path = state_dir() / 'single_flight' / self.name / digest.hex()[:32]
+        arrived = time.time()
+        deadline = time.monotonic() + getattr(settings, 'SINGLE_FLIGHT_WAIT_SECONDS', 20)
+
+        while not _try_advisory_lock(lock_id):
+            if time.monotonic() > deadline:
+                # The other process is taking too long; compute ourselves.
+                self.misses += 1
+                return func()
+            time.sleep(_POLL_SECONDS)
+        try:
+            # Another process may have finished the computation while we waited.
+            published = _read_if_newer(result_path, arrived)
+            if published is not None:
+                self.hits += 1
+                return published
+            self.misses += 1
+            result = func()
+            write_atomic(result_path, result)
+            return result
+        finally:
+            _advisory_unlock(lock_id)
+
+
+def _across_processes():
+    return getattr(settings, 'SINGLE_FLIGHT_ACROSS_PROCESSES', False) and connection.vendor == 'postgresql'
+
+
+def _try_advisory_lock(lock_id):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [lock_id])
+        return cursor.fetchone()[0]
+
+
+def _advisory_unlock(lock_id):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_unlock(%s)', [lock_id])
+
+
+def _read_if_newer(path, since):
+    try:
+        if path.stat().st_mtime < since:
+            return None
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
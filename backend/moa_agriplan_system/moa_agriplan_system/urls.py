@@ -22,12 +22,16 @@ from django.http import HttpResponse, JsonResponse
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
 from indicators.views import SectorViewSet, DepartmentViewSet, IndicatorViewSet, IndicatorGroupViewSet, state_minister_dashboard
-from users.views import MeView, UserViewSet, AdminStatsView, AdminTargetsBySectorView, AdminIndicatorsByDepartmentView, ActivityLogView, ChangePasswordView, MinisterDashboardView, IndicatorPerformanceView, IndicatorDetailView
+from jobs.views import JobViewSet
+from reports.views import ReportViewSet
+from monitoring.views import metrics, ProfileCaptureListView, ProfileCaptureDetailView, ProfileCaptureDownloadView
+from users.views import MeView, LogoutView, UserViewSet, AdminStatsView, AdminTargetsBySectorView, AdminIndicatorsByDepartmentView, ActivityLogView, ChangePasswordView, MinisterDashboardView, minister_dashboard_async, IndicatorPerformanceView, IndicatorDetailView, IndicatorDetailBatchView
 from plans.views import (
     AnnualPlanViewSet,
     QuarterlyBreakdownViewSet,
     QuarterlyPerformanceViewSet,
     FileAttachmentViewSet,
+    UploadSessionViewSet,
     SubmissionWindowViewSet,
     AdvisorCommentViewSet,
     submission_window_status,
@@ -51,13 +55,17 @@ router.register(r'api/annual-plans', AnnualPlanViewSet, basename='annualplan')
 router.register(r'api/breakdowns', QuarterlyBreakdownViewSet, basename='breakdown')
 router.register(r'api/performances', QuarterlyPerformanceViewSet, basename='performance')
 router.register(r'api/attachments', FileAttachmentViewSet, basename='attachment')
+router.register(r'api/attachment-uploads', UploadSessionViewSet, basename='attachmentupload')
 router.register(r'api/users', UserViewSet, basename='user')
 router.register(r'api/submission-windows', SubmissionWindowViewSet, basename='submissionwindow')
 router.register(r'api/advisor-comments', AdvisorCommentViewSet, basename='advisorcomment')
+router.register(r'api/jobs', JobViewSet, basename='job')
+router.register(r'api/reports', ReportViewSet, basename='report')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/token/', obtain_auth_token, name='api-token'),
+    path('api/auth/logout/', LogoutView.as_view(), name='api-logout'),
     path('api/me/', MeView.as_view(), name='api-me'),
     path('api/change-password/', ChangePasswordView.as_view(), name='api-change-password'),
     path('api/admin-stats/', AdminStatsView.as_view(), name='api-admin-stats'),
@@ -65,13 +73,19 @@ urlpatterns = [
     path('api/admin-stats/indicators-by-department/', AdminIndicatorsByDepartmentView.as_view(), name='api-admin-indicators-by-department'),
     path('api/activity-logs/', ActivityLogView.as_view(), name='api-activity-logs'),
     path('api/minister-dashboard/', MinisterDashboardView.as_view(), name='api-minister-dashboard'),
+    path('api/async/minister-dashboard/', minister_dashboard_async, name='api-minister-dashboard-async'),
     path('api/state-minister-dashboard/', state_minister_dashboard, name='api-state-minister-dashboard'),
     path('api/indicator-performance/', IndicatorPerformanceView.as_view(), name='api-indicator-performance'),
     path('api/indicator-detail/', IndicatorDetailView.as_view(), name='api-indicator-detail'),
+    path('api/indicator-detail/batch/', IndicatorDetailBatchView.as_view(), name='api-indicator-detail-batch'),
     path('api/submission-windows/status/', submission_window_status, name='api-submission-window-status'),
     path('api/reviews/summary/', minister_review_summary, name='api-minister-review-summary'),
     path('api/reviews/submit-to-strategic/', submit_to_strategic, name='api-submit-to-strategic'),
+    path('api/profiles/', ProfileCaptureListView.as_view(), name='api-profiles'),
+    path('api/profiles/<str:capture_id>/', ProfileCaptureDetailView.as_view(), name='api-profile-detail'),
+    path('api/profiles/<str:capture_id>/download/', ProfileCaptureDownloadView.as_view(), name='api-profile-download'),
     path('health/', health_check, name='health'),
+    path('metrics', metrics, name='metrics'),
     path('api/', api_check, name='api-check'),
     path('', include(router.urls)),
 ]
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from .connections import install as install_connection_counters
+        install_connection_counters()
+        if getattr(settings, 'REQUEST_METRICS', True):
+            from .middleware import install_serializer_timer
+            install_serializer_timer()
@@ -0,0 +1,132 @@
+"""
+Synthetic payloads and timing helpers shared by the benchmark commands.
+
+Payloads are built from a seeded ``random.Random`` so two runs with the same
+arguments compare like for like.
+"""
+
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+STATUS_LABELS = (_('Approved'), _('Validated'), _('Final approved'))
+
+UNITS = ('%', 'Ha', 'Quintal', 'Number', 'Tons', 'ETB (million)')
+
+# Mix of Amharic and English names, as in production data.
+NAME_WORDS = (
+    'Crop', 'Livestock', 'Irrigation', 'Extension', 'Seed', 'Fertilizer',
+    'Soil', 'Market', 'Export', 'Research', 'ግብርና', 'ምርት', 'መስኖ', 'እንስሳት',
+)
+
+
+def _name(rng, words=3):
+    return ' '.join(rng.choice(NAME_WORDS) for _i in range(words))
+
+
+def ministry_performance_payload(seed=0, sectors=6, departments=8, groups=4, indicators=12):
+    """Response of ``IndicatorPerformanceView`` for a full ministry.
+
+    ``departments`` is per sector, ``groups`` per department and
+    ``indicators`` per group (plus the same number ungrouped).
+    """
+    rng = random.Random(seed)
+    next_id = iter(range(1, 10 ** 9)).__next__
+
+    def indicator(group_id, group_name):
+        target = float(rng.randint(10, 100000))
+        achieved = target * rng.uniform(0.2, 1.2)
+        pct = None if rng.random() < 0.1 else min(achieved / target * 100, 100.0)
+        return {
+            'id': next_id(),
+            'plan_id': next_id(),
+            'name': _name(rng, 5),
+            'unit': rng.choice(UNITS),
+            'description': _name(rng, 12),
+            'is_aggregatable': rng.random() > 0.15,
+            'target': target,
+            'achieved': achieved,
+            'performance_percentage': pct,
+            'group_id': group_id,
+            'group_name': group_name,
+        }
+
+    def average(items):
+        pcts = [i['performance_percentage'] for i in items if i['performance_percentage'] is not None]
+        return sum(pcts) / len(pcts) if pcts else None
+
+    sectors_result = []
+    for _s in range(sectors):
+        depts = []
+        for _d in range(departments):
+            groups_result = []
+            for _g in range(groups):
+                group_id, group_name = next_id(), _name(rng)
+                inds = [indicator(group_id, group_name) for _i in range(indicators)]
+                groups_result.append({
+                    'id': group_id,
+                    'name': group_name,
+                    'performance_percentage': average(inds),
+                    'indicators': inds,
+                    'is_label': rng.random() < 0.1,
+                })
+            ungrouped = [indicator(None, None) for _i in range(indicators)]
+            all_inds = ungrouped + [i for g in groups_result for i in g['indicators']]
+            depts.append({
+                'id': next_id(),
+                'name': _name(rng),
+                'performance_percentage': average(all_inds),
+                'groups': groups_result,
+                'ungrouped_indicators': ungrouped,
+            })
+        sectors_result.append({
+            'id': next_id(),
+            'name': _name(rng),
+            'performance_percentage': average(depts),
+            'departments': depts,
+        })
+
+    return {
+        'year': 2025,
+        'quarter_months': None,
+        'ministry_performance': average(sectors_result),
+        'sectors': sectors_result,
+    }
+
+
+def performance_rows_payload(seed=0, rows=5000):
+    """Raw-dict rows (not serializer output) carrying the types the stock
+    encoder has to special-case: Decimal, aware datetimes, dates and lazy
+    translation strings."""
+    rng = random.Random(seed)
+    base = datetime(2025, 7, 1, tzinfo=timezone.get_fixed_timezone(180))
+    result = []
+    for i in range(rows):
+        submitted = base + timedelta(seconds=rng.randint(0, 365 * 86400), microseconds=rng.randint(0, 999999))
+        result.append({
+            'id': i + 1,
+            'plan': rng.randint(1, rows),
+            'quarter': rng.randint(1, 4),
+            'value': Decimal(rng.randint(0, 10 ** 8)) / 100 if rng.random() > 0.05 else None,
+            'status_label': rng.choice(STATUS_LABELS),
+            'submitted_at': submitted,
+            'reviewed_on': submitted.date(),
+            'review_comment': _name(rng, 8),
+        })
+    return {'count': rows, 'results': result}
+
+
+def time_calls(func, repeat):
+    """Call ``func`` ``repeat`` times; return (median ms, min ms, last result)."""
+    timings = []
+    result = None
+    for _i in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), min(timings), result
@@ -0,0 +1,63 @@
+"""
+Database connection counters and connection pool statistics.
+
+``connection_created`` fires each time Django sets up a connection: a new
+one without pooling, a checkout from the pool with it. Counting those per
+worker shows whether connections are actually being reused.
+"""
+
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# psycopg_pool.ConnectionPool.get_stats() keys exported as counters.
+POOL_COUNTERS = (
+    'requests_num',
+    'requests_queued',
+    'requests_wait_ms',
+    'requests_errors',
+    'returns_bad',
+    'connections_num',
+    'connections_ms',
+    'connections_errors',
+    'connections_lost',
+)
+# ... and as gauges.
+POOL_GAUGES = ('pool_min', 'pool_max', 'pool_size', 'pool_available', 'requests_waiting')
+
+_lock = threading.Lock()
+_setups = Counter()
+
+
+def _count_setup(sender, connection, **kwargs):
+    with _lock:
+        _setups[connection.alias] += 1
+
+
+def install():
+    connection_created.connect(_count_setup, dispatch_uid='monitoring.connections')
+
+
+def _pool_for(conn):
+    """The alias's pool if pooling is configured and already created."""
+    if not conn.settings_dict.get('OPTIONS', {}).get('pool'):
+        return None
+    return getattr(conn, '_connection_pools', {}).get(conn.alias)
+
+
+def connection_stats():
+    """``{alias: {'setups': n, 'pool': {stat: value} | None}}`` for this worker."""
+    with _lock:
+        setups = dict(_setups)
+    stats = {}
+    for conn in connections.all(initialized_only=True):
+        pool = _pool_for(conn)
+        stats[conn.alias] = {
+            'setups': setups.get(conn.alias, 0),
+            'pool': dict(pool.get_stats()) if pool is not None else None,
+        }
+    for alias, n in setups.items():
+        stats.setdefault(alias, {'setups': n, 'pool': None})
+    return stats
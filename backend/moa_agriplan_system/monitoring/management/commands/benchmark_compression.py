@@ -0,0 +1,132 @@
+import gzip
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from moa_agriplan_system import compression
+from moa_agriplan_system.renderers import ORJSONRenderer
+from monitoring.benchmarks import (
+    ministry_performance_payload,
+    performance_rows_payload,
+    time_calls,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare response bytes and modelled latency of uncompressed, gzip, "
+        "brotli and precompressed (cache hit) JSON on seeded dashboard payloads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic payloads.")
+        parser.add_argument("--sectors", type=int, default=6)
+        parser.add_argument("--departments", type=int, default=8, help="Departments per sector.")
+        parser.add_argument("--groups", type=int, default=4, help="Indicator groups per department.")
+        parser.add_argument("--indicators", type=int, default=12, help="Indicators per group.")
+        parser.add_argument("--rows", type=int, default=5000, help="Rows in the raw performance payload.")
+        parser.add_argument("--repeat", type=int, default=10, help="Timed runs per measurement.")
+        parser.add_argument(
+            "--bandwidth-mbps",
+            type=float,
+            default=10.0,
+            help="Link bandwidth used to model transfer time (default: 10 Mbit/s WAN).",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON instead of a table.",
+        )
+
+    def handle(self, *args, **options):
+        renderer = ORJSONRenderer()
+        payloads = {
+            "indicator-performance": renderer.render(ministry_performance_payload(
+                seed=options["seed"],
+                sectors=options["sectors"],
+                departments=options["departments"],
+                groups=options["groups"],
+                indicators=options["indicators"],
+            )),
+            "performance-rows": renderer.render(
+                performance_rows_payload(seed=options["seed"], rows=options["rows"])
+            ),
+        }
+        repeat = options["repeat"]
+        bytes_per_ms = options["bandwidth_mbps"] * 1_000_000 / 8 / 1000
+
+        variants = [("identity", None, {})]
+        for level in (1, 6, 9):
+            variants.append((f"gzip-{level}", compression.GZIP, {"API_COMPRESSION_GZIP_LEVEL": level}))
+        if compression.brotli is not None:
+            for quality in (4, 5, 11):
+                variants.append((f"br-{quality}", compression.BROTLI, {"API_COMPRESSION_BROTLI_QUALITY": quality}))
+        else:
+            self.stderr.write("brotli is not installed; only gzip is measured.")
+
+        results = []
+        for name, body in payloads.items():
+            for label, encoding, overrides in variants:
+                with override_settings(**overrides):
+                    served_ms, _, data = time_calls(lambda: self._serve(body, encoding), repeat)
+                    if encoding is not None:
+                        precompressed = compression.precompress(body)
+                        hit_ms, _, hit_data = time_calls(
+                            lambda: self._serve(body, encoding, precompressed), repeat
+                        )
+                        if hit_data != data or self._decode(data, encoding) != body:
+                            raise CommandError(f"{label} output does not round-trip for {name}")
+                    else:
+                        hit_ms = served_ms
+                transfer_ms = len(data) / bytes_per_ms
+                results.append({
+                    "payload": name,
+                    "encoding": label,
+                    "bytes": len(data),
+                    "ratio": round(len(body) / len(data), 2),
+                    "server_ms": round(served_ms, 3),
+                    "cached_server_ms": round(hit_ms, 3),
+                    "transfer_ms": round(transfer_ms, 1),
+                    "latency_ms": round(served_ms + transfer_ms, 1),
+                    "cached_latency_ms": round(hit_ms + transfer_ms, 1),
+                })
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"Modelled latency = server time + transfer at {options['bandwidth_mbps']:g} Mbit/s; "
+            "'cached' serves bytes stored by precompress()."
+        )
+        self.stdout.write(
+            f"{'payload':<24}{'encoding':<10}{'bytes':>10}{'ratio':>7}{'server ms':>11}"
+            f"{'transfer ms':>13}{'latency ms':>12}{'cached ms':>11}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['payload']:<24}{row['encoding']:<10}{row['bytes']:>10}{row['ratio']:>7.1f}"
+                f"{row['server_ms']:>11.2f}{row['transfer_ms']:>13.1f}{row['latency_ms']:>12.1f}"
+                f"{row['cached_latency_ms']:>11.1f}"
+            )
+
+    @staticmethod
+    def _serve(body, encoding, precompressed=None):
+        """Run ``body`` through CompressionMiddleware as a JSON response."""
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=encoding or "identity")
+
+        def view(request):
+            response = HttpResponse(body, content_type="application/json")
+            if precompressed is not None:
+                compression.attach_precompressed(response, precompressed)
+            return response
+
+        return compression.CompressionMiddleware(view)(request).content
+
+    @staticmethod
+    def _decode(data, encoding):
+        if encoding == compression.BROTLI:
+            return compression.brotli.decompress(data)
+        return gzip.decompress(data)
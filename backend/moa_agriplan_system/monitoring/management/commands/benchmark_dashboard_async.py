@@ -0,0 +1,104 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from moa_agriplan_system.async_api import gather_queries
+from users.dashboards import MINISTER_DASHBOARD_LOADERS, latest_plan_year
+from users.models import User
+
+DASHBOARD_ROLES = (User.Roles.EXECUTIVE, User.Roles.MINISTER_VIEW, User.Roles.STRATEGIC_STAFF)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency of the minister dashboard served synchronously and by "
+        "its async variant (under WSGI and ASGI), and of its queries run one "
+        "after another versus concurrently, against the current database. "
+        "--rtt-ms adds a simulated network round trip to every query, as with "
+        "a remote PostgreSQL server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="Plan year (default: latest).")
+        parser.add_argument("--quarter-months", type=int, choices=(3, 6, 9, 12))
+        parser.add_argument("--repeat", type=int, default=10, help="Timed runs per variant.")
+        parser.add_argument("--rtt-ms", type=float, default=0.0, help="Simulated database round trip per query.")
+
+    def handle(self, *args, **options):
+        year = options["year"] or latest_plan_year()
+        if not year:
+            raise CommandError("No annual plans; seed data first, e.g. with generate_ministry_data.")
+        user = User.objects.filter(role__in=DASHBOARD_ROLES, is_active=True).order_by("id").first()
+        if user is None:
+            raise CommandError(f"Need an active user with one of the roles {', '.join(DASHBOARD_ROLES)}.")
+
+        query = {"year": year}
+        if options["quarter_months"]:
+            query["quarter_months"] = options["quarter_months"]
+        repeat = options["repeat"]
+
+        rtt = options["rtt_ms"] / 1000
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(rtt)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        setup_test_environment()
+        if rtt:
+            connection_created.connect(add_delay, dispatch_uid="benchmark-dashboard-rtt")
+            connection.close()
+        try:
+            client = Client()
+            client.force_login(user)
+            async_client = AsyncClient()
+            async_client.force_login(user)
+
+            def endpoint(path):
+                def call():
+                    response = client.get(path, query)
+                    if response.status_code != 200:
+                        raise CommandError(f"{path} returned {response.status_code}")
+                return call
+
+            def asgi_endpoint(path):
+                def call():
+                    response = asyncio.run(async_client.get(path, query))
+                    if response.status_code != 200:
+                        raise CommandError(f"{path} returned {response.status_code}")
+                return call
+
+            variants = (
+                ("queries sequential", lambda: [load(year) for load in MINISTER_DASHBOARD_LOADERS]),
+                ("queries concurrent", lambda: asyncio.run(
+                    gather_queries(*((load, year) for load in MINISTER_DASHBOARD_LOADERS))
+                )),
+                ("endpoint sync (WSGI)", endpoint("/api/minister-dashboard/")),
+                ("endpoint async (WSGI)", endpoint("/api/async/minister-dashboard/")),
+                ("endpoint async (ASGI)", asgi_endpoint("/api/async/minister-dashboard/")),
+            )
+            self.stdout.write(
+                f"year {year}, quarter_months {options['quarter_months'] or '-'}, "
+                f"{repeat} runs, simulated RTT {options['rtt_ms']:.1f} ms"
+            )
+            self.stdout.write(f"{'variant':<24}{'median ms':>11}{'min ms':>9}")
+            for name, func in variants:
+                func()  # warm-up: connections, caches, thread pool
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    func()
+                    timings.append((time.perf_counter() - start) * 1000)
+                self.stdout.write(f"{name:<24}{statistics.median(timings):>11.1f}{min(timings):>9.1f}")
+        finally:
+            if rtt:
+                connection_created.disconnect(dispatch_uid="benchmark-dashboard-rtt")
+            teardown_test_environment()
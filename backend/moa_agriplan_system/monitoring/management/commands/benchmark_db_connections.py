@@ -0,0 +1,103 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+# (name, settings_dict overrides). Pool settings are only used on PostgreSQL.
+STRATEGIES = (
+    ("connect-per-request", {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False}),
+    ("persistent", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": False}),
+    ("persistent+health-checks", {"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True}),
+    ("pool", {"CONN_MAX_AGE": 0, "POOL": True}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database connection overhead for each connection "
+        "strategy: a new connection per request, persistent connections with and "
+        "without health checks, and a psycopg pool (PostgreSQL only). Each "
+        "simulated request runs Django's request start/finish connection "
+        "handling around --queries small queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias to benchmark.")
+        parser.add_argument("--requests", type=int, default=200, help="Simulated requests per strategy.")
+        parser.add_argument("--queries", type=int, default=1, help="Queries per simulated request.")
+        parser.add_argument("--strategy", action="append", help="Only this strategy (repeatable).")
+
+    def handle(self, *args, **options):
+        base = connections[options["database"]].settings_dict
+        strategies = [s for s in STRATEGIES if not options["strategy"] or s[0] in options["strategy"]]
+        if not strategies:
+            raise CommandError(f"Unknown strategy; choose from {', '.join(s[0] for s in STRATEGIES)}.")
+
+        self.stdout.write(f"database: {base['ENGINE']} {base.get('HOST') or ''} {base['NAME']}")
+        self.stdout.write(f"{'strategy':<26}{'median ms':>11}{'mean ms':>10}{'p95 ms':>9}{'connects':>10}")
+        baseline = None
+        for name, overrides in strategies:
+            wrapper = self._wrapper(base, overrides, name)
+            if wrapper is None:
+                self.stdout.write(f"{name:<26}  skipped: needs PostgreSQL and psycopg[pool]")
+                continue
+            try:
+                timings, connects = self._run(wrapper, options["requests"], options["queries"])
+            finally:
+                wrapper.close()
+                if overrides.get("POOL"):
+                    wrapper.close_pool()
+            median = statistics.median(timings)
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            line = f"{name:<26}{median:>11.3f}{statistics.mean(timings):>10.3f}{p95:>9.3f}{connects:>10}"
+            if baseline is None:
+                baseline = median
+            elif median:
+                line += f"   {baseline / median:.1f}x faster"
+            self.stdout.write(line)
+
+    def _wrapper(self, base, overrides, name):
+        settings_dict = copy.deepcopy(base)
+        overrides = dict(overrides)
+        if overrides.pop("POOL", False):
+            if base["ENGINE"] != "django.db.backends.postgresql":
+                return None
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                return None
+            settings_dict["OPTIONS"] = {**settings_dict.get("OPTIONS", {}), "pool": {"min_size": 1, "max_size": 2}}
+        else:
+            settings_dict.get("OPTIONS", {}).pop("pool", None)
+        settings_dict.update(overrides)
+        backend = load_backend(settings_dict["ENGINE"])
+        # Own alias so the pool and connection state never touch the real one.
+        return backend.DatabaseWrapper(settings_dict, alias=f"benchmark-{name}")
+
+    @staticmethod
+    def _run(wrapper, requests, queries):
+        # Warm up: open the first connection (and the pool) outside timing.
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        wrapper.close_if_unusable_or_obsolete()
+
+        connects = 0
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            # What django.db.close_old_connections does on request_started
+            # and request_finished.
+            wrapper.close_if_unusable_or_obsolete()
+            if wrapper.connection is None:
+                connects += 1
+            for _ in range(queries):
+                with wrapper.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+            wrapper.close_if_unusable_or_obsolete()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return timings, connects
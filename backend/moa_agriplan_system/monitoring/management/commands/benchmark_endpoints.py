@@ -0,0 +1,280 @@
+import io
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from indicators.models import Indicator
+from monitoring.queries import QueryCounter, instrument
+from plans.models import AnnualPlan
+from users.factories import UserFactory
+from users.models import User
+
+# (name, url name, query params). ``{year}`` and ``{indicator_id}`` are
+# filled from the seeded data set.
+ENDPOINTS = (
+    ("minister-dashboard", "api-minister-dashboard", {"year": "{year}"}),
+    ("minister-dashboard-async", "api-minister-dashboard-async", {"year": "{year}"}),
+    ("state-minister-dashboard", "api-state-minister-dashboard", {"year": "{year}"}),
+    ("indicator-performance", "api-indicator-performance", {"year": "{year}"}),
+    ("indicator-detail", "api-indicator-detail", {"indicator_id": "{indicator_id}"}),
+    ("activity-logs", "api-activity-logs", {}),
+    ("minister-review-summary", "api-minister-review-summary", {"year": "{year}"}),
+    ("sectors", "sector-list", {}),
+    ("departments", "department-list", {}),
+    ("indicator-groups", "indicatorgroup-list", {}),
+    ("indicators", "indicator-list", {}),
+    ("annual-plans", "annualplan-list", {"year": "{year}"}),
+    ("breakdowns", "breakdown-list", {}),
+    ("performances", "performance-list", {"year": "{year}"}),
+    ("users", "user-list", {}),
+    ("submission-windows", "submissionwindow-list", {}),
+    ("advisor-comments", "advisorcomment-list", {}),
+)
+
+ROLES = (
+    "superuser",
+    User.Roles.STATE_MINISTER,
+    User.Roles.ADVISOR,
+    User.Roles.STRATEGIC_STAFF,
+    User.Roles.EXECUTIVE,
+    User.Roles.LEAD_EXECUTIVE_BODY,
+    User.Roles.MINISTER_VIEW,
+)
+
+PREFIX = "Benchmark"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a fixed ministry-scale data set in a throwaway test database and "
+        "measure wall time, query count and peak Python memory of each API "
+        "endpoint for each role. Writes JSON results; with --compare, fails if "
+        "any endpoint regresses against a previous results file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="benchmark-endpoints.json", help="Results file to write.")
+        parser.add_argument(
+            "--compare",
+            metavar="BASELINE",
+            help="Previous results file; exit with an error if a budget regresses.",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Timed requests per endpoint and role.")
+        parser.add_argument("--endpoint", action="append", help="Only this endpoint (repeatable).")
+        parser.add_argument("--role", action="append", help="Only this role (repeatable).")
+        parser.add_argument("--seed", type=int, default=0, help="Seed passed to generate_ministry_data.")
+        parser.add_argument("--sectors", type=int, default=6)
+        parser.add_argument("--departments", type=int, default=8, help="Departments per sector.")
+        parser.add_argument("--indicators", type=int, default=20, help="Indicators per department.")
+        parser.add_argument("--years", type=int, default=3)
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database between runs (it is still reseeded).",
+        )
+        parser.add_argument(
+            "--time-tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative increase of median wall time (default: 0.25).",
+        )
+        parser.add_argument(
+            "--min-time-delta",
+            type=float,
+            default=5.0,
+            help="Ignore wall time increases smaller than this many ms (default: 5).",
+        )
+        parser.add_argument(
+            "--memory-tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative increase of peak memory (default: 0.25).",
+        )
+        parser.add_argument(
+            "--query-slack",
+            type=int,
+            default=0,
+            help="Allowed increase in query count (default: 0).",
+        )
+
+    def handle(self, *args, **options):
+        endpoints = [e for e in ENDPOINTS if not options["endpoint"] or e[0] in options["endpoint"]]
+        roles = [r for r in ROLES if not options["role"] or r.lower() in {x.lower() for x in options["role"]}]
+        if not endpoints or not roles:
+            raise CommandError("No endpoints or roles selected.")
+        baseline = None
+        if options["compare"]:
+            baseline = self._load(options["compare"])
+
+        verbosity = self.verbosity = options["verbosity"]
+        setup_test_environment()
+        old_config = setup_databases(verbosity=max(verbosity - 1, 0), interactive=False, keepdb=options["keepdb"])
+        try:
+            context = self._seed(options)
+            results = self._run(endpoints, roles, context, options["repeat"])
+        finally:
+            teardown_databases(old_config, verbosity=max(verbosity - 1, 0), keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": options["repeat"],
+                "dataset": {k: options[k] for k in ("seed", "sectors", "departments", "indicators", "years")},
+                "context": context,
+            },
+            "results": results,
+        }
+        Path(options["output"]).write_text(json.dumps(report, indent=2))
+        self._write_table(results)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = self._compare(baseline, results, options)
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(self.style.ERROR(line))
+                raise CommandError(f"{len(regressions)} budget regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def _load(self, path):
+        try:
+            data = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}") from exc
+        return {(r["endpoint"], r["role"]): r for r in data.get("results", [])}
+
+    def _seed(self, options):
+        call_command(
+            "generate_ministry_data",
+            seed=options["seed"],
+            sectors=options["sectors"],
+            departments=options["departments"],
+            indicators=options["indicators"],
+            years=options["years"],
+            prefix=PREFIX,
+            clear=True,
+            stdout=self.stdout if options["verbosity"] > 1 else io.StringIO(),
+        )
+        UserFactory(
+            username=f"{PREFIX.lower()}_superuser",
+            is_superuser=True,
+            is_staff=True,
+            role=User.Roles.EXECUTIVE,
+        )
+        year = AnnualPlan.objects.order_by("-year").values_list("year", flat=True).first()
+        indicator_id = (
+            Indicator.objects.filter(name__startswith=f"{PREFIX} ").order_by("id").values_list("id", flat=True).first()
+        )
+        return {"year": year, "indicator_id": indicator_id}
+
+    def _user_for(self, role):
+        users = User.objects.filter(username__startswith=f"{PREFIX.lower()}_").order_by("id")
+        if role == "superuser":
+            return users.filter(is_superuser=True).first()
+        return users.filter(role=role, is_superuser=False).first()
+
+    def _run(self, endpoints, roles, context, repeat):
+        results = []
+        for role in roles:
+            user = self._user_for(role)
+            if user is None:
+                self.stderr.write(f"No generated user for role {role}; skipped.")
+                continue
+            client = APIClient()
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+            for name, url_name, params in endpoints:
+                path = reverse(url_name)
+                query = {k: v.format(**context) for k, v in params.items()}
+
+                # Warm-up: fills per-process caches so every role/endpoint is
+                # measured in the same steady state.
+                response = client.get(path, query)
+
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    client.get(path, query)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                queries = QueryCounter()
+                with instrument(queries):
+                    client.get(path, query)
+
+                tracemalloc.start()
+                try:
+                    client.get(path, query)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+
+                timings.sort()
+                results.append({
+                    "endpoint": name,
+                    "role": str(role),
+                    "status": response.status_code,
+                    "bytes": len(response.content),
+                    "queries": queries.count,
+                    "wall_ms_median": round(statistics.median(timings), 2),
+                    "wall_ms_max": round(timings[-1], 2),
+                    "peak_kib": round(peak / 1024, 1),
+                })
+                if self.verbosity > 1:
+                    self.stdout.write(f"  {role:<20} {name:<26} {results[-1]['wall_ms_median']:>9.1f} ms")
+        return results
+
+    def _write_table(self, results):
+        self.stdout.write(
+            f"{'endpoint':<26}{'role':<21}{'status':>7}{'queries':>9}{'median ms':>11}{'max ms':>9}{'peak KiB':>10}"
+        )
+        for r in sorted(results, key=lambda r: (r["endpoint"], r["role"])):
+            self.stdout.write(
+                f"{r['endpoint']:<26}{r['role']:<21}{r['status']:>7}{r['queries']:>9}"
+                f"{r['wall_ms_median']:>11.1f}{r['wall_ms_max']:>9.1f}{r['peak_kib']:>10.1f}"
+            )
+
+    def _compare(self, baseline, results, options):
+        regressions = []
+        for r in results:
+            base = baseline.get((r["endpoint"], r["role"]))
+            if base is None:
+                continue
+            key = f"{r['endpoint']} as {r['role']}"
+            if r["status"] != base["status"]:
+                regressions.append(f"{key}: status {base['status']} -> {r['status']}")
+            if r["queries"] > base["queries"] + options["query_slack"]:
+                regressions.append(f"{key}: queries {base['queries']} -> {r['queries']}")
+            time_limit = max(
+                base["wall_ms_median"] * (1 + options["time_tolerance"]),
+                base["wall_ms_median"] + options["min_time_delta"],
+            )
+            if r["wall_ms_median"] > time_limit:
+                regressions.append(
+                    f"{key}: median {base['wall_ms_median']:.1f} ms -> {r['wall_ms_median']:.1f} ms"
+                )
+            if r["peak_kib"] > base["peak_kib"] * (1 + options["memory_tolerance"]):
+                regressions.append(f"{key}: peak {base['peak_kib']:.0f} KiB -> {r['peak_kib']:.0f} KiB")
+        return regressions
@@ -0,0 +1,106 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from moa_agriplan_system.parsers import ORJSONParser
+from moa_agriplan_system.renderers import ORJSONRenderer
+from monitoring.benchmarks import (
+    ministry_performance_payload,
+    performance_rows_payload,
+    time_calls,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the orjson-backed ones on a "
+        "seeded full-ministry dashboard payload: render/parse time and bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic payload.")
+        parser.add_argument("--sectors", type=int, default=6)
+        parser.add_argument("--departments", type=int, default=8, help="Departments per sector.")
+        parser.add_argument("--groups", type=int, default=4, help="Indicator groups per department.")
+        parser.add_argument("--indicators", type=int, default=12, help="Indicators per group.")
+        parser.add_argument("--rows", type=int, default=5000, help="Rows in the raw performance payload.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per measurement.")
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON instead of a table.",
+        )
+
+    def handle(self, *args, **options):
+        payloads = {
+            "indicator-performance": ministry_performance_payload(
+                seed=options["seed"],
+                sectors=options["sectors"],
+                departments=options["departments"],
+                groups=options["groups"],
+                indicators=options["indicators"],
+            ),
+            "performance-rows": performance_rows_payload(seed=options["seed"], rows=options["rows"]),
+        }
+        repeat = options["repeat"]
+        implementations = (
+            ("drf", JSONRenderer(), JSONParser()),
+            ("orjson", ORJSONRenderer(), ORJSONParser()),
+        )
+
+        results = []
+        for name, payload in payloads.items():
+            rendered = {}
+            for label, renderer, parser in implementations:
+                render_ms, render_min, body = time_calls(lambda: renderer.render(payload), repeat)
+                parse_ms, parse_min, _ = time_calls(lambda: parser.parse(io.BytesIO(body)), repeat)
+                rendered[label] = body
+                results.append({
+                    "payload": name,
+                    "implementation": label,
+                    "bytes": len(body),
+                    "render_ms": round(render_ms, 3),
+                    "render_min_ms": round(render_min, 3),
+                    "parse_ms": round(parse_ms, 3),
+                    "parse_min_ms": round(parse_min, 3),
+                })
+            identical = rendered["drf"] == rendered["orjson"]
+            equivalent = identical or json.loads(rendered["drf"]) == json.loads(rendered["orjson"])
+            for row in results[-len(implementations):]:
+                row["identical_bytes"] = identical
+                row["equivalent"] = equivalent
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self._write_table(results)
+
+    def _write_table(self, results):
+        self.stdout.write(
+            f"{'payload':<24}{'impl':<8}{'bytes':>11}{'render ms':>11}{'parse ms':>10}  output"
+        )
+        baseline = {}
+        for row in results:
+            if row["implementation"] == "drf":
+                baseline[row["payload"]] = row
+            base = baseline[row["payload"]]
+            line = (
+                f"{row['payload']:<24}{row['implementation']:<8}{row['bytes']:>11}"
+                f"{row['render_ms']:>11.2f}{row['parse_ms']:>10.2f}  "
+            )
+            if row is base:
+                line += "baseline"
+            else:
+                line += "identical" if row["identical_bytes"] else (
+                    "equivalent" if row["equivalent"] else "DIFFERS"
+                )
+                line += (
+                    f" (render x{base['render_ms'] / max(row['render_ms'], 1e-6):.1f},"
+                    f" parse x{base['parse_ms'] / max(row['parse_ms'], 1e-6):.1f})"
+                )
+            style = self.style.ERROR if not row["equivalent"] else (lambda s: s)
+            self.stdout.write(style(line))
+
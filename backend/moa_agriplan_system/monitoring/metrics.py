@@ -0,0 +1,107 @@
+"""
+In-process per-endpoint request histograms.
+
+``RequestMetricsMiddleware`` records every request here under the resolved
+URL name (``api-indicator-performance``, ``indicator-list``, ...). Each
+worker process keeps its own registry; counts are cumulative since the
+worker started.
+"""
+
+import threading
+from bisect import bisect_left
+
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+SIZE_BUCKETS = (1024, 10240, 102400, 512000, 1048576, 5242880, 10485760)
+
+UNRESOLVED = '<unresolved>'
+
+
+class Histogram:
+    """Histogram over upper-bound ``buckets`` plus a final +Inf slot.
+
+    ``to_dict`` exports cumulative counts, as Prometheus expects.
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self):
+        cumulative = []
+        running = 0
+        for c in self.counts:
+            running += c
+            cumulative.append(running)
+        return {
+            'buckets': list(self.buckets),
+            'cumulative_counts': cumulative,
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+        }
+
+
+class EndpointStats:
+    __slots__ = ('duration_ms', 'db_ms', 'serializer_ms', 'queries', 'response_bytes', 'statuses')
+
+    def __init__(self):
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+        self.db_ms = Histogram(DURATION_BUCKETS_MS)
+        self.serializer_ms = Histogram(DURATION_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+
+    def to_dict(self):
+        return {
+            'duration_ms': self.duration_ms.to_dict(),
+            'db_ms': self.db_ms.to_dict(),
+            'serializer_ms': self.serializer_ms.to_dict(),
+            'queries': self.queries.to_dict(),
+            'response_bytes': self.response_bytes.to_dict(),
+            'statuses': dict(self.statuses),
+        }
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, status, duration_ms, db_ms, queries, serializer_ms, response_bytes=None):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.duration_ms.observe(duration_ms)
+            stats.db_ms.observe(db_ms)
+            stats.serializer_ms.observe(serializer_ms)
+            stats.queries.observe(queries)
+            if response_bytes is not None:
+                stats.response_bytes.observe(response_bytes)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def snapshot(self):
+        """``{endpoint: {histogram name: {...}, 'statuses': {...}}}``."""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._endpoints.items()}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+
+registry = RequestMetrics()
@@ -0,0 +1,269 @@
+"""
+Per-request query and timing instrumentation.
+
+``RequestMetricsMiddleware`` measures, for every request: wall time, number
+of SQL queries and total time spent in them, the slowest statements, time
+spent producing ``serializer.data`` and response size. Each request is
+recorded under its resolved URL name in ``monitoring.metrics.registry``.
+
+When the request carries the ``REQUEST_METRICS_HEADER`` header (default
+``X-Debug-Metrics``) and the caller is a superuser, or ``DEBUG`` is on, the
+measurements are also returned as response headers, including a standard
+``Server-Timing`` header that browser dev tools display.
+
+``ProfilingMiddleware`` captures a cProfile or sampled profile plus the SQL
+log of individual requests; see ``monitoring.profiling``.
+"""
+
+import cProfile
+import contextvars
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import CachedTokenAuthentication
+
+from . import profiling
+from .metrics import UNRESOLVED, registry
+from .queries import QueryCounter, QueryLog, instrument
+from .workers import maybe_flush
+
+_current_sample = contextvars.ContextVar('request_metrics_sample', default=None)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class RequestSample:
+    __slots__ = ('queries', 'serializer_time', 'serializer_depth')
+
+    def __init__(self, keep_slowest):
+        self.queries = QueryCounter(keep_slowest=keep_slowest)
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+
+def install_serializer_timer():
+    """Time ``BaseSerializer.data`` for the request being measured.
+
+    ``Serializer.data`` and ``ListSerializer.data`` both go through
+    ``BaseSerializer.data``; only the outermost call is timed so nested
+    serializers are not counted twice.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.__dict__['data']
+    if getattr(original.fget, 'timed', False):
+        return
+
+    def data(self):
+        sample = _current_sample.get()
+        if sample is None or sample.serializer_depth:
+            return original.fget(self)
+        sample.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            sample.serializer_time += time.perf_counter() - start
+            sample.serializer_depth -= 1
+
+    data.timed = True
+    BaseSerializer.data = property(data)
+
+
+def _header_safe(text, limit):
+    text = _WHITESPACE.sub(' ', text).strip()
+    if len(text) > limit:
+        text = text[:limit - 3] + '...'
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        header = getattr(settings, 'REQUEST_METRICS_HEADER', 'X-Debug-Metrics')
+        self.meta_key = 'HTTP_' + header.upper().replace('-', '_')
+        self.keep_slowest = getattr(settings, 'REQUEST_METRICS_SLOWEST', 5)
+
+    def __call__(self, request):
+        sample = RequestSample(self.keep_slowest)
+        token = _current_sample.set(sample)
+        start = time.perf_counter()
+        try:
+            with instrument(sample.queries):
+                response = self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name if match else None) or UNRESOLVED
+        response_bytes = None if response.streaming else len(response.content)
+        db_ms = sample.queries.duration * 1000
+        serializer_ms = sample.serializer_time * 1000
+
+        registry.record(
+            endpoint,
+            status=response.status_code,
+            duration_ms=duration_ms,
+            db_ms=db_ms,
+            queries=sample.queries.count,
+            serializer_ms=serializer_ms,
+            response_bytes=response_bytes,
+        )
+        maybe_flush()
+
+        if request.META.get(self.meta_key) and self._may_see_metrics(request):
+            self._add_headers(response, endpoint, sample, duration_ms, db_ms, serializer_ms, response_bytes)
+        return response
+
+    @staticmethod
+    def _may_see_metrics(request):
+        if settings.DEBUG:
+            return True
+        # DRF copies the token-authenticated user onto the HttpRequest.
+        user = getattr(request, 'user', None)
+        return bool(user is not None and getattr(user, 'is_superuser', False))
+
+    @staticmethod
+    def _add_headers(response, endpoint, sample, duration_ms, db_ms, serializer_ms, response_bytes):
+        count = sample.queries.count
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{count} queries", '
+            f'serializer;dur={serializer_ms:.1f}, '
+            f'total;dur={duration_ms:.1f}'
+        )
+        response['X-Endpoint'] = _header_safe(endpoint, 200)
+        response['X-Query-Count'] = str(count)
+        response['X-DB-Time-Ms'] = f'{db_ms:.1f}'
+        response['X-Serializer-Time-Ms'] = f'{serializer_ms:.1f}'
+        response['X-Request-Time-Ms'] = f'{duration_ms:.1f}'
+        if response_bytes is not None:
+            response['X-Response-Bytes'] = str(response_bytes)
+        for i, (seconds, sql) in enumerate(sample.queries.slowest(), start=1):
+            response[f'X-Slow-Query-{i}'] = f'{seconds * 1000:.1f}ms {_header_safe(sql, 500)}'
+
+
+class ProfilingMiddleware:
+    """Profile single requests and store the result with its SQL log.
+
+    A superuser asks for a profile with the ``PROFILE_HEADER`` header
+    (default ``X-Profile``) or a ``_profile`` query parameter, valued
+    ``cprofile`` (default) or ``sample``. With ``PROFILE_SLOW_MS`` set, every
+    request is also sampled and kept if it took longer than that, at most
+    once per endpoint every ``PROFILE_AUTO_COOLDOWN`` seconds per worker.
+    Captures are listed and downloaded under ``/api/profiles/``.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        header = getattr(settings, 'PROFILE_HEADER', 'X-Profile')
+        self.meta_key = 'HTTP_' + header.upper().replace('-', '_')
+        self.slow_ms = getattr(settings, 'PROFILE_SLOW_MS', 0)
+        self.cooldown = getattr(settings, 'PROFILE_AUTO_COOLDOWN', 300)
+        self._last_auto = {}
+
+    def __call__(self, request):
+        mode = self._requested_mode(request)
+        trigger = 'requested' if mode else None
+        if mode is None and self.slow_ms:
+            mode, trigger = profiling.SAMPLE, 'slow'
+        if mode is None:
+            return self.get_response(request)
+
+        profiler = stacks = None
+        if mode == profiling.CPROFILE:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is active in this process (Python 3.12+
+                # allows only one); sample instead.
+                profiler = None
+                mode = profiling.SAMPLE
+        if mode == profiling.SAMPLE:
+            stacks = profiling.sampler().start()
+
+        queries = QueryLog(limit=getattr(settings, 'PROFILE_MAX_QUERIES', 2000))
+        started_at = timezone.now()
+        start = time.perf_counter()
+        try:
+            with instrument(queries):
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if stacks is not None:
+                profiling.sampler().stop()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name if match else None) or UNRESOLVED
+        if trigger == 'slow' and not self._take_slow(endpoint, duration_ms):
+            return response
+
+        meta = {
+            'id': profiling.new_capture_id(),
+            'created_at': started_at.isoformat(),
+            'trigger': trigger,
+            'mode': mode,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'endpoint': endpoint,
+            'user': getattr(getattr(request, 'user', None), 'username', None) or None,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 1),
+            'db_ms': round(queries.duration * 1000, 1),
+            'query_count': queries.count,
+            'queries_dropped': queries.dropped,
+            'queries': queries.entries,
+        }
+        if profiler is not None:
+            data = profiling.cprofile_dump(profiler)
+            meta['summary'] = profiling.cprofile_summary(profiler)
+        else:
+            data = profiling.folded_dump(stacks)
+            meta['summary'] = profiling.folded_summary(stacks)
+        capture_id = profiling.save_capture(meta, data)
+        if trigger == 'requested':
+            response['X-Profile-Id'] = capture_id
+        return response
+
+    def _requested_mode(self, request):
+        value = request.META.get(self.meta_key) or request.GET.get('_profile')
+        if not value:
+            return None
+        value = value.strip().lower()
+        mode = value if value in profiling.MODES else profiling.CPROFILE
+        return mode if self._is_superuser(request) else None
+
+    @staticmethod
+    def _is_superuser(request):
+        # Runs before DRF authenticates the request, so resolve the token
+        # here; session users are already on request.user.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.is_superuser
+        try:
+            result = CachedTokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return bool(result and result[0].is_superuser)
+
+    def _take_slow(self, endpoint, duration_ms):
+        if duration_ms < self.slow_ms:
+            return False
+        now = time.monotonic()
+        last = self._last_auto.get(endpoint)
+        if last is not None and now - last < self.cooldown:
+            return False
+        self._last_auto[endpoint] = now
+        return True
@@ -0,0 +1,220 @@
+"""
+Request profiles captured by ``ProfilingMiddleware`` and kept on disk.
+
+A capture is two files in ``PROFILE_DIR`` sharing an id:
+
+* ``<id>.json`` - request metadata, the full SQL log and a text summary;
+* ``<id>.prof`` - a cProfile dump (open with ``pstats`` or snakeviz), or
+  ``<id>.folded`` - sampled stacks in folded format (flamegraph.pl,
+  speedscope).
+
+Captures beyond ``PROFILE_MAX_CAPTURES`` or older than
+``PROFILE_RETENTION_DAYS`` are deleted whenever a new one is saved.
+"""
+
+import io
+import json
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+from moa_agriplan_system.shared_state import write_atomic
+
+CPROFILE = 'cprofile'
+SAMPLE = 'sample'
+MODES = (CPROFILE, SAMPLE)
+
+SUFFIXES = {CPROFILE: '.prof', SAMPLE: '.folded'}
+
+CAPTURE_ID = re.compile(r'^\d{8}T\d{6}-\d+-[0-9a-f]{6}$')
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR)
+
+
+def _frame_label(code):
+    parts = Path(code.co_filename).parts[-2:]
+    return f'{code.co_name} ({"/".join(parts)}:{code.co_firstlineno})'
+
+
+def _fold(frame):
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class StackSampler:
+    """Samples the Python stacks of registered threads from one daemon thread.
+
+    Sampling costs a stack walk per registered thread per interval, and the
+    thread only runs while at least one request is registered.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._targets = {}  # thread ident -> Counter of folded stacks
+        self._thread = None
+
+    def start(self, ident=None):
+        ident = ident or threading.get_ident()
+        stacks = Counter()
+        with self._lock:
+            self._targets[ident] = stacks
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+                self._thread.start()
+            self._wake.set()
+        return stacks
+
+    def stop(self, ident=None):
+        with self._lock:
+            self._targets.pop(ident or threading.get_ident(), None)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                targets = list(self._targets.items())
+                if not targets:
+                    self._wake.clear()
+            if not targets:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for ident, stacks in targets:
+                frame = frames.get(ident)
+                if frame is not None and ident != own:
+                    stacks[_fold(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def sampler():
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StackSampler(getattr(settings, 'PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000)
+    return _sampler
+
+
+def cprofile_summary(profiler, limit=40):
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return out.getvalue()
+
+
+def cprofile_dump(profiler):
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def folded_summary(stacks, limit=40):
+    """Leaf functions by share of samples, as plain text."""
+    total = sum(stacks.values())
+    if not total:
+        return 'No samples (request finished within one sampling interval).\n'
+    leaves = Counter()
+    for stack, n in stacks.items():
+        leaves[stack.rsplit(';', 1)[-1]] += n
+    lines = [f'{total} samples\n', f'{"samples":>8} {"share":>7}  function']
+    for label, n in leaves.most_common(limit):
+        lines.append(f'{n:>8} {n / total:>7.1%}  {label}')
+    return '\n'.join(lines) + '\n'
+
+
+def folded_dump(stacks):
+    return ''.join(f'{stack} {n}\n' for stack, n in sorted(stacks.items()))
+
+
+def new_capture_id():
+    return f'{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-{os.urandom(3).hex()}'
+
+
+def save_capture(meta, profile_data):
+    """Write a capture and apply the retention limits. Returns its id."""
+    capture_id = meta['id']
+    directory = profile_dir()
+    meta['file'] = capture_id + SUFFIXES[meta['mode']]
+    write_atomic(directory / meta['file'], profile_data)
+    write_atomic(directory / f'{capture_id}.json', json.dumps(meta))
+    prune()
+    return capture_id
+
+
+def _capture_ids():
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(
+        (p.stem for p in directory.glob('*.json') if CAPTURE_ID.match(p.stem)),
+        reverse=True,
+    )
+
+
+def delete_capture(capture_id):
+    for suffix in ('.json', *SUFFIXES.values()):
+        (profile_dir() / f'{capture_id}{suffix}').unlink(missing_ok=True)
+
+
+def prune():
+    keep = getattr(settings, 'PROFILE_MAX_CAPTURES', 100)
+    max_age = getattr(settings, 'PROFILE_RETENTION_DAYS', 7) * 86400
+    now = time.time()
+    for n, capture_id in enumerate(_capture_ids()):
+        path = profile_dir() / f'{capture_id}.json'
+        try:
+            expired = now - path.stat().st_mtime > max_age
+        except FileNotFoundError:
+            continue
+        if n >= keep or expired:
+            delete_capture(capture_id)
+
+
+def load_capture(capture_id):
+    """Full metadata of a capture, or None if it does not exist."""
+    if not CAPTURE_ID.match(capture_id):
+        return None
+    try:
+        return json.loads((profile_dir() / f'{capture_id}.json').read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def list_captures():
+    """Metadata of all captures, newest first, without SQL log or summary."""
+    captures = []
+    for capture_id in _capture_ids():
+        meta = load_capture(capture_id)
+        if meta is None:
+            continue
+        meta.pop('queries', None)
+        meta.pop('summary', None)
+        captures.append(meta)
+    return captures
+
+
+def capture_file(capture_id):
+    meta = load_capture(capture_id)
+    if meta is None:
+        return None
+    path = profile_dir() / meta['file']
+    return path if path.is_file() else None
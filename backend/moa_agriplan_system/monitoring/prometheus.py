@@ -0,0 +1,189 @@
+"""
+Prometheus text exposition (format 0.0.4) of API and workflow health.
+
+Request histograms, cache counters and database connection statistics come
+from every worker's snapshot (see ``monitoring.workers``) and are summed;
+workflow gauges are read from the database and the fiscal calendar at
+scrape time.
+"""
+
+from django.db.models import Count
+from django.utils import timezone
+
+from plans.fiscal_calendar import fiscal_calendar
+from plans.models import QuarterlyBreakdown, QuarterlyPerformance, SubmissionWindow
+
+from .connections import POOL_COUNTERS, POOL_GAUGES
+from .workers import collect
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (snapshot key, metric name, help, divisor turning the stored unit into the exported one)
+HISTOGRAMS = (
+    ('duration_ms', 'moa_http_request_duration_seconds', 'Wall time of API requests.', 1000),
+    ('db_ms', 'moa_http_request_db_seconds', 'Time spent in SQL per request.', 1000),
+    ('serializer_ms', 'moa_http_request_serializer_seconds', 'Time spent building serializer data per request.', 1000),
+    ('queries', 'moa_http_request_queries', 'SQL queries per request.', 1),
+    ('response_bytes', 'moa_http_response_size_bytes', 'Response body size.', 1),
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def header(self, name, kind, help_text):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name, value, **labels):
+        self.lines.append(f'{name}{_labels(**labels)} {_number(value)}')
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def _merge_histograms(snapshots, key):
+    """``{endpoint: {'buckets', 'cumulative_counts', 'count', 'sum'}}`` summed over workers."""
+    merged = {}
+    for snap in snapshots:
+        for endpoint, stats in snap.get('endpoints', {}).items():
+            hist = stats[key]
+            current = merged.get(endpoint)
+            if current is None:
+                merged[endpoint] = {
+                    'buckets': hist['buckets'],
+                    'cumulative_counts': list(hist['cumulative_counts']),
+                    'count': hist['count'],
+                    'sum': hist['sum'],
+                }
+                continue
+            if current['buckets'] != hist['buckets']:
+                # Layouts only differ while workers of two releases overlap.
+                continue
+            current['cumulative_counts'] = [a + b for a, b in zip(current['cumulative_counts'], hist['cumulative_counts'])]
+            current['count'] += hist['count']
+            current['sum'] += hist['sum']
+    return merged
+
+
+def _request_metrics(out, snapshots):
+    for key, name, help_text, divisor in HISTOGRAMS:
+        merged = _merge_histograms(snapshots, key)
+        out.header(name, 'histogram', help_text)
+        for endpoint in sorted(merged):
+            hist = merged[endpoint]
+            bounds = [b / divisor for b in hist['buckets']] + [float('inf')]
+            for bound, count in zip(bounds, hist['cumulative_counts']):
+                out.sample(f'{name}_bucket', count, endpoint=endpoint, le=_number(float(bound)))
+            out.sample(f'{name}_sum', hist['sum'] / divisor, endpoint=endpoint)
+            out.sample(f'{name}_count', hist['count'], endpoint=endpoint)
+
+    statuses = {}
+    for snap in snapshots:
+        for endpoint, stats in snap.get('endpoints', {}).items():
+            for status, count in stats['statuses'].items():
+                statuses[endpoint, str(status)] = statuses.get((endpoint, str(status)), 0) + count
+    out.header('moa_http_responses_total', 'counter', 'API responses by endpoint and status code.')
+    for (endpoint, status), count in sorted(statuses.items()):
+        out.sample('moa_http_responses_total', count, endpoint=endpoint, status=status)
+
+
+def _cache_metrics(out, snapshots):
+    totals = {}
+    for snap in snapshots:
+        for cache, counts in snap.get('caches', {}).items():
+            hits, misses = totals.get(cache, (0, 0))
+            totals[cache] = (hits + counts['hits'], misses + counts['misses'])
+    out.header('moa_cache_requests_total', 'counter', 'In-process cache lookups by result.')
+    for cache, (hits, misses) in sorted(totals.items()):
+        out.sample('moa_cache_requests_total', hits, cache=cache, result='hit')
+        out.sample('moa_cache_requests_total', misses, cache=cache, result='miss')
+    out.header('moa_cache_hit_ratio', 'gauge', 'Share of in-process cache lookups served from cache.')
+    for cache, (hits, misses) in sorted(totals.items()):
+        total = hits + misses
+        out.sample('moa_cache_hit_ratio', hits / total if total else 0.0, cache=cache)
+
+
+def _database_metrics(out, snapshots):
+    setups = {}
+    pools = {}
+    for snap in snapshots:
+        for alias, db in snap.get('databases', {}).items():
+            setups[alias] = setups.get(alias, 0) + db['setups']
+            if db['pool'] is not None:
+                totals = pools.setdefault(alias, {})
+                for key in POOL_COUNTERS + POOL_GAUGES:
+                    totals[key] = totals.get(key, 0) + db['pool'].get(key, 0)
+    out.header('moa_db_connection_setups_total', 'counter', 'Connections set up by Django (opened, or checked out when pooling).')
+    for alias, n in sorted(setups.items()):
+        out.sample('moa_db_connection_setups_total', n, alias=alias)
+    if not pools:
+        return
+    for key in POOL_GAUGES:
+        name = f'moa_db_{key}' if key.startswith('pool_') else f'moa_db_pool_{key}'
+        out.header(name, 'gauge', f'psycopg pool {key}, summed over workers.')
+        for alias, totals in sorted(pools.items()):
+            out.sample(name, totals[key], alias=alias)
+    for key in POOL_COUNTERS:
+        name = f'moa_db_pool_{key}_total'
+        out.header(name, 'counter', f'psycopg pool {key}, summed over workers.')
+        for alias, totals in sorted(pools.items()):
+            out.sample(name, totals[key], alias=alias)
+
+
+def _workflow_metrics(out):
+    for model, name, help_text in (
+        (QuarterlyBreakdown, 'moa_breakdowns', 'Quarterly breakdowns by plan year and status.'),
+        (QuarterlyPerformance, 'moa_performances', 'Quarterly performance reports by plan year and status.'),
+    ):
+        rows = model.objects.values('plan__year', 'status').annotate(n=Count('id')).order_by('plan__year', 'status')
+        out.header(name, 'gauge', help_text)
+        for row in rows:
+            out.sample(name, row['n'], year=row['plan__year'], status=row['status'])
+
+    open_types = fiscal_calendar.open_windows(timezone.now())
+    out.header('moa_submission_window_open', 'gauge', 'Whether each submission window is open now (1) or closed (0).')
+    for window_type in SubmissionWindow.WindowType.values:
+        out.sample('moa_submission_window_open', int(window_type in open_types), window_type=window_type)
+
+
+def _worker_metrics(out, snapshots):
+    out.header('moa_workers', 'gauge', 'Worker processes that reported metrics recently.')
+    out.sample('moa_workers', len(snapshots))
+    out.header('moa_worker_resident_memory_bytes', 'gauge', 'Resident memory of each worker process.')
+    for snap in sorted(snapshots, key=lambda s: s['pid']):
+        if snap.get('rss_bytes') is not None:
+            out.sample('moa_worker_resident_memory_bytes', snap['rss_bytes'], pid=snap['pid'])
+    out.header('moa_worker_start_time_seconds', 'gauge', 'Unix time each worker process started.')
+    for snap in sorted(snapshots, key=lambda s: s['pid']):
+        out.sample('moa_worker_start_time_seconds', snap['started_at'], pid=snap['pid'])
+
+
+def render():
+    snapshots = collect()
+    out = _Writer()
+    _request_metrics(out, snapshots)
+    _cache_metrics(out, snapshots)
+    _database_metrics(out, snapshots)
+    _workflow_metrics(out)
+    _worker_metrics(out, snapshots)
+    return out.text()
@@ -0,0 +1,126 @@
+"""
+Counting and timing of database queries.
+
+``QueryCounter`` is installed with ``connection.execute_wrapper`` so it sees
+every query on that connection, unlike ``CaptureQueriesContext`` which reads
+``connection.queries_log`` (capped at 9000 entries and only populated with
+debug cursors).
+
+``instrument`` installs wrappers on every connection of the current thread.
+Threads that run queries on a request's behalf (``async_api.gather_queries``)
+have connections of their own; ``propagate`` installs the wrappers of the
+context they run in on those, so their queries count towards the request.
+The wrappers are therefore thread-safe.
+"""
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_active_wrappers = contextvars.ContextVar('query_wrappers', default=())
+
+
+def _install(stack, wrappers):
+    for conn in connections.all():
+        for wrapper in wrappers:
+            stack.enter_context(conn.execute_wrapper(wrapper))
+
+
+@contextmanager
+def instrument(*wrappers):
+    """Install ``wrappers`` on this thread's connections and publish them to
+    ``propagate`` for the duration of the block."""
+    token = _active_wrappers.set(_active_wrappers.get() + wrappers)
+    try:
+        with ExitStack() as stack:
+            _install(stack, wrappers)
+            yield
+    finally:
+        _active_wrappers.reset(token)
+
+
+@contextmanager
+def propagate():
+    """Install the wrappers active in the current context on this thread's
+    connections; for worker threads running a copy of a request's context."""
+    with ExitStack() as stack:
+        _install(stack, _active_wrappers.get())
+        yield
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts queries and their total duration.
+
+    With ``keep_slowest=N`` it also remembers the N slowest statements.
+    """
+
+    def __init__(self, keep_slowest=0):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.keep_slowest = keep_slowest
+        self._slowest = []  # min-heap of (duration, seq, sql)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+                if self.keep_slowest:
+                    entry = (elapsed, next(self._seq), sql)
+                    if len(self._slowest) < self.keep_slowest:
+                        heapq.heappush(self._slowest, entry)
+                    elif elapsed > self._slowest[0][0]:
+                        heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self):
+        """``[(seconds, sql), ...]`` slowest first."""
+        return [(d, sql) for d, _, sql in sorted(self._slowest, reverse=True)]
+
+
+class QueryLog:
+    """``execute_wrapper`` that records every statement, up to ``limit``.
+
+    Entries are ``(offset_ms, duration_ms, sql)`` where the offset is taken
+    from when the log was created. Statements past the limit are counted in
+    ``dropped`` but not kept.
+    """
+
+    def __init__(self, limit=2000):
+        self.limit = limit
+        self.entries = []
+        self.dropped = 0
+        self.duration = 0.0  # seconds
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.duration += elapsed
+                if len(self.entries) < self.limit:
+                    self.entries.append((
+                        round((start - self._origin) * 1000, 3),
+                        round(elapsed * 1000, 3),
+                        sql,
+                    ))
+                else:
+                    self.dropped += 1
+
+    @property
+    def count(self):
+        return len(self.entries) + self.dropped
@@ -0,0 +1,73 @@
+import hmac
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.views import IsSuperAdmin
+
+from . import profiling, prometheus
+
+
+class MetricsScrapePermission(permissions.BasePermission):
+    """Prometheus scrapers present ``Authorization: Bearer <METRICS_TOKEN>``;
+    superusers (and anyone while DEBUG is on) may look too."""
+
+    def has_permission(self, request, view):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:].encode(), token.encode()):
+            return True
+        if settings.DEBUG:
+            return True
+        return bool(request.user and request.user.is_superuser)
+
+
+@api_view(['GET'])
+@permission_classes([MetricsScrapePermission])
+def metrics(request):
+    return HttpResponse(prometheus.render(), content_type=prometheus.CONTENT_TYPE)
+
+
+class ProfileCaptureListView(APIView):
+    """Stored request profiles, newest first."""
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request):
+        return Response(profiling.list_captures())
+
+
+class ProfileCaptureDetailView(APIView):
+    """Metadata, SQL log and text summary of one profile."""
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request, capture_id):
+        meta = profiling.load_capture(capture_id)
+        if meta is None:
+            raise Http404
+        return Response(meta)
+
+    def delete(self, request, capture_id):
+        if profiling.load_capture(capture_id) is None:
+            raise Http404
+        profiling.delete_capture(capture_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProfileCaptureDownloadView(APIView):
+    """The raw ``.prof`` (pstats) or ``.folded`` (flame graph) file."""
+    permission_classes = [IsSuperAdmin]
+
+    def get(self, request, capture_id):
+        path = profiling.capture_file(capture_id)
+        if path is None:
+            raise Http404
+        return FileResponse(
+            path.open('rb'),
+            as_attachment=True,
+            filename=path.name,
+            content_type='application/octet-stream',
+        )
@@ -0,0 +1,134 @@
+"""
+Per-worker metric snapshots shared through ``SHARED_STATE_DIR``.
+
+Each gunicorn worker keeps its request histograms and cache counters in
+memory and, at most every ``METRICS_FLUSH_INTERVAL`` seconds, writes them
+to ``<SHARED_STATE_DIR>/metrics/<pid>.json``. Whichever worker answers
+``/metrics`` reads every file and merges them, so the scrape sees the whole
+server without an external metrics service.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from moa_agriplan_system.shared_state import state_dir, write_atomic
+
+from .connections import connection_stats
+from .metrics import registry
+
+_started_at = time.time()
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def metrics_dir() -> Path:
+    return state_dir() / 'metrics'
+
+
+def resident_memory_bytes():
+    """Current RSS of this process, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def cache_stats():
+    """``{cache name: {'hits': n, 'misses': n}}`` for the in-process caches."""
+    from indicators.reference_cache import reference_cache
+    from plans.fiscal_calendar import fiscal_calendar
+    from plans.submission_windows import window_cache
+    from users.authentication import token_cache
+    from users.views import indicator_performance_flight
+
+    caches = {
+        'auth_token': token_cache,
+        'submission_windows': window_cache,
+        'fiscal_calendar': fiscal_calendar,
+        'reference_data': reference_cache,
+        'indicator_performance_single_flight': indicator_performance_flight,
+    }
+    return {name: {'hits': c.hits, 'misses': c.misses} for name, c in caches.items()}
+
+
+def snapshot():
+    return {
+        'pid': os.getpid(),
+        'started_at': _started_at,
+        'updated_at': time.time(),
+        'rss_bytes': resident_memory_bytes(),
+        'endpoints': registry.snapshot(),
+        'caches': cache_stats(),
+        'databases': connection_stats(),
+    }
+
+
+def flush():
+    write_atomic(metrics_dir() / f'{os.getpid()}.json', json.dumps(snapshot()))
+
+
+def maybe_flush():
+    """Flush if the last flush from this worker is older than the interval."""
+    global _last_flush
+    now = time.monotonic()
+    if now - _last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 15):
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        _last_flush = now
+        flush()
+    finally:
+        _flush_lock.release()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Snapshots of every live worker, with this worker's taken fresh.
+
+    Files left by workers that have exited are removed; files not updated
+    for ``METRICS_STALE_SECONDS`` are ignored.
+    """
+    own_pid = os.getpid()
+    stale_after = getattr(settings, 'METRICS_STALE_SECONDS', 300)
+    now = time.time()
+    snapshots = [snapshot()]
+    directory = metrics_dir()
+    if not directory.is_dir():
+        return snapshots
+    for path in directory.glob('*.json'):
+        try:
+            pid = int(path.stem)
+        except ValueError:
+            continue
+        if pid == own_pid:
+            continue
+        if not _pid_alive(pid):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if now - data.get('updated_at', 0) > stale_after:
+            continue
+        snapshots.append(data)
+    return snapshots
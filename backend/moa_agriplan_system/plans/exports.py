@@ -0,0 +1,161 @@
+"""
+Streaming CSV and XLSX exports of plans, breakdowns and performances.
+
+Rows are read with ``values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)``
+(a server-side cursor on PostgreSQL), so neither format holds the result
+set in memory:
+
+* CSV is written row by row into a ``StreamingHttpResponse``;
+* XLSX uses openpyxl's write-only workbook, which spools rows to a
+  temporary file that is then streamed back. openpyxl is optional; without
+  it only CSV is offered.
+"""
+
+import csv
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+try:
+    import openpyxl
+except ImportError:  # optional dependency
+    openpyxl = None
+
+CSV = 'csv'
+XLSX = 'xlsx'
+FORMATS = (CSV, XLSX)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_INDICATOR_COLUMNS = (
+    ('indicator_id', 'indicator_id'),
+    ('indicator', 'indicator__name'),
+    ('unit', 'indicator__unit'),
+    ('department', 'indicator__department__name'),
+    ('sector', 'indicator__department__sector__name'),
+)
+
+
+def _via_plan(columns):
+    return tuple((header, f'plan__{path}') for header, path in columns)
+
+
+# (header, values_list path) per exported model.
+ANNUAL_PLAN_COLUMNS = (
+    ('id', 'id'),
+    ('year', 'year'),
+    *_INDICATOR_COLUMNS,
+    ('target', 'target'),
+    ('created_at', 'created_at'),
+)
+
+BREAKDOWN_COLUMNS = (
+    ('id', 'id'),
+    ('plan_id', 'plan_id'),
+    ('year', 'plan__year'),
+    *_via_plan(_INDICATOR_COLUMNS),
+    ('annual_target', 'plan__target'),
+    ('q1', 'q1'),
+    ('q2', 'q2'),
+    ('q3', 'q3'),
+    ('q4', 'q4'),
+    ('status', 'status'),
+    ('sent_to_strategic', 'sent_to_strategic'),
+    ('submitted_at', 'submitted_at'),
+    ('final_approved_at', 'final_approved_at'),
+)
+
+PERFORMANCE_COLUMNS = (
+    ('id', 'id'),
+    ('plan_id', 'plan_id'),
+    ('year', 'plan__year'),
+    ('quarter', 'quarter'),
+    *_via_plan(_INDICATOR_COLUMNS),
+    ('value', 'value'),
+    ('status', 'status'),
+    ('variance_description', 'variance_description'),
+    ('sent_to_strategic', 'sent_to_strategic'),
+    ('submitted_at', 'submitted_at'),
+    ('final_approved_at', 'final_approved_at'),
+)
+
+
+def available_formats():
+    return FORMATS if openpyxl is not None else (CSV,)
+
+
+def _rows(queryset, columns):
+    paths = [path for _, path in columns]
+    # Pin the database now: the response is consumed after the view returns,
+    # when per-request read routing no longer applies.
+    queryset = queryset.using(queryset.db).order_by('id').values_list(*paths)
+    return queryset.iterator(chunk_size=getattr(settings, 'EXPORT_CHUNK_SIZE', 2000))
+
+
+def _excel_value(value):
+    # Excel has no time zones; write local wall-clock time.
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the data, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(headers, rows):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens the UTF-8 (Amharic) names correctly.
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _batched(lines, size=64 * 1024):
+    """Join lines into chunks of about ``size`` bytes; one write per row
+    would make the server flush hundreds of thousands of tiny chunks."""
+    batch = []
+    length = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        batch.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(batch)
+            batch = []
+            length = 0
+    if batch:
+        yield b''.join(batch)
+
+
+def csv_response(queryset, columns, filename):
+    headers = [header for header, _ in columns]
+    response = StreamingHttpResponse(
+        _batched(_csv_lines(headers, _rows(queryset, columns))),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(queryset, columns, filename, sheet_title):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append([header for header, _ in columns])
+    for row in _rows(queryset, columns):
+        sheet.append([_excel_value(value) for value in row])
+    spool = tempfile.TemporaryFile()
+    workbook.save(spool)
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(queryset, columns, export_format, filename, sheet_title):
+    if export_format == XLSX:
+        return xlsx_response(queryset, columns, filename, sheet_title)
+    return csv_response(queryset, columns, filename)
@@ -0,0 +1,196 @@
+"""
+Columnar (Parquet / Arrow IPC) export of a fiscal year's plan facts.
+
+One row per annual plan of the year, denormalized for analysis: indicator,
+primary group path, department and sector, incremental/aggregatable and
+quarter-applicability flags, the annual target, the quarterly breakdown and
+each quarter's performance value and status. Amounts are ``decimal128(20, 2)``
+like the model fields, and a missing or not-applicable value is null rather
+than a float or an ``'N/A'`` string.
+
+Rows are written in record batches of ``EXPORT_CHUNK_SIZE`` plans, each
+batch loading its performances with one query, so memory stays flat however
+large the year. Arrow IPC output uses the file format, which readers can
+open memory-mapped (``pyarrow.ipc.open_file(pyarrow.memory_map(path))``).
+
+pyarrow is optional; without it ``available_formats()`` is empty.
+"""
+
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse
+
+from indicators.models import Indicator, IndicatorGroup
+from .models import QuarterlyPerformance
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+PARQUET = 'parquet'
+ARROW = 'arrow'
+FORMATS = (PARQUET, ARROW)
+
+CONTENT_TYPES = {
+    PARQUET: 'application/vnd.apache.parquet',
+    ARROW: 'application/vnd.apache.arrow.file',
+}
+
+QUARTERS = (1, 2, 3, 4)
+
+
+def available_formats():
+    return FORMATS if pyarrow is not None else ()
+
+
+def schema():
+    amount = pyarrow.decimal128(20, 2)
+    fields = [
+        ('plan_id', pyarrow.int64()),
+        ('year', pyarrow.int32()),
+        ('indicator_id', pyarrow.int64()),
+        ('indicator', pyarrow.string()),
+        ('unit', pyarrow.string()),
+        ('group_id', pyarrow.int64()),
+        ('group_path', pyarrow.string()),
+        ('department_id', pyarrow.int64()),
+        ('department', pyarrow.string()),
+        ('sector_id', pyarrow.int64()),
+        ('sector', pyarrow.string()),
+        ('is_incremental', pyarrow.bool_()),
+        ('is_aggregatable', pyarrow.bool_()),
+        *((f'q{q}_applicable', pyarrow.bool_()) for q in QUARTERS),
+        ('target', amount),
+        ('breakdown_status', pyarrow.string()),
+        *((f'q{q}_target', amount) for q in QUARTERS),
+        *((f'q{q}_value', amount) for q in QUARTERS),
+        *((f'q{q}_status', pyarrow.string()) for q in QUARTERS),
+    ]
+    return pyarrow.schema(fields)
+
+
+class _Groups:
+    """Primary group (lowest id, as ``Indicator.groups.first()``), its
+    hierarchy path and inherited unit per indicator, from two queries."""
+
+    def __init__(self, db):
+        self._groups = {g['id']: g for g in IndicatorGroup.objects.using(db).values('id', 'name', 'parent_id', 'unit')}
+        self._paths = {}
+        self.primary = {}
+        links = Indicator.groups.through.objects.using(db).values_list('indicator_id', 'indicatorgroup_id')
+        for indicator_id, group_id in links:
+            if group_id < self.primary.get(indicator_id, group_id + 1):
+                self.primary[indicator_id] = group_id
+
+    def _ancestry(self, group_id):
+        group = self._groups.get(group_id)
+        while group is not None:
+            yield group
+            group = self._groups.get(group['parent_id'])
+
+    def path(self, group_id):
+        # IndicatorGroup.hierarchy_path
+        if group_id not in self._paths:
+            self._paths[group_id] = ' > '.join(reversed([g['name'] for g in self._ancestry(group_id)]))
+        return self._paths[group_id]
+
+    def unit(self, group_id):
+        # IndicatorGroup.get_inherited_unit
+        return next((g['unit'] for g in self._ancestry(group_id) if g['unit']), '')
+
+
+_PLAN_FIELDS = (
+    'id', 'year', 'target', 'indicator_id',
+    'indicator__name', 'indicator__unit', 'indicator__is_incremental',
+    'indicator__is_aggregatable', 'indicator__applicable_quarters',
+    'indicator__department_id', 'indicator__department__name',
+    'indicator__department__sector_id', 'indicator__department__sector__name',
+    'quarterly_breakdown__status',
+    *(f'quarterly_breakdown__q{q}' for q in QUARTERS),
+)
+
+
+def _batch(plans, db, groups, batch_schema):
+    performances = {}
+    rows = QuarterlyPerformance.objects.using(db).filter(plan_id__in=[p['id'] for p in plans]).values_list(
+        'plan_id', 'quarter', 'value', 'status',
+    )
+    for plan_id, quarter, value, status in rows:
+        performances[(plan_id, quarter)] = (value, status)
+
+    columns = {name: [] for name in batch_schema.names}
+    for plan in plans:
+        indicator_id = plan['indicator_id']
+        group_id = groups.primary.get(indicator_id)
+        applicable = plan['indicator__applicable_quarters'] or list(QUARTERS)
+        values = {
+            'plan_id': plan['id'],
+            'year': plan['year'],
+            'indicator_id': indicator_id,
+            'indicator': plan['indicator__name'],
+            # Indicator.get_effective_unit
+            'unit': plan['indicator__unit'] or (groups.unit(group_id) if group_id else ''),
+            'group_id': group_id,
+            'group_path': groups.path(group_id) if group_id else None,
+            'department_id': plan['indicator__department_id'],
+            'department': plan['indicator__department__name'],
+            'sector_id': plan['indicator__department__sector_id'],
+            'sector': plan['indicator__department__sector__name'],
+            'is_incremental': plan['indicator__is_incremental'],
+            'is_aggregatable': plan['indicator__is_aggregatable'],
+            'target': plan['target'],
+            'breakdown_status': plan['quarterly_breakdown__status'],
+        }
+        for q in QUARTERS:
+            value, status = performances.get((plan['id'], q), (None, None))
+            values[f'q{q}_applicable'] = q in applicable
+            values[f'q{q}_target'] = plan[f'quarterly_breakdown__q{q}']
+            values[f'q{q}_value'] = value
+            values[f'q{q}_status'] = status
+        for name, value in values.items():
+            columns[name].append(value)
+    return pyarrow.RecordBatch.from_pydict(columns, schema=batch_schema)
+
+
+def record_batches(queryset):
+    """Record batches for the plans in ``queryset`` (an AnnualPlan queryset);
+    an empty year still yields one empty batch."""
+    chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    db = queryset.db
+    groups = _Groups(db)
+    batch_schema = schema()
+    plans = queryset.using(db).order_by('indicator_id', 'id').values(*_PLAN_FIELDS)
+    chunk = []
+    empty = True
+    for plan in plans.iterator(chunk_size=chunk_size):
+        chunk.append(plan)
+        if len(chunk) >= chunk_size:
+            yield _batch(chunk, db, groups, batch_schema)
+            chunk = []
+            empty = False
+    if chunk or empty:
+        yield _batch(chunk, db, groups, batch_schema)
+
+
+def write(queryset, sink, export_format):
+    """Write the fact table of ``queryset`` to ``sink`` (a path or binary file)."""
+    if export_format == PARQUET:
+        with pyarrow.parquet.ParquetWriter(sink, schema()) as writer:
+            for batch in record_batches(queryset):
+                writer.write_batch(batch)
+    else:
+        with pyarrow.ipc.new_file(sink, schema()) as writer:
+            for batch in record_batches(queryset):
+                writer.write_batch(batch)
+
+
+def file_response(queryset, export_format, filename):
+    spool = tempfile.TemporaryFile()
+    write(queryset, spool, export_format)
+    spool.seek(0)
+    return FileResponse(
+        spool, as_attachment=True, filename=f'{filename}.{export_format}', content_type=CONTENT_TYPES[export_format],
+    )
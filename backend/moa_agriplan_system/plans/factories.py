@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+import factory
+from django.utils import timezone
+from factory import fuzzy
+
+from indicators.factories import IndicatorFactory
+
+from .models import (
+    AnnualPlan,
+    PerformanceStatus,
+    PlanStatus,
+    QuarterlyBreakdown,
+    QuarterlyPerformance,
+)
+
+CENT = Decimal('0.01')
+
+
+def split_target(target, quarters):
+    """Split ``target`` evenly over ``quarters`` (1-4) so the parts sum exactly.
+
+    Returns ``{1: q1, ..., 4: q4}`` with None for quarters not listed.
+    """
+    quarters = sorted(quarters) or [1, 2, 3, 4]
+    share = (target / len(quarters)).quantize(CENT)
+    values = {q: None for q in (1, 2, 3, 4)}
+    for q in quarters:
+        values[q] = share
+    values[quarters[-1]] = target - share * (len(quarters) - 1)
+    return values
+
+
+class AnnualPlanFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = AnnualPlan
+
+    year = factory.LazyFunction(lambda: timezone.now().year)
+    indicator = factory.SubFactory(IndicatorFactory)
+    target = fuzzy.FuzzyDecimal(100, 100000, precision=2)
+    created_by = None
+
+
+class QuarterlyBreakdownFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = QuarterlyBreakdown
+
+    plan = factory.SubFactory(AnnualPlanFactory)
+    status = PlanStatus.DRAFT
+
+    # Defaults satisfy QuarterlyBreakdown.clean(): applicable quarters sum to the target.
+    q1 = factory.LazyAttribute(lambda o: o.split[1])
+    q2 = factory.LazyAttribute(lambda o: o.split[2])
+    q3 = factory.LazyAttribute(lambda o: o.split[3])
+    q4 = factory.LazyAttribute(lambda o: o.split[4])
+
+    class Params:
+        split = factory.LazyAttribute(
+            lambda o: split_target(Decimal(o.plan.target), o.plan.indicator.applicable_quarters)
+        )
+
+
+class QuarterlyPerformanceFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = QuarterlyPerformance
+
+    plan = factory.SubFactory(AnnualPlanFactory)
+    quarter = 1
+    value = fuzzy.FuzzyDecimal(0, 25000, precision=2)
+    status = PerformanceStatus.DRAFT
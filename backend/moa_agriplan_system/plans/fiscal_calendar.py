@@ -0,0 +1,163 @@
+"""
+Precomputed fiscal calendar of submission windows.
+
+``within_annual_breakdown_window`` and ``within_quarter_submission_window``
+used to rebuild timezone-aware datetimes and redo fiscal-year arithmetic on
+every call, and most views call them once per quarter. This module builds,
+once per half calendar year, a sorted table of every default and override
+window interval. Looking up which windows are open at a moment is then a
+binary search.
+
+The table is keyed on ``(date.year, date.month >= 7)`` because both inputs of
+the original rules only change at those points: admin overrides are looked
+up by ``date.year`` and the fiscal year (which anchors the default quarter
+windows) flips in July.
+"""
+
+import threading
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .submission_windows import window_cache
+
+BREAKDOWN = 'BREAKDOWN'
+
+QUARTER_WINDOW_TYPES = {
+    1: 'PERFORMANCE_Q1',
+    2: 'PERFORMANCE_Q2',
+    3: 'PERFORMANCE_Q3',
+    4: 'PERFORMANCE_Q4',
+}
+
+WINDOW_TYPES = (BREAKDOWN,) + tuple(QUARTER_WINDOW_TYPES.values())
+
+# Inclusive end bounds are stored as exclusive ones one microsecond later,
+# the resolution of ``datetime``.
+_INCLUSIVE = timedelta(microseconds=1)
+
+
+def _default_breakdown_interval(year, tz):
+    # Default: fixed window June 22–June 26 (inclusive end handled via next-day exclusive bound)
+    start = timezone.datetime(year=year, month=6, day=22, tzinfo=tz)
+    end = timezone.datetime(year=year, month=6, day=27, tzinfo=tz)
+    return start, end
+
+
+def _default_quarter_interval(fy_start_year, quarter, tz):
+    # Default fiscal quarter windows; each window extends by 10 days after its
+    # end date, except Q3 which ends on its specific date. Both ends inclusive.
+    if quarter == 1:
+        start = timezone.datetime(year=fy_start_year, month=10, day=5, tzinfo=tz)
+        end = timezone.datetime(year=fy_start_year, month=10, day=14, tzinfo=tz)
+    elif quarter == 2:
+        start = timezone.datetime(year=fy_start_year + 1, month=1, day=3, tzinfo=tz)
+        end = timezone.datetime(year=fy_start_year + 1, month=1, day=12, tzinfo=tz)
+    elif quarter == 3:
+        start = timezone.datetime(year=fy_start_year + 1, month=4, day=3, tzinfo=tz)
+        end = timezone.datetime(year=fy_start_year + 1, month=4, day=12, tzinfo=tz)
+    else:
+        start = timezone.datetime(year=fy_start_year + 1, month=7, day=2, tzinfo=tz)
+        end = timezone.datetime(year=fy_start_year + 1, month=7, day=11, tzinfo=tz)
+    if quarter != 3:
+        end = end + timezone.timedelta(days=10)
+    return start, end + _INCLUSIVE
+
+
+class HalfYearTable:
+    """Open windows for every elementary interval of one half calendar year.
+
+    ``boundaries`` is sorted; ``segments[i]`` is the frozenset of window types
+    open on ``[boundaries[i - 1], boundaries[i])`` (``segments[0]`` covers
+    everything before the first boundary).
+    """
+
+    def __init__(self, intervals):
+        points = sorted({p for spans in intervals.values() for span in spans for p in span if p is not None})
+        self.boundaries = points
+        self.segments = []
+        for i in range(len(points) + 1):
+            # Probe each segment at its left edge
+            probe = points[i - 1] if i > 0 else None
+            open_types = frozenset(
+                wt for wt, spans in intervals.items()
+                if any(self._covers(span, probe) for span in spans)
+            )
+            self.segments.append(open_types)
+
+    @staticmethod
+    def _covers(span, probe):
+        start, end = span
+        if probe is None:
+            return start is None
+        return (start is None or start <= probe) and (end is None or probe < end)
+
+    def open_at(self, date):
+        return self.segments[bisect_right(self.boundaries, date)]
+
+
+class FiscalCalendar:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._tables = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _table_for(self, date):
+        version = window_cache.current_version()
+        tz = timezone.get_current_timezone()
+        key = (date.year, date.month >= 7, str(tz))
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._tables = {}
+                    self._version = version
+        table = self._tables.get(key)
+        if table is None:
+            self.misses += 1
+            table = self._build(date.year, date.month >= 7, tz)
+            with self._lock:
+                self._tables[key] = table
+        else:
+            self.hits += 1
+        return table
+
+    def _build(self, year, second_half, tz):
+        overrides = window_cache.windows_for_year(year)
+        fy_start_year = year if second_half else year - 1
+        defaults = {BREAKDOWN: _default_breakdown_interval(year, tz)}
+        for quarter, wt in QUARTER_WINDOW_TYPES.items():
+            defaults[wt] = _default_quarter_interval(fy_start_year, quarter, tz)
+
+        intervals = {}
+        for wt in WINDOW_TYPES:
+            spec = overrides.get(wt)
+            if spec is not None and spec.always_open:
+                intervals[wt] = [(None, None)]
+            elif spec is not None and spec.start and spec.end:
+                intervals[wt] = [(spec.start, spec.end)]
+            else:
+                # No override, or invalid/partial config: fall through to defaults
+                intervals[wt] = [defaults[wt]]
+        return HalfYearTable(intervals)
+
+    def open_windows(self, date):
+        """Return the frozenset of window types open at ``date``."""
+        return self._table_for(date).open_at(date)
+
+    def is_open(self, window_type, date):
+        return window_type in self.open_windows(date)
+
+    def open_quarters(self, date):
+        open_types = self.open_windows(date)
+        return [q for q, wt in QUARTER_WINDOW_TYPES.items() if wt in open_types]
+
+    def clear(self):
+        with self._lock:
+            self._tables = {}
+            self._version = None
+
+
+fiscal_calendar = FiscalCalendar()
@@ -0,0 +1,407 @@
+"""
+Bulk import of annual plans and quarterly breakdowns from CSV or XLSX.
+
+Each row is ``indicator_id`` (or ``indicator`` by name, with ``department``
+when the name is ambiguous), ``year``, ``target`` and optionally ``q1``..``q4``;
+a file exported by ``plans.exports`` (``annual_target``) is accepted too.
+
+The import reads the whole file, resolves every indicator and loads every
+existing plan it touches in one query each, and validates all rows in one
+pass without further queries. Plans and breakdowns are then upserted: on
+PostgreSQL the rows are COPYed into a temporary table and merged with two
+``INSERT ... SELECT ... ON CONFLICT`` statements; elsewhere with
+``bulk_create(update_conflicts=True)`` in batches. Breakdowns follow the
+``QuarterlyBreakdown.clean`` rule: the applicable quarters must add up to the
+annual target. A row that only changes the target is checked against the
+breakdown already stored for it. Like the breakdown API, the import only
+changes a plan whose breakdown is missing, draft or rejected; a row for a
+plan already submitted or approved is reported as an error. The statuses are
+checked again with the breakdowns locked just before writing, so one
+submitted in the meantime is reported too rather than overwritten.
+
+By default the import is all or nothing: any invalid row means nothing is
+written and the result lists every row's errors. With ``partial`` the valid
+rows are imported and the invalid ones reported.
+"""
+
+import csv
+import io
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from indicators.models import Indicator
+from .models import AnnualPlan, PlanStatus, QuarterlyBreakdown
+
+try:
+    import openpyxl
+except ImportError:  # optional dependency
+    openpyxl = None
+
+QUARTERS = (1, 2, 3, 4)
+QUARTER_FIELDS = tuple(f'q{q}' for q in QUARTERS)
+
+# Header aliases, so exported files can be edited and imported back.
+_HEADER_ALIASES = {
+    'annual_target': 'target',
+    'indicator_name': 'indicator',
+    'department_name': 'department',
+}
+
+# DecimalField(max_digits=20, decimal_places=2) on the models.
+_MAX_DIGITS = 20
+_DECIMAL_PLACES = 2
+
+# Breakdown statuses a plan can still be changed in.
+_EDITABLE_STATUSES = (PlanStatus.DRAFT, PlanStatus.REJECTED)
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported (format, headers)."""
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    plans_created: int = 0
+    plans_updated: int = 0
+    breakdowns: int = 0
+    # [{'row': <line in the file>, 'errors': [...]}]
+    errors: list = field(default_factory=list)
+    dry_run: bool = False
+    written: bool = False
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'plans_created': self.plans_created,
+            'plans_updated': self.plans_updated,
+            'breakdowns': self.breakdowns,
+            'errors': self.errors,
+            'dry_run': self.dry_run,
+            'written': self.written,
+        }
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    # XLSX stores every number as a float; keep 2024 from becoming '2024.0'.
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_rows(fileobj, filename):
+    """``(line number, {header: text})`` for every non-empty row of a CSV or XLSX file."""
+    if filename.lower().endswith('.xlsx'):
+        if openpyxl is None:
+            raise ImportFileError('XLSX import requires openpyxl; upload a CSV file instead.')
+        try:
+            workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+        except Exception as exc:
+            raise ImportFileError(f'Not a readable XLSX file: {exc}')
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        raw = fileobj.read()
+        try:
+            text = raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+        except UnicodeDecodeError:
+            raise ImportFileError('CSV files must be UTF-8 encoded.')
+        rows = csv.reader(io.StringIO(text, newline=''))
+
+    headers = None
+    for line, values in enumerate(rows, start=1):
+        values = [_cell(value) for value in values]
+        if not any(values):
+            continue
+        if headers is None:
+            headers = [_HEADER_ALIASES.get(h.lower(), h.lower()) for h in values]
+            _check_headers(headers)
+            continue
+        yield line, dict(zip(headers, values))
+    if headers is None:
+        raise ImportFileError('The file is empty.')
+
+
+def _check_headers(headers):
+    missing = [name for name in ('year', 'target') if name not in headers]
+    if 'indicator_id' not in headers and 'indicator' not in headers:
+        missing.append('indicator_id or indicator')
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}.")
+
+
+def _decimal(text, name, errors):
+    if text == '' or text.upper() == 'N/A':
+        return None
+    try:
+        value = Decimal(text.replace(',', ''))
+    except InvalidOperation:
+        errors.append(f'{name}: {text!r} is not a number.')
+        return None
+    if not value.is_finite():
+        errors.append(f'{name}: {text!r} is not a number.')
+        return None
+    if -value.normalize().as_tuple().exponent > _DECIMAL_PLACES:
+        errors.append(f'{name}: at most {_DECIMAL_PLACES} decimal places.')
+        return None
+    if value and value.adjusted() >= _MAX_DIGITS - _DECIMAL_PLACES:
+        errors.append(f'{name}: too large.')
+        return None
+    return value
+
+
+class _IndicatorIndex:
+    """Indicators referenced by the file, fetched in one query."""
+
+    def __init__(self, rows):
+        ids = set()
+        names = set()
+        for _, row in rows:
+            if row.get('indicator_id', '').isdigit():
+                ids.add(int(row['indicator_id']))
+            elif row.get('indicator'):
+                names.add(row['indicator'])
+        self.by_id = {}
+        self.by_name = {}
+        if not ids and not names:
+            return
+        found = Indicator.objects.filter(id__in=ids) | Indicator.objects.filter(name__in=names)
+        for indicator in found.values('id', 'name', 'department__name', 'applicable_quarters'):
+            self.by_id[indicator['id']] = indicator
+            self.by_name.setdefault(indicator['name'], []).append(indicator)
+
+    def resolve(self, row, errors):
+        text = row.get('indicator_id', '')
+        if text:
+            if not text.isdigit():
+                errors.append(f'indicator_id: {text!r} is not an id.')
+                return None
+            indicator = self.by_id.get(int(text))
+            if indicator is None:
+                errors.append(f'indicator_id: no indicator {text}.')
+            return indicator
+
+        name = row.get('indicator', '')
+        if not name:
+            errors.append('indicator: missing.')
+            return None
+        candidates = self.by_name.get(name, [])
+        department = row.get('department', '')
+        if department:
+            candidates = [c for c in candidates if c['department__name'] == department]
+        if not candidates:
+            errors.append(f'indicator: no indicator named {name!r}' + (f' in {department!r}.' if department else '.'))
+            return None
+        if len(candidates) > 1:
+            errors.append(f'indicator: {name!r} exists in several departments; add a department or indicator_id column.')
+            return None
+        return candidates[0]
+
+
+def _applicable(indicator, quarter):
+    # Indicator.is_quarter_applicable on a values() row.
+    return not indicator['applicable_quarters'] or quarter in indicator['applicable_quarters']
+
+
+def _breakdown_total(indicator, quarters):
+    return sum((quarters[q - 1] or 0 for q in QUARTERS if _applicable(indicator, q)), Decimal(0))
+
+
+def _status_error(status):
+    return f'the breakdown is already {PlanStatus(status).label!r}; only draft or rejected plans can be imported.'
+
+
+def _load_existing(keys):
+    """``{(indicator_id, year): plan row with its breakdown}`` for the keys in the file."""
+    if not keys:
+        return {}
+    indicator_ids = {indicator_id for indicator_id, _ in keys}
+    years = {year for _, year in keys}
+    rows = AnnualPlan.objects.filter(indicator_id__in=indicator_ids, year__in=years).values(
+        'id', 'indicator_id', 'year', 'quarterly_breakdown__id', 'quarterly_breakdown__status',
+        *(f'quarterly_breakdown__{name}' for name in QUARTER_FIELDS),
+    )
+    return {(row['indicator_id'], row['year']): row for row in rows}
+
+
+def import_plans(fileobj, filename, *, user=None, dry_run=False, partial=False):
+    """Validate and import a plan file; returns an ``ImportResult``.
+
+    Raises ``ImportFileError`` when the file cannot be read at all.
+    """
+    rows = list(read_rows(fileobj, filename))
+    result = ImportResult(rows=len(rows), dry_run=dry_run)
+    indicators = _IndicatorIndex(rows)
+
+    parsed = []
+    seen = {}
+    for line, row in rows:
+        errors = []
+        indicator = indicators.resolve(row, errors)
+        year_text = row.get('year', '')
+        year = int(year_text) if year_text.isdigit() else None
+        if year is None:
+            errors.append(f'year: {year_text!r} is not a year.')
+        target = _decimal(row.get('target', ''), 'target', errors)
+        if target is None and not any(e.startswith('target') for e in errors):
+            errors.append('target: missing.')
+        quarters = [_decimal(row.get(name, ''), name, errors) for name in QUARTER_FIELDS]
+        has_breakdown = any(name in row for name in QUARTER_FIELDS) and any(q is not None for q in quarters)
+
+        if indicator is not None and year is not None:
+            key = (indicator['id'], year)
+            if key in seen:
+                errors.append(f'duplicate of row {seen[key]} for the same indicator and year.')
+            else:
+                seen[key] = line
+        if errors:
+            result.errors.append({'row': line, 'errors': errors})
+            continue
+        parsed.append((line, indicator, year, target, quarters if has_breakdown else None))
+
+    existing = _load_existing([(indicator['id'], year) for _, indicator, year, _, _ in parsed])
+
+    valid = []
+    lines = {}
+    for line, indicator, year, target, quarters in parsed:
+        stored = existing.get((indicator['id'], year))
+        if stored is not None and stored['quarterly_breakdown__id'] is not None:
+            status = stored['quarterly_breakdown__status']
+            if status not in _EDITABLE_STATUSES:
+                result.errors.append({'row': line, 'errors': [_status_error(status)]})
+                continue
+        if quarters is None and stored is not None and stored['quarterly_breakdown__id'] is not None:
+            # Target-only row: the stored breakdown must still add up.
+            stored_quarters = [stored[f'quarterly_breakdown__{name}'] for name in QUARTER_FIELDS]
+            total = _breakdown_total(indicator, stored_quarters)
+            if total != target:
+                result.errors.append({'row': line, 'errors': [
+                    f'target {target} does not match the stored breakdown total ({total}); include q1..q4.',
+                ]})
+                continue
+        if quarters is not None:
+            total = _breakdown_total(indicator, quarters)
+            if total != target:
+                result.errors.append({'row': line, 'errors': [
+                    f'Sum of applicable quarters ({total}) must equal the annual target ({target})',
+                ]})
+                continue
+        valid.append((indicator, year, target, quarters, stored))
+        lines[(indicator['id'], year)] = line
+
+    result.errors.sort(key=lambda error: error['row'])
+    _count(result, valid)
+
+    if dry_run or not valid or (result.errors and not partial):
+        return result
+    result.written = _write(result, valid, lines, user, partial)
+    return result
+
+
+def _count(result, valid):
+    result.plans_created = sum(1 for *_, stored in valid if stored is None)
+    result.plans_updated = len(valid) - result.plans_created
+    result.breakdowns = sum(1 for _, _, _, quarters, _ in valid if quarters is not None)
+
+
+def _recheck_statuses(using, valid, lines):
+    """Lock the stored breakdowns of ``valid`` and drop the rows whose
+    breakdown was submitted or approved since validation; returns the
+    remaining rows and the errors for the dropped ones."""
+    indicator_ids = {indicator['id'] for indicator, *_ in valid}
+    years = {year for _, year, *_ in valid}
+    locked = QuarterlyBreakdown.objects.using(using).select_for_update().filter(
+        plan__indicator_id__in=indicator_ids, plan__year__in=years,
+    ).values_list('plan__indicator_id', 'plan__year', 'status')
+    blocked = {
+        (indicator_id, year): status
+        for indicator_id, year, status in locked
+        if status not in _EDITABLE_STATUSES and (indicator_id, year) in lines
+    }
+    if not blocked:
+        return valid, []
+    errors = [{'row': lines[key], 'errors': [_status_error(status)]} for key, status in blocked.items()]
+    return [row for row in valid if (row[0]['id'], row[1]) not in blocked], errors
+
+
+def _write(result, valid, lines, user, partial):
+    """Write ``valid`` unless, under lock, a row turns out to target a
+    breakdown that is no longer editable: such rows are reported, and the
+    rest written only with ``partial``. Returns whether anything was written."""
+    using = router.db_for_write(AnnualPlan)
+    with transaction.atomic(using=using):
+        valid, errors = _recheck_statuses(using, valid, lines)
+        if errors:
+            result.errors = sorted(result.errors + errors, key=lambda error: error['row'])
+            _count(result, valid)
+            if not partial or not valid:
+                return False
+        if connections[using].vendor == 'postgresql':
+            _copy_upsert(connections[using], valid, user)
+        else:
+            _bulk_upsert(using, valid, user)
+    return True
+
+
+def _bulk_upsert(using, valid, user):
+    batch_size = getattr(settings, 'IMPORT_BATCH_SIZE', 2000)
+    plans = AnnualPlan.objects.using(using).bulk_create(
+        [
+            AnnualPlan(indicator_id=indicator['id'], year=year, target=target, created_by=user)
+            for indicator, year, target, _, _ in valid
+        ],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['year', 'indicator'],
+        update_fields=['target'],
+    )
+    breakdowns = [
+        QuarterlyBreakdown(plan_id=plan.pk, **dict(zip(QUARTER_FIELDS, quarters)))
+        for plan, (_, _, _, quarters, _) in zip(plans, valid)
+        if quarters is not None
+    ]
+    QuarterlyBreakdown.objects.using(using).bulk_create(
+        breakdowns,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['plan'],
+        update_fields=list(QUARTER_FIELDS),
+    )
+
+
+def _copy_upsert(connection, valid, user):
+    """The PostgreSQL path: building and compiling model instances costs far
+    more than the database work, so stream plain rows with COPY instead."""
+    plans = connection.ops.quote_name(AnnualPlan._meta.db_table)
+    breakdowns = connection.ops.quote_name(QuarterlyBreakdown._meta.db_table)
+    quarters_sql = ', '.join(QUARTER_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE plan_import ('
+            'indicator_id integer, year integer, target numeric(20, 2), has_breakdown boolean, '
+            + ', '.join(f'{name} numeric(20, 2)' for name in QUARTER_FIELDS)
+            + ') ON COMMIT DROP'
+        )
+        with cursor.copy(f'COPY plan_import (indicator_id, year, target, has_breakdown, {quarters_sql}) FROM STDIN') as copy:
+            for indicator, year, target, quarters, _ in valid:
+                copy.write_row((indicator['id'], year, target, quarters is not None, *(quarters or (None,) * 4)))
+        cursor.execute(
+            f'INSERT INTO {plans} (year, indicator_id, target, created_by_id, created_at) '
+            f'SELECT year, indicator_id, target, %s, %s FROM plan_import '
+            f'ON CONFLICT (year, indicator_id) DO UPDATE SET target = EXCLUDED.target',
+            [getattr(user, 'pk', None), timezone.now()],
+        )
+        cursor.execute(
+            f'INSERT INTO {breakdowns} (plan_id, {quarters_sql}, status, review_comment, sent_to_strategic) '
+            f'SELECT p.id, {", ".join(f"i.{name}" for name in QUARTER_FIELDS)}, %s, \'\', false '
+            f'FROM plan_import i JOIN {plans} p ON p.indicator_id = i.indicator_id AND p.year = i.year '
+            f'WHERE i.has_breakdown '
+            f'ON CONFLICT (plan_id) DO UPDATE SET '
+            + ', '.join(f'{name} = EXCLUDED.{name}' for name in QUARTER_FIELDS),
+            [PlanStatus.DRAFT],
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from plans import fact_table
+from plans.models import AnnualPlan
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a year's denormalized plan fact table (targets, breakdowns, "
+        "performances) as a Parquet or Arrow IPC file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, required=True, help="Plan year to export.")
+        parser.add_argument(
+            "--format",
+            dest="export_format",
+            choices=fact_table.FORMATS,
+            default=fact_table.PARQUET,
+            help="Output format (default: parquet).",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="File to write; defaults to plan-facts-<year>.<format>.",
+        )
+
+    def handle(self, *args, **options):
+        if not fact_table.available_formats():
+            raise CommandError("pyarrow is not installed.")
+        year = options["year"]
+        export_format = options["export_format"]
+        output = options["output"] or f"plan-facts-{year}.{export_format}"
+        plans = AnnualPlan.objects.filter(year=year)
+        fact_table.write(plans, output, export_format)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {plans.count()} plans to {output}."))
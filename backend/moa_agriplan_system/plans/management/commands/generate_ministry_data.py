@@ -0,0 +1,312 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import factory
+import factory.random
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from indicators.factories import (
+    DepartmentFactory,
+    IndicatorFactory,
+    IndicatorGroupFactory,
+    StateMinisterSectorFactory,
+)
+from indicators.models import Department, Indicator, IndicatorGroup, StateMinisterSector
+from plans.factories import (
+    CENT,
+    AnnualPlanFactory,
+    QuarterlyBreakdownFactory,
+    QuarterlyPerformanceFactory,
+    split_target,
+)
+from plans.models import (
+    AnnualPlan,
+    PerformanceStatus,
+    PlanStatus,
+    QuarterlyBreakdown,
+    QuarterlyPerformance,
+)
+from users.factories import UserFactory
+from users.models import User
+
+# Mixed applicability: most indicators report every quarter, some only a few.
+APPLICABILITY_CHOICES = ([], [], [], [], [], [], [1, 2, 3, 4], [2, 4], [4], [1, 2, 3], [3, 4])
+
+# Workflow status mix for the current year; earlier years are mostly closed out.
+CURRENT_YEAR_STATUS_WEIGHTS = (
+    ("DRAFT", 15), ("SUBMITTED", 20), ("APPROVED", 20), ("VALIDATED", 15),
+    ("FINAL_APPROVED", 20), ("REJECTED", 10),
+)
+PAST_YEAR_STATUS_WEIGHTS = (
+    ("DRAFT", 2), ("SUBMITTED", 3), ("APPROVED", 5), ("VALIDATED", 10),
+    ("FINAL_APPROVED", 75), ("REJECTED", 5),
+)
+
+# Order of the approval workflow; REJECTED is reviewed but goes no further.
+WORKFLOW_ORDER = ("DRAFT", "SUBMITTED", "APPROVED", "VALIDATED", "FINAL_APPROVED")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic, ministry-scale data set (sectors, departments, "
+        "group trees, indicators, plans, breakdowns, performances and users for "
+        "every role). Output is deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+        parser.add_argument("--sectors", type=int, default=6, help="Number of sectors.")
+        parser.add_argument("--departments", type=int, default=8, help="Departments per sector.")
+        parser.add_argument("--group-depth", type=int, default=2, help="Levels in each department's group tree.")
+        parser.add_argument("--group-fanout", type=int, default=3, help="Child groups per group (and root groups per department).")
+        parser.add_argument("--indicators", type=int, default=20, help="Indicators per department.")
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=3,
+            help="Number of plan years, ending with --end-year.",
+        )
+        parser.add_argument("--end-year", type=int, default=None, help="Last plan year (default: current year).")
+        parser.add_argument(
+            "--prefix",
+            default="Synthetic",
+            help="Prefix for generated names and usernames, used by --clear.",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password for every generated user.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="bulk_create batch size.")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete data previously generated with the same --prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        factory.random.reseed_random(options["seed"])
+        self.prefix = options["prefix"]
+        self.batch_size = options["batch_size"]
+        if options["years"] < 1 or options["sectors"] < 1 or options["departments"] < 1:
+            raise CommandError("--years, --sectors and --departments must be at least 1")
+        end_year = options["end_year"] or timezone.now().year
+        years = list(range(end_year - options["years"] + 1, end_year + 1))
+
+        with transaction.atomic():
+            if options["clear"]:
+                self._clear()
+            elif (
+                StateMinisterSector.objects.filter(name__startswith=f"{self.prefix} ").exists()
+                or User.objects.filter(username__startswith=f"{self.prefix.lower()}_").exists()
+            ):
+                raise CommandError(
+                    f"Data with prefix '{self.prefix}' already exists; use --clear to replace it "
+                    "or --prefix to generate alongside it."
+                )
+
+            sectors, departments = self._create_org(options["sectors"], options["departments"])
+            users = self._create_users(sectors, departments, make_password(options["password"]))
+            groups = self._create_groups(departments, options["group_depth"], options["group_fanout"])
+            indicators = self._create_indicators(departments, groups, options["indicators"])
+            counts = self._create_plans(indicators, years, users)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(sectors)} sectors, {len(departments)} departments, "
+            f"{sum(len(g) for g in groups.values())} groups, {len(indicators)} indicators, "
+            f"{counts['plans']} plans, {counts['breakdowns']} breakdowns, "
+            f"{counts['performances']} performances and {len(users['all'])} users "
+            f"for {years[0]}-{years[-1]} (seed {options['seed']})."
+        ))
+
+    def _bulk(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def _clear(self):
+        # Everything else hangs off sectors and is removed by cascade.
+        StateMinisterSector.objects.filter(name__startswith=f"{self.prefix} ").delete()
+        User.objects.filter(username__startswith=f"{self.prefix.lower()}_").delete()
+
+    def _create_org(self, sector_count, department_count):
+        sectors = self._bulk(StateMinisterSector, [
+            StateMinisterSectorFactory.build(name=f"{self.prefix} Sector {s + 1}")
+            for s in range(sector_count)
+        ])
+        departments = self._bulk(Department, [
+            DepartmentFactory.build(name=f"{self.prefix} Department {s + 1}.{d + 1}", sector=sector)
+            for s, sector in enumerate(sectors)
+            for d in range(department_count)
+        ])
+        return sectors, departments
+
+    def _create_users(self, sectors, departments, password_hash):
+        prefix = self.prefix.lower()
+        built = []
+
+        def user(username, role, **kwargs):
+            obj = UserFactory.build(
+                username=f"{prefix}_{username}",
+                role=role,
+                # Hashed once up front; Force stops the factory hashing per user
+                password=factory.Transformer.Force(password_hash),
+                **kwargs,
+            )
+            built.append(obj)
+            return obj
+
+        users = {
+            "minister": {},
+            "lead": {},
+            "strategic": [user(f"strategic{i + 1}", User.Roles.STRATEGIC_STAFF) for i in range(2)],
+            "executive": [user("executive", User.Roles.EXECUTIVE)],
+        }
+        user("minister_view", User.Roles.MINISTER_VIEW)
+        for s, sector in enumerate(sectors):
+            users["minister"][sector.id] = user(f"state_minister{s + 1}", User.Roles.STATE_MINISTER, sector=sector)
+            user(f"advisor{s + 1}", User.Roles.ADVISOR, sector=sector)
+        for d, department in enumerate(departments):
+            users["lead"][department.id] = user(
+                f"lead{d + 1}", User.Roles.LEAD_EXECUTIVE_BODY, department=department
+            )
+        users["all"] = self._bulk(User, built)
+        return users
+
+    def _create_groups(self, departments, depth, fanout):
+        """Build each department's group tree level by level; returns
+        ``{department_id: [groups]}``."""
+        groups = {d.id: [] for d in departments}
+        parents = [(d, None) for d in departments]
+        for level in range(depth):
+            level_groups = []
+            for department, parent in parents:
+                for i in range(fanout):
+                    suffix = f"{parent.name.rsplit(' ', 1)[-1]}.{i + 1}" if parent else f"{i + 1}"
+                    level_groups.append(IndicatorGroupFactory.build(
+                        name=f"{self.prefix} Group {suffix}",
+                        department=department,
+                        parent=parent,
+                        # Some top-level groups are headings only
+                        is_label=level == 0 and depth > 1 and self.rng.random() < 0.2,
+                    ))
+            created = self._bulk(IndicatorGroup, level_groups)
+            for group in created:
+                groups[group.department_id].append(group)
+            parents = [(g.department, g) for g in created]
+        return groups
+
+    def _create_indicators(self, departments, groups, per_department):
+        built = []
+        memberships = []
+        for department in departments:
+            candidates = [g for g in groups[department.id] if not g.is_label]
+            for i in range(per_department):
+                built.append(IndicatorFactory.build(
+                    name=f"{self.prefix} Indicator {department.name.rsplit(' ', 1)[-1]}.{i + 1}",
+                    department=department,
+                    is_aggregatable=self.rng.random() > 0.15,
+                    is_incremental=self.rng.random() < 0.2,
+                    applicable_quarters=list(self.rng.choice(APPLICABILITY_CHOICES)),
+                ))
+                # ~10% stay ungrouped
+                memberships.append(
+                    self.rng.choice(candidates) if candidates and self.rng.random() > 0.1 else None
+                )
+        indicators = self._bulk(Indicator, built)
+        Through = Indicator.groups.through
+        self._bulk(Through, [
+            Through(indicator_id=indicator.id, indicatorgroup_id=group.id)
+            for indicator, group in zip(indicators, memberships)
+            if group is not None
+        ])
+        return indicators
+
+    def _status(self, weights):
+        names, w = zip(*weights)
+        return self.rng.choices(names, weights=w)[0]
+
+    def _stamp(self, obj, status, year, users, sector_id, department_id):
+        """Fill the workflow fields implied by ``status``."""
+        when = timezone.make_aware(datetime(year, 7, 1)) + timedelta(days=self.rng.randint(0, 330))
+        reached = WORKFLOW_ORDER.index(status) if status in WORKFLOW_ORDER else WORKFLOW_ORDER.index("APPROVED")
+        if reached >= 1:
+            obj.submitted_by = users["lead"][department_id]
+            obj.submitted_at = when
+        if reached >= 2:
+            obj.reviewed_by = users["minister"][sector_id]
+            obj.reviewed_at = when + timedelta(days=2)
+            if status == "REJECTED":
+                obj.review_comment = "Figures do not match the supporting documents."
+        if reached >= 3:
+            obj.validated_by = self.rng.choice(users["strategic"])
+            obj.validated_at = when + timedelta(days=5)
+        if reached >= 4:
+            obj.final_approved_by = users["executive"][0]
+            obj.final_approved_at = when + timedelta(days=8)
+        obj.sent_to_strategic = reached >= 3 or (status == "APPROVED" and self.rng.random() < 0.5)
+
+    def _create_plans(self, indicators, years, users):
+        department_sector = dict(Department.objects.filter(
+            id__in={i.department_id for i in indicators}
+        ).values_list("id", "sector_id"))
+        current_year = years[-1]
+        # Quarters of the current year that have been reported on so far
+        reported_quarters = self.rng.randint(1, 4)
+
+        plans = []
+        for year in years:
+            for indicator in indicators:
+                plans.append(AnnualPlanFactory.build(
+                    year=year,
+                    indicator=indicator,
+                    target=Decimal(self.rng.randint(10, 10_000_000)) / 100,
+                ))
+        plans = self._bulk(AnnualPlan, plans)
+
+        breakdowns = []
+        performances = []
+        for plan in plans:
+            indicator = plan.indicator
+            department_id = indicator.department_id
+            sector_id = department_sector[department_id]
+            weights = CURRENT_YEAR_STATUS_WEIGHTS if plan.year == current_year else PAST_YEAR_STATUS_WEIGHTS
+
+            split = split_target(plan.target, indicator.applicable_quarters)
+            breakdown = QuarterlyBreakdownFactory.build(
+                plan=plan,
+                q1=split[1], q2=split[2], q3=split[3], q4=split[4],
+                status=PlanStatus(self._status(weights)),
+            )
+            self._stamp(breakdown, breakdown.status, plan.year, users, sector_id, department_id)
+            breakdowns.append(breakdown)
+
+            cumulative = Decimal(0)
+            for quarter in indicator.get_applicable_quarters():
+                if plan.year == current_year and quarter > reported_quarters:
+                    break
+                variance = ""
+                if self.rng.random() < 0.05:
+                    value = None  # reported as N/A
+                else:
+                    achieved = (split[quarter] * Decimal(self.rng.uniform(0.4, 1.2))).quantize(CENT)
+                    cumulative += achieved
+                    value = cumulative if indicator.is_incremental else achieved
+                    if achieved < split[quarter]:
+                        variance = "Below target due to late delivery of inputs."
+                performance = QuarterlyPerformanceFactory.build(
+                    plan=plan,
+                    quarter=quarter,
+                    value=value,
+                    status=PerformanceStatus(self._status(weights)),
+                    variance_description=variance,
+                )
+                self._stamp(performance, performance.status, plan.year, users, sector_id, department_id)
+                performances.append(performance)
+
+        self._bulk(QuarterlyBreakdown, breakdowns)
+        self._bulk(QuarterlyPerformance, performances)
+        return {"plans": len(plans), "breakdowns": len(breakdowns), "performances": len(performances)}
@@ -0,0 +1,83 @@
+import csv
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from plans.imports import ImportFileError, import_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "Import annual plans and quarterly breakdowns from a CSV or XLSX file "
+        "(indicator_id or indicator, year, target, q1..q4)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file to import.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate only; report what would be imported.",
+        )
+        parser.add_argument(
+            "--partial",
+            action="store_true",
+            help="Import the valid rows even if other rows have errors.",
+        )
+        parser.add_argument(
+            "--user-id",
+            type=int,
+            default=None,
+            help="User ID to stamp as created_by on new plans.",
+        )
+        parser.add_argument(
+            "--errors",
+            default=None,
+            help="Write the row-level error report to this CSV file.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user_id"] is not None:
+            User = get_user_model()
+            try:
+                user = User.objects.get(id=options["user_id"])
+            except User.DoesNotExist as exc:
+                raise CommandError(f"User with id {options['user_id']} does not exist") from exc
+
+        try:
+            with open(options["path"], "rb") as fileobj:
+                result = import_plans(
+                    fileobj,
+                    options["path"],
+                    user=user,
+                    dry_run=options["dry_run"],
+                    partial=options["partial"],
+                )
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options["errors"] and result.errors:
+            with open(options["errors"], "w", newline="", encoding="utf-8") as out:
+                writer = csv.writer(out)
+                writer.writerow(["row", "error"])
+                for error in result.errors:
+                    for message in error["errors"]:
+                        writer.writerow([error["row"], message])
+        elif result.errors:
+            for error in result.errors[:50]:
+                self.stderr.write(f"row {error['row']}: {'; '.join(error['errors'])}")
+            if len(result.errors) > 50:
+                self.stderr.write(f"... {len(result.errors) - 50} more rows with errors (use --errors).")
+
+        summary = (
+            f"{result.rows} rows: {result.plans_created} plans to create, "
+            f"{result.plans_updated} to update, {result.breakdowns} breakdowns, "
+            f"{len(result.errors)} rows with errors."
+        )
+        if result.written:
+            self.stdout.write(self.style.SUCCESS(f"Imported. {summary}"))
+        elif result.dry_run:
+            self.stdout.write(f"Dry run. {summary}")
+        else:
+            raise CommandError(f"Nothing imported. {summary}")
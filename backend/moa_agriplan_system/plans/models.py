@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -121,6 +123,39 @@ class FileAttachment(models.Model):
     description = models.CharField(max_length=255, blank=True)
 
 
+class UploadSession(models.Model):
+    """A resumable, chunked upload of a future FileAttachment.
+
+    Bytes received so far are kept in a part file (see ``plans.uploads``);
+    the session is committed into a FileAttachment once all ``size`` bytes
+    have arrived.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text='Total length of the file in bytes.')
+    offset = models.BigIntegerField(default=0, help_text='Bytes received so far.')
+    annual_plan = models.ForeignKey(AnnualPlan, on_delete=models.CASCADE, related_name='upload_sessions', null=True, blank=True)
+    performance = models.ForeignKey(QuarterlyPerformance, on_delete=models.CASCADE, related_name='upload_sessions', null=True, blank=True)
+    description = models.CharField(max_length=255, blank=True)
+    attachment = models.OneToOneField(FileAttachment, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+
 class AdvisorComment(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='advisor_comments')
     year = models.PositiveIntegerField(null=True, blank=True)
@@ -160,76 +195,22 @@ class SubmissionWindow(models.Model):
         return f"{label} ({y})"
 
 
-def _check_submission_window(window_type: str, date: timezone.datetime, year: int) -> bool:
-    # Try year-specific active window first, then global (year is null)
-    qs = SubmissionWindow.objects.filter(window_type=window_type, active=True)
-    win = qs.filter(year=year).first() or qs.filter(year__isnull=True).first()
-    if win:
-        if win.always_open:
-            return True
-        if win.start and win.end:
-            return win.start <= date < win.end
-        # If invalid/partial config, fall through to defaults
-    return None
-
-
 def within_annual_breakdown_window(date: timezone.datetime) -> bool:
     """Return True if annual breakdown submissions are allowed at 'date'.
 
-    Controlled via settings (loaded from .env):
-    - BREAKDOWN_WINDOW_ALWAYS_OPEN: if True, always allow submissions
-    - BREAKDOWN_WINDOW_START_MONTH: window start month (default 1)
-    - BREAKDOWN_WINDOW_START_DAY: window start day (default 1)
-    - BREAKDOWN_WINDOW_DURATION_DAYS: window length in days (default 15)
+    An active BREAKDOWN SubmissionWindow for date.year overrides the default
+    fixed window of June 22–June 26. Lookups go through the precomputed
+    fiscal calendar in plans.fiscal_calendar.
     """
-    # Admin override
-    override = _check_submission_window('BREAKDOWN', date, date.year)
-    if override is True:
-        return True
-    if override is False:
-        return False
-    # Default: fixed window June 22–June 26 (inclusive end handled via next-day exclusive bound)
-    tz = timezone.get_current_timezone()
-    start = timezone.datetime(year=date.year, month=6, day=22, tzinfo=tz)
-    end = timezone.datetime(year=date.year, month=6, day=27, tzinfo=tz)
-    return start <= date < end
+    from .fiscal_calendar import fiscal_calendar, BREAKDOWN
+    return fiscal_calendar.is_open(BREAKDOWN, date)
 
 
 def within_quarter_submission_window(date: timezone.datetime, quarter: int) -> bool:
-    # Admin override per quarter
-    window_type_map = {
-        1: 'PERFORMANCE_Q1',
-        2: 'PERFORMANCE_Q2',
-        3: 'PERFORMANCE_Q3',
-        4: 'PERFORMANCE_Q4',
-    }
-    wt = window_type_map.get(quarter)
-    if wt:
-        override = _check_submission_window(wt, date, date.year)
-        if override is True:
-            return True
-        if override is False:
-            return False
-    # Default fiscal quarter windows (Jul 8–Oct 10, Oct 11–Jan 8, Jan 9–Apr 8, Apr 9–Jul 7)
-    # Each window extends by 10 days after its end date.
-    tz = timezone.get_current_timezone()
-    # Determine fiscal year start (FY starts July 1x; we anchor to July of the FY)
-    fy_start_year = date.year if date.month >= 7 else date.year - 1
-    if quarter == 1:
-        start = timezone.datetime(year=fy_start_year, month=10, day=5, tzinfo=tz)
-        end = timezone.datetime(year=fy_start_year, month=10, day=14, tzinfo=tz)
-    elif quarter == 2:
-        start = timezone.datetime(year=fy_start_year + 1, month=1, day=3, tzinfo=tz)
-        end = timezone.datetime(year=fy_start_year + 1, month=1, day=12, tzinfo=tz)
-    elif quarter == 3:
-        start = timezone.datetime(year=fy_start_year + 1, month=4, day=3, tzinfo=tz)
-        end = timezone.datetime(year=fy_start_year + 1, month=4, day=12, tzinfo=tz)
-    else:
-        start = timezone.datetime(year=fy_start_year + 1, month=7, day=2, tzinfo=tz)
-        end = timezone.datetime(year=fy_start_year + 1, month=7, day=11, tzinfo=tz)
-    # Q3 has specific end date without extension
-    if quarter == 3:
-        return start <= date <= end
-    else:
-        window_end = end + timezone.timedelta(days=10)
-        return start <= date <= window_end
+    # Admin override per quarter, else default fiscal quarter windows
+    # (see plans.fiscal_calendar for the exact dates).
+    from .fiscal_calendar import fiscal_calendar, QUARTER_WINDOW_TYPES
+    wt = QUARTER_WINDOW_TYPES.get(quarter)
+    if wt is None:
+        return False
+    return fiscal_calendar.is_open(wt, date)
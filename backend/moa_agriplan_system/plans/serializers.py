@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import AnnualPlan, QuarterlyBreakdown, QuarterlyPerformance, FileAttachment, SubmissionWindow, AdvisorComment
+from django.conf import settings
+from .models import AnnualPlan, QuarterlyBreakdown, QuarterlyPerformance, FileAttachment, SubmissionWindow, AdvisorComment, UploadSession
 
 
 class NullableDecimalField(serializers.DecimalField):
@@ -176,6 +177,24 @@ class FileAttachmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['uploaded_by', 'uploaded_at']
 
 
+class UploadSessionSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'size', 'offset', 'annual_plan', 'performance', 'description',
+            'attachment', 'created_at', 'updated_at', 'expires_at',
+        ]
+        read_only_fields = ['offset', 'attachment', 'created_at', 'updated_at', 'expires_at']
+
+    def validate_size(self, value):
+        limit = getattr(settings, 'UPLOAD_MAX_BYTES', 2 * 1024 ** 3)
+        if value > limit:
+            raise serializers.ValidationError(f'Files may be at most {limit} bytes.')
+        return value
+
+
 class SubmissionWindowSerializer(serializers.ModelSerializer):
     class Meta:
         model = SubmissionWindow
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import SubmissionWindow
+from .submission_windows import invalidate_submission_windows
+
+
+@receiver(post_save, sender=SubmissionWindow)
+@receiver(post_delete, sender=SubmissionWindow)
+def submission_window_changed(sender, instance, **kwargs):
+    # Other workers must not reload before the change is visible to them
+    transaction.on_commit(invalidate_submission_windows)
@@ -0,0 +1,99 @@
+"""
+Per-process cache of admin-configured submission windows.
+
+Looking up a window used to run up to two ``SubmissionWindow`` queries per
+call, and a single request can check five or more windows. This module
+loads the active windows for a year once per worker and keeps them until a
+``SubmissionWindow`` is saved or deleted anywhere (signalled through a
+shared version stamp, see ``moa_agriplan_system.shared_state``). The fiscal
+calendar (``plans.fiscal_calendar``) builds its tables from them.
+"""
+
+import threading
+
+from django.db.models import Q
+
+from moa_agriplan_system.shared_state import get_version, bump_version
+
+VERSION_NAME = 'submission-windows'
+
+
+class WindowSpec:
+    """Immutable snapshot of the fields of a ``SubmissionWindow`` we need."""
+
+    __slots__ = ('id', 'window_type', 'year', 'always_open', 'start', 'end')
+
+    def __init__(self, id, window_type, year, always_open, start, end):
+        self.id = id
+        self.window_type = window_type
+        self.year = year
+        self.always_open = always_open
+        self.start = start
+        self.end = end
+
+
+class SubmissionWindowCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._windows = {}  # year -> {window_type: WindowSpec}
+        self.hits = 0
+        self.misses = 0
+
+    def current_version(self):
+        """Read the shared stamp, dropping local state if it has moved on."""
+        version = get_version(VERSION_NAME)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._windows = {}
+                    self._version = version
+        return version
+
+    def windows_for_year(self, year):
+        """Return the effective active window per type for ``year``.
+
+        A year-specific window wins over a global (year is null) one, matching
+        the lookup order of the original per-call queries.
+        """
+        self.current_version()
+        windows = self._windows.get(year)
+        if windows is None:
+            self.misses += 1
+            windows = self._load(year)
+            with self._lock:
+                self._windows[year] = windows
+        else:
+            self.hits += 1
+        return windows
+
+    def _load(self, year):
+        from .models import SubmissionWindow
+
+        rows = (
+            SubmissionWindow.objects
+            .filter(Q(year=year) | Q(year__isnull=True), active=True)
+            .order_by('id')
+            .values_list('id', 'window_type', 'year', 'always_open', 'start', 'end')
+        )
+        specific = {}
+        global_ = {}
+        for row in rows:
+            spec = WindowSpec(*row)
+            bucket = specific if spec.year is not None else global_
+            bucket.setdefault(spec.window_type, spec)
+        return {**global_, **specific}
+
+    def clear(self):
+        with self._lock:
+            self._windows = {}
+            self._version = None
+
+
+window_cache = SubmissionWindowCache()
+
+
+def invalidate_submission_windows():
+    """Drop cached windows in every worker once the current transaction commits."""
+    window_cache.clear()
+    bump_version(VERSION_NAME)
@@ -0,0 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from jobs.registry import task
+
+
+@task('plans.backfill_na_performances', max_attempts=1, api=True)
+def backfill_na_performances(job, user_id=None, dry_run=False):
+    """Run the backfill_na_performances command in the background."""
+    out = StringIO()
+    call_command('backfill_na_performances', user_id=user_id, dry_run=dry_run, stdout=out)
+    return {'output': out.getvalue().strip()}
@@ -0,0 +1,161 @@
+"""
+Resumable chunked uploads of file attachments.
+
+Protocol (``/api/attachment-uploads/``):
+
+1. ``POST`` with ``filename``, ``size`` and the attachment fields
+   (``annual_plan``, ``performance``, ``description``) opens a session.
+2. ``PUT <session>/`` with an ``Upload-Offset`` header and the next bytes of
+   the file as the raw body appends them. The offset must equal the bytes
+   received so far, otherwise 409 with the current offset is returned.
+3. ``HEAD``/``GET <session>/`` reports the current offset, so a client
+   whose connection dropped can resume from where the server stopped.
+4. ``POST <session>/commit/`` once all bytes have arrived turns the session
+   into a FileAttachment stored under ``uploads/%Y/%m/%d``.
+
+Chunks are copied from the request stream to a part file in
+``UPLOAD_SESSION_DIR`` in ``UPLOAD_COPY_BUFFER`` pieces and are never held in
+memory. Bytes written before a connection drops are kept. The part file's
+length is the authoritative offset. An exclusive lock on it stops two
+requests from appending at once, even across worker processes. Expired
+sessions are removed when new ones are opened.
+"""
+
+import fcntl
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FileAttachment, UploadSession
+
+OFFSET_HEADER = 'Upload-Offset'
+LENGTH_HEADER = 'Upload-Length'
+
+
+class UploadConflict(Exception):
+    """The chunk does not fit the session's current state; ``str()`` is the
+    message for the client."""
+
+
+class UploadBusy(UploadConflict):
+    """Another request is appending to the same session."""
+
+
+def session_dir():
+    return Path(getattr(settings, 'UPLOAD_SESSION_DIR', Path(settings.BASE_DIR) / 'var' / 'upload_sessions'))
+
+
+def part_path(session):
+    return session_dir() / f'{session.pk}.part'
+
+
+def received(session):
+    """Bytes stored for ``session`` so far."""
+    try:
+        return part_path(session).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def open_session(user, **fields):
+    purge_expired()
+    ttl = timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 3600))
+    session = UploadSession.objects.create(created_by=user, expires_at=timezone.now() + ttl, **fields)
+    session_dir().mkdir(parents=True, exist_ok=True)
+    part_path(session).touch()
+    return session
+
+
+def append(session, stream, offset, length):
+    """Copy ``length`` bytes from ``stream`` to the end of the part file,
+    which must currently hold exactly ``offset`` bytes. Returns the new
+    offset; on a broken stream the bytes read so far are kept and the
+    error propagates."""
+    if session.attachment_id is not None:
+        raise UploadConflict('This upload has already been committed.')
+    if offset + length > session.size:
+        raise UploadConflict(f'The chunk would exceed the declared size of {session.size} bytes.')
+    buffer_size = getattr(settings, 'UPLOAD_COPY_BUFFER', 1024 * 1024)
+
+    with open(part_path(session), 'ab') as part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy('Another request is uploading to this session.')
+        try:
+            current = os.fstat(part.fileno()).st_size
+            if current != offset:
+                raise UploadConflict(f'{OFFSET_HEADER} is {offset} but {current} bytes have been received.')
+            remaining = length
+            try:
+                while remaining:
+                    data = stream.read(min(buffer_size, remaining))
+                    if not data:
+                        break
+                    part.write(data)
+                    remaining -= len(data)
+            finally:
+                part.flush()
+                os.fsync(part.fileno())
+                new_offset = os.fstat(part.fileno()).st_size
+                UploadSession.objects.filter(pk=session.pk).update(offset=new_offset, updated_at=timezone.now())
+                session.offset = new_offset
+        finally:
+            fcntl.flock(part, fcntl.LOCK_UN)
+    return new_offset
+
+
+class _PartFile(File):
+    # Lets FileSystemStorage move the part file into place instead of copying it.
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def commit(session):
+    """Turn a complete session into its FileAttachment."""
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.attachment_id is not None:
+            return session.attachment
+        if received(session) != session.size:
+            raise UploadConflict(f'Only {received(session)} of {session.size} bytes have been received.')
+        attachment = FileAttachment(
+            uploaded_by=session.created_by,
+            annual_plan_id=session.annual_plan_id,
+            performance_id=session.performance_id,
+            description=session.description,
+        )
+        with open(part_path(session), 'rb') as part:
+            # upload_to='uploads/%Y/%m/%d' is applied by FileField.
+            attachment.file.save(os.path.basename(session.filename), _PartFile(part), save=False)
+        attachment.save()
+        session.attachment = attachment
+        session.offset = session.size
+        session.save(update_fields=['attachment', 'offset', 'updated_at'])
+    _remove_part(session)
+    return attachment
+
+
+def _remove_part(session):
+    try:
+        part_path(session).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def abort(session):
+    _remove_part(session)
+    session.delete()
+
+
+def purge_expired(limit=100):
+    """Drop up to ``limit`` expired sessions and their part files."""
+    expired = list(UploadSession.objects.filter(expires_at__lt=timezone.now())[:limit])
+    for session in expired:
+        abort(session)
+    return len(expired)
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.shortcuts import render
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from decimal import Decimal
 from .models import (
@@ -9,6 +12,7 @@ from .models import (
     QuarterlyBreakdown,
     QuarterlyPerformance,
     FileAttachment,
+    UploadSession,
     SubmissionWindow,
     PlanStatus,
     PerformanceStatus,
@@ -16,32 +20,109 @@ from .models import (
     within_quarter_submission_window,
     AdvisorComment,
 )
+from .fiscal_calendar import fiscal_calendar, BREAKDOWN, QUARTER_WINDOW_TYPES
+from users.scope import get_scope
+from . import exports, fact_table, imports, uploads
 from .serializers import (
     AnnualPlanSerializer,
     QuarterlyBreakdownSerializer,
     QuarterlyPerformanceSerializer,
     FileAttachmentSerializer,
+    UploadSessionSerializer,
     SubmissionWindowSerializer,
     AdvisorCommentSerializer,
 )
 
+class ExportMixin:
+    """``GET <list url>/export/?export_format=csv|xlsx``: the viewset's
+    scoped and filtered queryset as a streamed file (see ``plans.exports``)."""
+
+    export_columns = ()
+    export_name = ''
+    # Year filter for querysets whose get_queryset does not handle ?year=.
+    export_year_field = None
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        export_format = request.query_params.get('export_format', exports.CSV).lower()
+        if export_format not in exports.available_formats():
+            return Response(
+                {'detail': f"export_format must be one of: {', '.join(exports.available_formats())}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        qs = self.filter_queryset(self.get_queryset())
+        year = request.query_params.get('year')
+        filename = self.export_name
+        if year:
+            try:
+                year = int(year)
+            except ValueError:
+                return Response({'detail': 'Invalid year.'}, status=status.HTTP_400_BAD_REQUEST)
+            if self.export_year_field:
+                qs = qs.filter(**{self.export_year_field: year})
+            filename = f'{filename}-{year}'
+        return exports.export_response(qs, self.export_columns, export_format, filename, self.export_name)
+
+
 class SuperuserWritePermission(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return bool(request.user and request.user.is_authenticated)
         return bool(request.user and request.user.is_authenticated and request.user.is_superuser)
 
-class AnnualPlanViewSet(viewsets.ModelViewSet):
+class AnnualPlanViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = AnnualPlan.objects.select_related('indicator', 'indicator__department', 'indicator__department__sector').all()
     serializer_class = AnnualPlanSerializer
     permission_classes = [SuperuserWritePermission]
+    export_columns = exports.ANNUAL_PLAN_COLUMNS
+    export_name = 'annual-plans'
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_plans(self, request):
+        """Bulk upsert plans and breakdowns from an uploaded CSV/XLSX ``file``
+        (see ``plans.imports``); ``dry_run`` and ``partial`` are optional flags."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'Upload the CSV or XLSX file as "file".'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run, partial = (
+            str(request.data.get(name, '')).lower() in ('1', 'true', 'yes') for name in ('dry_run', 'partial')
+        )
+        try:
+            result = imports.import_plans(upload, upload.name, user=request.user, dry_run=dry_run, partial=partial)
+        except imports.ImportFileError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        # All-or-nothing imports with invalid rows wrote nothing.
+        ok = partial or not result.errors
+        return Response(result.as_dict(), status=status.HTTP_200_OK if ok else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['get'], url_path='fact-table')
+    def fact_table(self, request):
+        """``?year=<year>&export_format=parquet|arrow``: the year's plans the
+        caller can see as a denormalized columnar file (see ``plans.fact_table``)."""
+        formats = fact_table.available_formats()
+        if not formats:
+            return Response(
+                {'detail': 'Columnar export requires pyarrow, which is not installed.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        export_format = request.query_params.get('export_format', fact_table.PARQUET).lower()
+        if export_format not in formats:
+            return Response(
+                {'detail': f"export_format must be one of: {', '.join(formats)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        year = request.query_params.get('year', '')
+        if not year.isdigit():
+            return Response({'detail': 'year is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        qs = self.filter_queryset(self.get_queryset())
+        return fact_table.file_response(qs, export_format, f'plan-facts-{year}')
+
     def get_queryset(self):
         qs = super().get_queryset()
-        user = self.request.user
+        scope = get_scope(self.request)
         # Filter by year if provided
         year = self.request.query_params.get('year')
         if year:
@@ -50,36 +131,23 @@ class AnnualPlanViewSet(viewsets.ModelViewSet):
             except ValueError:
                 pass
         # Superuser and Strategic Staff see all (unless department assigned)
-        if getattr(user, 'is_superuser', False):
+        if scope.is_superuser:
             return qs
 
-        role = getattr(user, 'role', '').upper()
-        if role == 'STRATEGIC_STAFF':
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                return qs.filter(indicator__department__id=dept_id)
+        if scope.is_strategic_staff or scope.is_executive:
+            if scope.department_id:
+                return qs.filter(scope.department_q('indicator__'))
             return qs
-        if role == 'EXECUTIVE':
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                return qs.filter(indicator__department__id=dept_id)
-            return qs
-        if role == 'MINISTER_VIEW':
+        if scope.is_minister_view:
             # Read-only: show approved or higher plans (context)
             return qs
-        if role == 'STATE_MINISTER':
-            sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-            if sector_id:
-                qs = qs.filter(indicator__department__sector__id=sector_id)
-        elif role == 'ADVISOR':
-            # Advisors see only their sector's annual plans
-            sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-            if sector_id:
-                qs = qs.filter(indicator__department__sector__id=sector_id)
-        elif role == 'LEAD_EXECUTIVE_BODY':
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                qs = qs.filter(indicator__department__id=dept_id)
+        if scope.is_state_minister or scope.is_advisor:
+            # State Ministers and Advisors see only their sector's annual plans
+            if scope.sector_id:
+                qs = qs.filter(scope.sector_q('indicator__'))
+        elif scope.is_lead_executive_body:
+            if scope.department_id:
+                qs = qs.filter(scope.department_q('indicator__'))
         return qs
 
 
@@ -91,7 +159,7 @@ def submission_window_status(request):
     Optional query params:
       - year: Gregorian year to check breakdown window for (defaults to now.year)
 
-    Uses existing helpers within_annual_breakdown_window and within_quarter_submission_window.
+    Answered from the precomputed fiscal calendar with a single lookup.
     """
     now = timezone.now()
 
@@ -102,13 +170,15 @@ def submission_window_status(request):
     except ValueError:
         year = now.year
 
+    open_windows = fiscal_calendar.open_windows(now)
+
     # For breakdowns we only care if *today* is within the configured breakdown window
-    breakdown_open = within_annual_breakdown_window(now)
+    breakdown_open = BREAKDOWN in open_windows
 
-    # For performance, we check each quarter using the helper
+    # For performance, we check each quarter's window
     perf_windows = {}
-    for q in (1, 2, 3, 4):
-        perf_windows[str(q)] = within_quarter_submission_window(now, q)
+    for q, window_type in QUARTER_WINDOW_TYPES.items():
+        perf_windows[str(q)] = window_type in open_windows
 
     return Response(
         {
@@ -130,9 +200,8 @@ def minister_review_summary(request):
       - Expected performances: only for quarters whose submission window has already closed
         (e.g. if only Q1 and Q2 windows passed, then 2 expected per indicator).
     """
-    user = request.user
-    role = getattr(user, 'role', '').upper()
-    if role != 'STATE_MINISTER':
+    scope = get_scope(request)
+    if not scope.is_state_minister:
         return Response({'detail': 'Only State Minister can access this summary.'}, status=status.HTTP_403_FORBIDDEN)
 
     now = timezone.now()
@@ -144,24 +213,17 @@ def minister_review_summary(request):
         year = now.year
 
     # Determine scope (sector/department) from user
-    dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-    sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-
-    plans_qs = AnnualPlan.objects.select_related('indicator__department__sector').filter(year=year)
-    if dept_id:
-        plans_qs = plans_qs.filter(indicator__department__id=dept_id)
-    elif sector_id:
-        plans_qs = plans_qs.filter(indicator__department__sector__id=sector_id)
+    plans_qs = AnnualPlan.objects.select_related('indicator__department__sector').filter(
+        scope.department_or_sector_q('indicator__'),
+        year=year,
+    )
 
     # Department-wise aggregation
     departments = {}
 
     # Helper: which quarters are expected (current performance period only)
     # A quarter is considered in the performance period if its submission window is open.
-    open_quarters = []
-    for q in (1, 2, 3, 4):
-        if within_quarter_submission_window(now, q):
-            open_quarters.append(q)
+    open_quarters = fiscal_calendar.open_quarters(now)
 
     # Preload breakdowns and performances
     b_qs = QuarterlyBreakdown.objects.select_related('plan__indicator__department').filter(plan__in=plans_qs)
@@ -244,8 +306,8 @@ def submit_to_strategic(request):
 
     Only items with status=APPROVED are marked as sent_to_strategic.
     """
-    role = getattr(request.user, 'role', '').upper()
-    if role != 'STATE_MINISTER':
+    scope = get_scope(request)
+    if not scope.is_state_minister:
         return Response({'detail': 'Only State Minister can submit to Strategic Affairs Staff.'}, status=status.HTTP_403_FORBIDDEN)
 
     # Optional mode to allow submitting plans and performances separately.
@@ -262,19 +324,12 @@ def submit_to_strategic(request):
         return Response({'detail': 'Invalid payload. Expected lists of IDs.'}, status=status.HTTP_400_BAD_REQUEST)
 
     # Scope: limit consistency checks to the State Minister's area (sector/department)
-    scope_breakdowns = QuarterlyBreakdown.objects.select_related('plan', 'plan__indicator__department__sector')
-    scope_perfs = QuarterlyPerformance.objects.select_related('plan', 'plan__indicator__department__sector')
-
-    user = request.user
-    dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-    sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-
-    if dept_id:
-        scope_breakdowns = scope_breakdowns.filter(plan__indicator__department__id=dept_id)
-        scope_perfs = scope_perfs.filter(plan__indicator__department__id=dept_id)
-    elif sector_id:
-        scope_breakdowns = scope_breakdowns.filter(plan__indicator__department__sector__id=sector_id)
-        scope_perfs = scope_perfs.filter(plan__indicator__department__sector__id=sector_id)
+    scope_breakdowns = QuarterlyBreakdown.objects.select_related('plan', 'plan__indicator__department__sector').filter(
+        scope.department_or_sector_q('plan__indicator__')
+    )
+    scope_perfs = QuarterlyPerformance.objects.select_related('plan', 'plan__indicator__department__sector').filter(
+        scope.department_or_sector_q('plan__indicator__')
+    )
 
     # Determine relevant years from the items being submitted
     submit_bd_qs = QuarterlyBreakdown.objects.filter(id__in=breakdown_ids)
@@ -337,53 +392,42 @@ def submit_to_strategic(request):
     )
 
 
-class QuarterlyBreakdownViewSet(viewsets.ModelViewSet):
+class QuarterlyBreakdownViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = QuarterlyBreakdown.objects.select_related('plan', 'plan__indicator').all()
     serializer_class = QuarterlyBreakdownSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_columns = exports.BREAKDOWN_COLUMNS
+    export_name = 'quarterly-breakdowns'
+    export_year_field = 'plan__year'
 
     def get_queryset(self):
         qs = super().get_queryset()
-        user = self.request.user
+        scope = get_scope(self.request)
         # Superusers see all
-        if getattr(user, 'is_superuser', False):
+        if scope.is_superuser:
             return qs
-        role = getattr(user, 'role', '').upper()
-        if role == 'STRATEGIC_STAFF':
+        if scope.is_strategic_staff:
             # Strategic Affairs Staff should only see items explicitly sent to them
             qs = qs.filter(sent_to_strategic=True)
+        if scope.is_strategic_staff or scope.is_executive:
             # If user is tied to a department, restrict to that department
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                return qs.filter(plan__indicator__department__id=dept_id)
-            return qs
-        if role == 'EXECUTIVE':
-            # If user is tied to a department, restrict to that department
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                return qs.filter(plan__indicator__department__id=dept_id)
+            if scope.department_id:
+                return qs.filter(scope.department_q('plan__indicator__'))
             return qs
-        if role == 'MINISTER_VIEW':
+        if scope.is_minister_view:
             # Read-only: show approved or higher breakdowns
             return qs.filter(status__in=[PlanStatus.APPROVED, PlanStatus.VALIDATED, PlanStatus.FINAL_APPROVED])
-        if role == 'STATE_MINISTER':
+        if scope.is_state_minister:
             # Limit to user's sector/department
-            sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                qs = qs.filter(plan__indicator__department__id=dept_id)
-            elif sector_id:
-                qs = qs.filter(plan__indicator__department__sector__id=sector_id)
-        elif role == 'ADVISOR':
+            qs = qs.filter(scope.department_or_sector_q('plan__indicator__'))
+        elif scope.is_advisor:
             # Advisors see only their sector's data
-            sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-            if sector_id:
-                qs = qs.filter(plan__indicator__department__sector__id=sector_id)
-        elif role == 'LEAD_EXECUTIVE_BODY':
+            if scope.sector_id:
+                qs = qs.filter(scope.sector_q('plan__indicator__'))
+        elif scope.is_lead_executive_body:
             # Lead Executive Body can see all unless assigned to a department; then restrict
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                qs = qs.filter(plan__indicator__department__id=dept_id)
+            if scope.department_id:
+                qs = qs.filter(scope.department_q('plan__indicator__'))
         return qs
 
     def _allow_plan_edit(self, request):
@@ -405,11 +449,10 @@ class QuarterlyBreakdownViewSet(viewsets.ModelViewSet):
             plan_id = None
         if plan_id:
             try:
-                plan = AnnualPlan.objects.select_related('indicator__department').get(id=plan_id)
+                plan = AnnualPlan.objects.select_related('indicator').get(id=plan_id)
             except AnnualPlan.DoesNotExist:
                 return Response({'detail': 'Invalid plan.'}, status=status.HTTP_400_BAD_REQUEST)
-            user_dept = getattr(getattr(request.user, 'department', None), 'id', None) or getattr(request.user, 'department', None)
-            if user_dept and getattr(plan.indicator.department, 'id', plan.indicator.department) != user_dept:
+            if not get_scope(request).owns_department(plan.indicator.department_id):
                 return Response({'detail': 'You can only create breakdowns for your assigned department.'}, status=status.HTTP_403_FORBIDDEN)
         # Also enforce annual breakdown submission window on create
         now = timezone.now()
@@ -422,8 +465,7 @@ class QuarterlyBreakdownViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Only Lead Executive Body can update quarterly breakdowns.'}, status=status.HTTP_403_FORBIDDEN)
         # Enforce department scope on update
         obj = self.get_object()
-        user_dept = getattr(getattr(request.user, 'department', None), 'id', None) or getattr(request.user, 'department', None)
-        if user_dept and getattr(obj.plan.indicator.department, 'id', obj.plan.indicator.department) != user_dept:
+        if not get_scope(request).owns_department(obj.plan.indicator.department_id):
             return Response({'detail': 'You can only update breakdowns for your assigned department.'}, status=status.HTTP_403_FORBIDDEN)
         # Enforce annual breakdown submission window on update as well
         now = timezone.now()
@@ -543,14 +585,16 @@ class QuarterlyBreakdownViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(obj).data)
 
 
-class QuarterlyPerformanceViewSet(viewsets.ModelViewSet):
+class QuarterlyPerformanceViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = QuarterlyPerformance.objects.select_related('plan', 'plan__indicator').all()
     serializer_class = QuarterlyPerformanceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_columns = exports.PERFORMANCE_COLUMNS
+    export_name = 'quarterly-performances'
 
     def get_queryset(self):
         qs = super().get_queryset()
-        user = self.request.user
+        scope = get_scope(self.request)
         # Optional filters
         year = self.request.query_params.get('year')
         quarter = self.request.query_params.get('quarter')
@@ -564,41 +608,28 @@ class QuarterlyPerformanceViewSet(viewsets.ModelViewSet):
                 qs = qs.filter(quarter=int(quarter))
             except ValueError:
                 pass
-        if getattr(user, 'is_superuser', False):
+        if scope.is_superuser:
             return qs
-        role = getattr(user, 'role', '').upper()
-        if role == 'STRATEGIC_STAFF':
+        if scope.is_strategic_staff:
             # Strategic Affairs Staff should only see items explicitly sent to them
             qs = qs.filter(sent_to_strategic=True)
+        if scope.is_strategic_staff or scope.is_executive:
             # Restrict to user's department if assigned
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                return qs.filter(plan__indicator__department__id=dept_id)
-            return qs
-        if role == 'EXECUTIVE':
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                return qs.filter(plan__indicator__department__id=dept_id)
+            if scope.department_id:
+                return qs.filter(scope.department_q('plan__indicator__'))
             return qs
-        if role == 'MINISTER_VIEW':
+        if scope.is_minister_view:
             # Read-only: show approved or higher performances
             return qs.filter(status__in=[PerformanceStatus.APPROVED, PerformanceStatus.VALIDATED, PerformanceStatus.FINAL_APPROVED])
-        if role == 'STATE_MINISTER':
-            sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                qs = qs.filter(plan__indicator__department__id=dept_id)
-            elif sector_id:
-                qs = qs.filter(plan__indicator__department__sector__id=sector_id)
-        elif role == 'ADVISOR':
+        if scope.is_state_minister:
+            qs = qs.filter(scope.department_or_sector_q('plan__indicator__'))
+        elif scope.is_advisor:
             # Advisors see only their sector's data
-            sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-            if sector_id:
-                qs = qs.filter(plan__indicator__department__sector__id=sector_id)
-        elif role == 'LEAD_EXECUTIVE_BODY':
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                qs = qs.filter(plan__indicator__department__id=dept_id)
+            if scope.sector_id:
+                qs = qs.filter(scope.sector_q('plan__indicator__'))
+        elif scope.is_lead_executive_body:
+            if scope.department_id:
+                qs = qs.filter(scope.department_q('plan__indicator__'))
         return qs
     def _advisor_can_edit_perf(self, plan):
         bd = QuarterlyBreakdown.objects.filter(plan=plan).first()
@@ -622,8 +653,7 @@ class QuarterlyPerformanceViewSet(viewsets.ModelViewSet):
         if role not in ['LEAD_EXECUTIVE_BODY', 'STATE_MINISTER']:
             return False
         # Department scope enforcement
-        user_dept = getattr(getattr(request.user, 'department', None), 'id', None) or getattr(request.user, 'department', None)
-        if user_dept and getattr(plan.indicator.department, 'id', plan.indicator.department) != user_dept:
+        if not get_scope(request).owns_department(plan.indicator.department_id):
             return False
         return True
 
@@ -826,6 +856,74 @@ class FileAttachmentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(uploaded_by=self.request.user)
 
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """Resumable chunked attachment uploads; see ``plans.uploads`` for the protocol."""
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(created_by=self.request.user)
+
+    def _response(self, session, status_code=status.HTTP_200_OK, headers=None):
+        response = Response(self.get_serializer(session).data, status=status_code, headers=headers)
+        response[uploads.OFFSET_HEADER] = str(session.offset)
+        response[uploads.LENGTH_HEADER] = str(session.size)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = uploads.open_session(request.user, **serializer.validated_data)
+        url = request.build_absolute_uri(reverse('attachmentupload-detail', args=[session.pk]))
+        return self._response(session, status.HTTP_201_CREATED, headers={'Location': url})
+
+    def retrieve(self, request, pk=None):
+        session = self.get_object()
+        session.offset = uploads.received(session) if session.attachment_id is None else session.size
+        return self._response(session)
+
+    def update(self, request, pk=None):
+        session = self.get_object()
+        try:
+            offset = int(request.headers[uploads.OFFSET_HEADER])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': f'{uploads.OFFSET_HEADER} and Content-Length headers are required.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if length > getattr(settings, 'UPLOAD_CHUNK_MAX_BYTES', 8 * 1024 * 1024):
+            return Response({'detail': 'Chunk too large.'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            # Read the raw WSGI stream: request.data would buffer the body.
+            uploads.append(session, request._request, offset, length)
+        except uploads.UploadConflict as exc:
+            response = Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+            response[uploads.OFFSET_HEADER] = str(uploads.received(session))
+            return response
+        return self._response(session)
+
+    def destroy(self, request, pk=None):
+        session = self.get_object()
+        if session.attachment_id is not None:
+            return Response({'detail': 'This upload has already been committed.'}, status=status.HTTP_409_CONFLICT)
+        uploads.abort(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def commit(self, request, pk=None):
+        session = self.get_object()
+        try:
+            attachment = uploads.commit(session)
+        except uploads.UploadConflict as exc:
+            response = Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+            response[uploads.OFFSET_HEADER] = str(uploads.received(session))
+            return response
+        return Response(FileAttachmentSerializer(attachment, context=self.get_serializer_context()).data, status=status.HTTP_201_CREATED)
+
 # Create your views here.
 
 
@@ -847,8 +945,7 @@ class AdvisorCommentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        user = self.request.user
-        role = getattr(user, 'role', '').upper()
+        scope = get_scope(self.request)
 
         # Filters
         year = self.request.query_params.get('year')
@@ -871,21 +968,19 @@ class AdvisorCommentViewSet(viewsets.ModelViewSet):
                 pass
 
         # Visibility rules
-        if getattr(user, 'is_superuser', False):
+        if scope.is_superuser:
             return qs
-        if role == 'LEAD_EXECUTIVE_BODY':
+        if scope.is_lead_executive_body:
             return qs
-        if role == 'STATE_MINISTER':
+        if scope.is_state_minister:
             # Limit to minister's sector/department
-            sector_id = getattr(getattr(user, 'sector', None), 'id', None) or getattr(user, 'sector', None)
-            dept_id = getattr(getattr(user, 'department', None), 'id', None) or getattr(user, 'department', None)
-            if dept_id:
-                qs = qs.filter(department_id=dept_id)
-            elif sector_id:
-                qs = qs.filter(sector_id=sector_id)
+            if scope.department_id:
+                qs = qs.filter(department_id=scope.department_id)
+            elif scope.sector_id:
+                qs = qs.filter(sector_id=scope.sector_id)
             return qs
-        if role == 'ADVISOR':
-            return qs.filter(author=user)
+        if scope.is_advisor:
+            return qs.filter(author_id=scope.user_id)
         # Others no access by default
         return qs.none()
 
@@ -0,0 +1,32 @@
+from django.contrib import admin
+from .models import Report
+
+
+@admin.register(Report)
+class ReportAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'kind',
+        'sector_id',
+        'year',
+        'quarter',
+        'file_format',
+        'size',
+        'built_at',
+        'build_seconds',
+    )
+    list_filter = (
+        'kind',
+        'year',
+        'quarter',
+        'file_format',
+    )
+    exclude = (
+        'content',
+    )
+    readonly_fields = (
+        'data_version',
+        'size',
+        'built_at',
+        'build_seconds',
+    )
@@ -0,0 +1,350 @@
+"""
+Quarterly report generation.
+
+Reports are built from the same data as the dashboards: the ministry report
+from the minister dashboard and the indicator-performance tree, a sector
+report from that sector's branch of the tree and its indicators at risk.
+Collecting the data needs the database and runs in the job worker; turning
+it into a PDF or workbook is pure CPU work and runs in a process pool
+(``REPORT_RENDER_PROCESSES`` spawned processes, see ``reports.render``), so
+a quarter's reports for every sector render in parallel.
+
+Each stored ``Report`` carries ``data_version``, a fingerprint of the plan,
+breakdown, performance and reference rows in its scope. A request whose
+fingerprint matches the stored one is served the stored file; otherwise the
+report is generated again.
+"""
+
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.utils import timezone
+
+from indicators.models import Department, Indicator, IndicatorGroup, StateMinisterSector
+from plans.models import AnnualPlan, QuarterlyPerformance
+from users.dashboards import (
+    MINISTER_DASHBOARD_LOADERS, build_indicator_performance, build_minister_dashboard, indicators_at_risk,
+)
+from . import render
+from .models import Report, ReportKind
+
+logger = logging.getLogger(__name__)
+
+# Bump when the report layout changes so stored files are regenerated.
+LAYOUT_VERSION = 2
+
+QUARTERS = (1, 2, 3, 4)
+
+
+# Data version
+
+def _hash_rows(digest, queryset):
+    for row in queryset.iterator(chunk_size=2000):
+        digest.update(repr(row).encode())
+        digest.update(b'\n')
+
+
+def data_version(year, sector_id=0):
+    """Fingerprint of everything a report for ``year`` (and ``sector_id``,
+    0 for the whole ministry) is built from."""
+    plans = AnnualPlan.objects.filter(year=year)
+    performances = QuarterlyPerformance.objects.filter(plan__year=year)
+    indicators = Indicator.objects.all()
+    if sector_id:
+        plans = plans.filter(indicator__department__sector_id=sector_id)
+        performances = performances.filter(plan__indicator__department__sector_id=sector_id)
+        indicators = indicators.filter(department__sector_id=sector_id)
+
+    digest = hashlib.sha256(f'{LAYOUT_VERSION}:{year}:{sector_id}'.encode())
+    _hash_rows(digest, plans.order_by('id').values_list(
+        'id', 'indicator_id', 'target',
+        'quarterly_breakdown__q1', 'quarterly_breakdown__q2', 'quarterly_breakdown__q3', 'quarterly_breakdown__q4',
+        'quarterly_breakdown__status', 'quarterly_breakdown__submitted_at', 'quarterly_breakdown__reviewed_at',
+        'quarterly_breakdown__review_comment',
+    ))
+    _hash_rows(digest, performances.order_by('id').values_list(
+        'id', 'plan_id', 'quarter', 'value', 'status', 'submitted_at', 'reviewed_at', 'review_comment',
+    ))
+    _hash_rows(digest, indicators.order_by('id').values_list(
+        'id', 'name', 'unit', 'description', 'department_id', 'is_aggregatable', 'is_incremental', 'applicable_quarters',
+    ))
+    _hash_rows(digest, Indicator.groups.through.objects.filter(
+        indicator_id__in=indicators.values('id'),
+    ).order_by('id').values_list('indicator_id', 'indicatorgroup_id'))
+    _hash_rows(digest, IndicatorGroup.objects.order_by('id').values_list('id', 'name', 'parent_id', 'unit', 'is_label'))
+    _hash_rows(digest, Department.objects.order_by('id').values_list('id', 'name', 'sector_id'))
+    _hash_rows(digest, StateMinisterSector.objects.order_by('id').values_list('id', 'name'))
+    return digest.hexdigest()
+
+
+# Documents
+
+class QuarterData:
+    """Dashboard data for one year and quarter, shared by all its reports."""
+
+    def __init__(self, year, quarter):
+        self.year = year
+        self.quarter = quarter
+        self.quarter_months = quarter * 3
+        self.rows = [load(year) for load in MINISTER_DASHBOARD_LOADERS]
+        self.minister = build_minister_dashboard(self.quarter_months, *self.rows)
+        self.performance = build_indicator_performance(year, self.quarter_months)
+
+    def sector(self, sector_id):
+        return next((s for s in self.performance['sectors'] if s['id'] == sector_id), None)
+
+    def sector_at_risk(self, sector_id):
+        # Not the dashboard's list: that one is cut to the ministry's worst 20.
+        plans, approved_breakdowns, approved_perfs = self.rows[:3]
+        return indicators_at_risk(self.quarter_months, plans, approved_breakdowns, approved_perfs, sector_id=sector_id)
+
+
+_RISK_COLUMNS = [
+    ('Indicator', 'text'), ('Sector', 'text'), ('Department', 'text'),
+    ('Target', 'number'), ('Achieved', 'number'), ('Gap', 'number'), ('Progress', 'percent'), ('Risk', 'text'),
+]
+
+
+def _risk_rows(entries):
+    return [
+        [e['indicator_name'], e['sector_name'], e['department_name'], e['target'], e['achieved'], e['gap'],
+         e['progress_pct'], e['risk_level']]
+        for e in entries
+    ]
+
+
+def _subtitle(data, scope):
+    return f'{scope} · {data.year} Q{data.quarter} (cumulative to the end of Q{data.quarter}) · generated {timezone.localtime():%Y-%m-%d %H:%M}'
+
+
+def _department_indicators(department):
+    for group in department['groups']:
+        for indicator in group['indicators']:
+            yield group['name'], indicator
+    for indicator in department['ungrouped_indicators']:
+        yield '', indicator
+
+
+def ministry_document(data):
+    minister = data.minister
+    kpis = minister['kpis']
+    performance_by_sector = {s['id']: s['performance_percentage'] for s in data.performance['sectors']}
+    stages = minister['approval_stages']
+    return {
+        'title': f'Ministry quarterly report — {data.year} Q{data.quarter}',
+        'subtitle': _subtitle(data, 'All sectors'),
+        'summary': [
+            ('Total annual target', kpis['total_annual_target'], 'number'),
+            ('Achieved', kpis['total_achieved_performance'], 'number'),
+            ('Achievement', kpis['achievement_percentage'], 'percent'),
+            ('Ministry performance', data.performance['ministry_performance'], 'percent'),
+            ('Indicators on track', kpis['indicators_on_track'], 'text'),
+            ('Indicators lagging', kpis['indicators_lagging'], 'text'),
+            *((f'Items {name.replace("_", " ")}', count, 'text') for name, count in stages.items()),
+        ],
+        'tables': [
+            {
+                'title': 'Sectors',
+                'columns': [('Sector', 'text'), ('Annual target', 'number'), ('Achieved', 'number'),
+                            ('Progress', 'percent'), ('Performance', 'percent')],
+                'rows': [
+                    [s['sector_name'], s['annual_target'], s['performance_achieved'], s['progress_rate'],
+                     performance_by_sector.get(s['sector_id'])]
+                    for s in minister['sector_summaries']
+                ],
+            },
+            {
+                'title': 'Quarterly trend',
+                'columns': [('Quarter', 'text'), ('Planned', 'number'), ('Actual', 'number')],
+                'rows': [[q['quarter'], q['planned'], q['actual']] for q in minister['quarterly_trend']],
+            },
+            {
+                'title': 'Departments',
+                'columns': [('Sector', 'text'), ('Department', 'text'), ('Performance', 'percent')],
+                'rows': [
+                    [s['name'], d['name'], d['performance_percentage']]
+                    for s in data.performance['sectors'] for d in s['departments']
+                ],
+            },
+            {'title': 'Indicators at risk', 'columns': _RISK_COLUMNS, 'rows': _risk_rows(minister['indicators_at_risk'])},
+            {
+                'title': 'Late or rejected submissions',
+                'columns': [('Type', 'text'), ('Indicator', 'text'), ('Sector', 'text'), ('Department', 'text'),
+                            ('Status', 'text'), ('Comment', 'text')],
+                'rows': [
+                    [e['type'], e['indicator_name'], e['sector_name'], e['department_name'], e['status'], e['comment']]
+                    for e in minister['late_or_rejected']
+                ],
+            },
+        ],
+    }
+
+
+def sector_document(data, sector_id):
+    sector = data.sector(sector_id)
+    name = sector['name'] if sector else StateMinisterSector.objects.get(id=sector_id).name
+    departments = sector['departments'] if sector else []
+    summary = next((s for s in data.minister['sector_summaries'] if s['sector_id'] == sector_id), None)
+    indicators = [
+        (department['name'], group_name, indicator)
+        for department in departments
+        for group_name, indicator in _department_indicators(department)
+    ]
+    return {
+        'title': f'{name} — quarterly report {data.year} Q{data.quarter}',
+        'subtitle': _subtitle(data, name),
+        'summary': [
+            ('Sector performance', sector['performance_percentage'] if sector else None, 'percent'),
+            ('Annual target', summary['annual_target'] if summary else None, 'number'),
+            ('Achieved', summary['performance_achieved'] if summary else None, 'number'),
+            ('Progress', summary['progress_rate'] if summary else None, 'percent'),
+            ('Departments', len(departments), 'text'),
+            ('Indicators', len(indicators), 'text'),
+        ],
+        'tables': [
+            {
+                'title': 'Departments',
+                'columns': [('Department', 'text'), ('Performance', 'percent'), ('Indicators', 'text')],
+                'rows': [
+                    [d['name'], d['performance_percentage'], len(list(_department_indicators(d)))]
+                    for d in departments
+                ],
+            },
+            {
+                'title': 'Indicators',
+                'columns': [('Department', 'text'), ('Group', 'text'), ('Indicator', 'text'), ('Unit', 'text'),
+                            ('Target', 'number'), ('Achieved', 'number'), ('Performance', 'percent')],
+                'rows': [
+                    [department, group, i['name'], i['unit'], i['target'], i['achieved'], i['performance_percentage']]
+                    for department, group, i in indicators
+                ],
+            },
+            {
+                'title': 'Indicators at risk',
+                'columns': _RISK_COLUMNS,
+                'rows': _risk_rows(data.sector_at_risk(sector_id)),
+            },
+        ],
+    }
+
+
+# Rendering pool
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_pool():
+    """The process pool rendering report files, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_RENDER_PROCESSES', 2),
+                # Not fork: the job worker has threads and open connections.
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(_discard_pool)
+
+
+def render_all(items):
+    """Render ``[(file_format, document), ...]`` in the pool; returns the
+    file bytes in the same order."""
+    font = getattr(settings, 'REPORT_PDF_FONT', '')
+    try:
+        futures = [render_pool().submit(render.render, file_format, document, font) for file_format, document in items]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        # A renderer process died (e.g. killed for memory); start afresh next time.
+        _discard_pool()
+        raise
+
+
+# Generation
+
+def _store(kind, sector_id, year, quarter, file_format, version, content, build_seconds):
+    report, _ = Report.objects.update_or_create(
+        kind=kind, sector_id=sector_id, year=year, quarter=quarter, file_format=file_format,
+        defaults={
+            'data_version': version,
+            'content': content,
+            'size': len(content),
+            'built_at': timezone.now(),
+            'build_seconds': build_seconds,
+        },
+    )
+    return report
+
+
+def current_report(kind, year, quarter, file_format, sector_id=0, version=None):
+    """The stored report if it was built from the current data, else None."""
+    version = version or data_version(year, sector_id)
+    return Report.objects.filter(
+        kind=kind, sector_id=sector_id, year=year, quarter=quarter, file_format=file_format, data_version=version,
+    ).defer('content').first()
+
+
+def generate(kind, year, quarter, file_format, sector_id=0):
+    """Return an up-to-date report, building it if needed."""
+    # Fingerprint before reading the data: if it changes meanwhile, the
+    # stored version is already stale and the next request rebuilds.
+    version = data_version(year, sector_id)
+    report = current_report(kind, year, quarter, file_format, sector_id, version)
+    if report is not None:
+        return report
+    started = time.perf_counter()
+    data = QuarterData(year, quarter)
+    document = ministry_document(data) if kind == ReportKind.MINISTRY else sector_document(data, sector_id)
+    [content] = render_all([(file_format, document)])
+    return _store(kind, sector_id, year, quarter, file_format, version, content, time.perf_counter() - started)
+
+
+def generate_quarter(year, quarter, file_formats):
+    """Build the ministry report and every sector's report for a quarter,
+    skipping those already current; returns the reports."""
+    targets = [(ReportKind.MINISTRY, 0)]
+    targets += [(ReportKind.SECTOR, sid) for sid in StateMinisterSector.objects.order_by('id').values_list('id', flat=True)]
+
+    reports = []
+    pending = []
+    for kind, sector_id in targets:
+        version = data_version(year, sector_id)
+        for file_format in file_formats:
+            report = current_report(kind, year, quarter, file_format, sector_id, version)
+            if report is not None:
+                reports.append(report)
+            else:
+                pending.append((kind, sector_id, file_format, version))
+    if not pending:
+        return reports
+
+    started = time.perf_counter()
+    data = QuarterData(year, quarter)
+    documents = {}
+    for kind, sector_id, _, _ in pending:
+        if sector_id not in documents:
+            documents[sector_id] = ministry_document(data) if kind == ReportKind.MINISTRY else sector_document(data, sector_id)
+    contents = render_all([(file_format, documents[sector_id]) for _, sector_id, file_format, _ in pending])
+    build_seconds = time.perf_counter() - started
+    for (kind, sector_id, file_format, version), content in zip(pending, contents):
+        reports.append(_store(kind, sector_id, year, quarter, file_format, version, content, build_seconds))
+    logger.info('Built %d reports for %s Q%s in %.1fs', len(pending), year, quarter, build_seconds)
+    return reports
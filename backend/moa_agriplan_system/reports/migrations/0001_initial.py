@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Report',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('MINISTRY', 'Ministry quarterly report'), ('SECTOR', 'Sector quarterly report')], max_length=16)),
+                ('sector_id', models.PositiveIntegerField(default=0, help_text='Sector of a sector report, else 0.')),
+                ('year', models.PositiveIntegerField()),
+                ('quarter', models.PositiveSmallIntegerField(choices=[(1, 'Q1'), (2, 'Q2'), (3, 'Q3'), (4, 'Q4')])),
+                ('file_format', models.CharField(choices=[('pdf', 'PDF'), ('xlsx', 'Excel workbook')], max_length=8)),
+                ('data_version', models.CharField(max_length=64)),
+                ('content', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('built_at', models.DateTimeField()),
+                ('build_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'sector_id', 'year', 'quarter', 'file_format'), name='unique_report')],
+            },
+        ),
+    ]
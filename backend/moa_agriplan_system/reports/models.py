@@ -0,0 +1,49 @@
+from django.db import models
+
+
+class ReportKind(models.TextChoices):
+    MINISTRY = 'MINISTRY', 'Ministry quarterly report'
+    SECTOR = 'SECTOR', 'Sector quarterly report'
+
+
+class ReportFormat(models.TextChoices):
+    PDF = 'pdf', 'PDF'
+    XLSX = 'xlsx', 'Excel workbook'
+
+
+class Report(models.Model):
+    """A generated quarterly report file, built by the ``reports.generate`` job.
+
+    The file lives in ``content`` rather than on disk so the web and worker
+    containers need no shared volume. ``data_version`` fingerprints the plan
+    data the report was built from; a request for the same report is served
+    from here until that data changes.
+    """
+
+    kind = models.CharField(max_length=16, choices=ReportKind.choices)
+    sector_id = models.PositiveIntegerField(default=0, help_text='Sector of a sector report, else 0.')
+    year = models.PositiveIntegerField()
+    quarter = models.PositiveSmallIntegerField(choices=((1, 'Q1'), (2, 'Q2'), (3, 'Q3'), (4, 'Q4')))
+    file_format = models.CharField(max_length=8, choices=ReportFormat.choices)
+    data_version = models.CharField(max_length=64)
+    content = models.BinaryField()
+    size = models.PositiveIntegerField()
+    built_at = models.DateTimeField()
+    build_seconds = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'sector_id', 'year', 'quarter', 'file_format'],
+                name='unique_report',
+            ),
+        ]
+
+    def __str__(self):
+        scope = f' sector {self.sector_id}' if self.sector_id else ''
+        return f"{self.kind}{scope} {self.year} Q{self.quarter} ({self.file_format})"
+
+    @property
+    def filename(self):
+        scope = f'sector-{self.sector_id}' if self.sector_id else 'ministry'
+        return f'{scope}-report-{self.year}-q{self.quarter}.{self.file_format}'
@@ -0,0 +1,198 @@
+"""
+PDF and XLSX rendering of report documents.
+
+This module does not touch Django or the database: it runs in the report
+worker pool's spawned processes, which receive a plain document and return
+the file's bytes. A document is a dict::
+
+    {
+        'title': str, 'subtitle': str,
+        'summary': [(label, value, kind), ...],
+        'tables': [{'title': str, 'columns': [(header, kind), ...], 'rows': [[...], ...]}, ...],
+    }
+
+where ``kind`` is ``'text'``, ``'number'`` or ``'percent'``.
+
+reportlab (PDF) and openpyxl (XLSX) are optional; ``available_formats()``
+lists what can be rendered.
+"""
+
+import io
+import re
+from xml.sax.saxutils import escape
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+except ImportError:  # optional dependency
+    openpyxl = None
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:  # optional dependency
+    pdfmetrics = None
+
+PDF = 'pdf'
+XLSX = 'xlsx'
+
+CONTENT_TYPES = {
+    PDF: 'application/pdf',
+    XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def available_formats():
+    formats = []
+    if pdfmetrics is not None:
+        formats.append(PDF)
+    if openpyxl is not None:
+        formats.append(XLSX)
+    return tuple(formats)
+
+
+def format_value(value, kind):
+    if value is None:
+        return 'N/A'
+    if kind == 'number':
+        return f'{value:,.2f}'
+    if kind == 'percent':
+        return f'{value:.1f}%'
+    return str(value)
+
+
+def render(file_format, document, pdf_font=''):
+    """The rendered file as bytes."""
+    if file_format == PDF:
+        return render_pdf(document, pdf_font)
+    return render_xlsx(document)
+
+
+# PDF
+
+_HEADER_BACKGROUND = '#2E7D32'
+
+
+def _pdf_font(path):
+    # Helvetica has no Ethiopic glyphs; REPORT_PDF_FONT can point at a TTF that does.
+    if not path:
+        return 'Helvetica', 'Helvetica-Bold'
+    pdfmetrics.registerFont(TTFont('ReportFont', path))
+    return 'ReportFont', 'ReportFont'
+
+
+def render_pdf(document, font_path=''):
+    font, bold_font = _pdf_font(font_path)
+    styles = getSampleStyleSheet()
+    for style in styles.byName.values():
+        style.fontName = bold_font if style.name.startswith(('Title', 'Heading')) else font
+    cell_style = styles['BodyText'].clone('Cell', fontSize=8, leading=10)
+
+    story = [
+        Paragraph(escape(document['title']), styles['Title']),
+        Paragraph(escape(document['subtitle']), styles['Normal']),
+        Spacer(1, 6 * mm),
+    ]
+    if document['summary']:
+        summary = [[label, format_value(value, kind)] for label, value, kind in document['summary']]
+        table = Table(summary, hAlign='LEFT', colWidths=[80 * mm, 50 * mm])
+        table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ]))
+        story += [table, Spacer(1, 6 * mm)]
+
+    for section in document['tables']:
+        story.append(Paragraph(escape(section['title']), styles['Heading2']))
+        if not section['rows']:
+            story += [Paragraph('No data.', styles['Normal']), Spacer(1, 4 * mm)]
+            continue
+        kinds = [kind for _, kind in section['columns']]
+        rows = [[header for header, _ in section['columns']]]
+        for row in section['rows']:
+            rows.append([
+                Paragraph(escape(format_value(value, kind)), cell_style) if kind == 'text' else format_value(value, kind)
+                for value, kind in zip(row, kinds)
+            ])
+        table = Table(rows, repeatRows=1, hAlign='LEFT')
+        style = [
+            ('FONTNAME', (0, 0), (-1, 0), bold_font),
+            ('FONTNAME', (0, 1), (-1, -1), font),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(_HEADER_BACKGROUND)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F1F8E9')]),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]
+        style += [('ALIGN', (i, 1), (i, -1), 'RIGHT') for i, kind in enumerate(kinds) if kind != 'text']
+        table.setStyle(TableStyle(style))
+        story += [table, Spacer(1, 6 * mm)]
+
+    buffer = io.BytesIO()
+    pdf = SimpleDocTemplate(
+        buffer, pagesize=landscape(A4), title=document['title'],
+        leftMargin=12 * mm, rightMargin=12 * mm, topMargin=12 * mm, bottomMargin=12 * mm,
+    )
+    pdf.build(story)
+    return buffer.getvalue()
+
+
+# XLSX
+
+_NUMBER_FORMATS = {'number': '#,##0.00', 'percent': '0.0"%"'}
+
+
+def _sheet_title(title, used):
+    # Excel: at most 31 characters, none of []:*?/\ and unique per workbook.
+    base = re.sub(r'[\[\]:*?/\\]', ' ', title)[:31].strip() or 'Sheet'
+    name, n = base, 2
+    while name.lower() in used:
+        suffix = f' ({n})'
+        name, n = base[:31 - len(suffix)] + suffix, n + 1
+    used.add(name.lower())
+    return name
+
+
+def render_xlsx(document):
+    workbook = openpyxl.Workbook(write_only=True)
+    used = set()
+    bold = Font(bold=True, color='FFFFFF')
+    fill = PatternFill('solid', fgColor=_HEADER_BACKGROUND.lstrip('#'))
+
+    def header_cell(sheet, value):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.font = bold
+        cell.fill = fill
+        return cell
+
+    def value_cell(sheet, value, kind):
+        cell = WriteOnlyCell(sheet, value=value)
+        if value is not None and kind in _NUMBER_FORMATS:
+            cell.number_format = _NUMBER_FORMATS[kind]
+        return cell
+
+    sheet = workbook.create_sheet(_sheet_title('Summary', used))
+    sheet.append([document['title']])
+    sheet.append([document['subtitle']])
+    sheet.append([])
+    for label, value, kind in document['summary']:
+        sheet.append([label, value_cell(sheet, value, kind)])
+
+    for section in document['tables']:
+        sheet = workbook.create_sheet(_sheet_title(section['title'], used))
+        kinds = [kind for _, kind in section['columns']]
+        sheet.append([header_cell(sheet, header) for header, _ in section['columns']])
+        for row in section['rows']:
+            sheet.append([value_cell(sheet, value, kind) for value, kind in zip(row, kinds)])
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
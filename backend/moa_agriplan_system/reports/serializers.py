@@ -0,0 +1,41 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from indicators.models import StateMinisterSector
+from .models import Report, ReportFormat, ReportKind
+
+
+class ReportSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Report
+        fields = [
+            'id', 'kind', 'sector_id', 'year', 'quarter', 'file_format',
+            'size', 'built_at', 'build_seconds', 'download_url',
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        url = reverse('report-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class ReportRequestSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=ReportKind.choices)
+    sector = serializers.IntegerField(required=False, min_value=1)
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    quarter = serializers.IntegerField(min_value=1, max_value=4)
+    file_format = serializers.ChoiceField(choices=ReportFormat.choices, default=ReportFormat.PDF)
+
+    def validate(self, attrs):
+        if attrs['kind'] == ReportKind.SECTOR:
+            sector = attrs.get('sector')
+            if not sector:
+                raise serializers.ValidationError({'sector': 'Required for sector reports.'})
+            if not StateMinisterSector.objects.filter(id=sector).exists():
+                raise serializers.ValidationError({'sector': 'Unknown sector.'})
+        else:
+            attrs['sector'] = 0
+        return attrs
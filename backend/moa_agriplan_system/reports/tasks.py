@@ -0,0 +1,22 @@
+from django.urls import reverse
+
+from jobs.registry import task
+
+from . import builder, render
+
+
+def _describe(report):
+    return {'report_id': report.pk, 'download_url': reverse('report-download', args=[report.pk])}
+
+
+@task('reports.generate', max_attempts=2)
+def generate_report(job, kind, year, quarter, file_format, sector_id=0):
+    """Build one report requested through POST /api/reports/."""
+    return _describe(builder.generate(kind, year, quarter, file_format, sector_id))
+
+
+@task('reports.generate_quarter', max_attempts=1, api=True)
+def generate_quarter_reports(job, year, quarter, file_formats=None):
+    """Build the ministry and every sector report for a quarter, e.g. when its window closes."""
+    reports = builder.generate_quarter(year, quarter, file_formats or render.available_formats())
+    return {'reports': [_describe(report) for report in reports]}
@@ -0,0 +1,98 @@
+from django.http import HttpResponse
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from jobs.queue import enqueue
+from jobs.views import accepted_response
+from users.scope import get_scope
+from . import builder, render
+from .models import Report, ReportKind
+from .serializers import ReportRequestSerializer, ReportSerializer
+
+# Roles that see the whole ministry and therefore every sector.
+MINISTRY_ROLES = ('MINISTER_VIEW', 'EXECUTIVE', 'STRATEGIC_STAFF')
+
+
+def visible_sector_ids(scope):
+    """Sectors whose reports the user may read; None means all of them."""
+    if scope.is_superuser or scope.role in MINISTRY_ROLES:
+        return None
+    if scope.is_state_minister:
+        return {scope.sector_id} if scope.sector_id else set()
+    if scope.is_advisor:
+        sector_id = scope.department_sector_id
+        return {sector_id} if sector_id else set()
+    return set()
+
+
+class ReportViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Quarterly reports.
+
+    ``POST`` with ``kind`` (MINISTRY or SECTOR), ``sector``, ``year``,
+    ``quarter`` and ``file_format`` (pdf or xlsx) answers 200 with the report
+    when one built from the current data exists, else queues its generation
+    and answers 202 with the job to poll; the finished job's result holds
+    the ``download_url``.
+    """
+
+    serializer_class = ReportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        qs = Report.objects.order_by('-year', '-quarter', 'kind', 'sector_id')
+        if self.action != 'download':
+            qs = qs.defer('content')
+        sector_ids = visible_sector_ids(get_scope(self.request))
+        if sector_ids is not None:
+            qs = qs.filter(kind=ReportKind.SECTOR, sector_id__in=sector_ids)
+        for param in ('year', 'quarter'):
+            value = self.request.query_params.get(param)
+            if value and value.isdigit():
+                qs = qs.filter(**{param: int(value)})
+        return qs
+
+    def create(self, request):
+        serializer = ReportRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        sector_ids = visible_sector_ids(get_scope(request))
+        if sector_ids is not None and (data['kind'] == ReportKind.MINISTRY or data['sector'] not in sector_ids):
+            return Response({'detail': 'You do not have access to this report.'}, status=status.HTTP_403_FORBIDDEN)
+        if data['file_format'] not in render.available_formats():
+            return Response(
+                {'detail': f"{data['file_format'].upper()} reports are not available on this server."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        version = builder.data_version(data['year'], data['sector'])
+        report = builder.current_report(
+            data['kind'], data['year'], data['quarter'], data['file_format'], data['sector'], version,
+        )
+        if report is not None:
+            return Response(self.get_serializer(report).data)
+        job = enqueue(
+            'reports.generate',
+            {
+                'kind': data['kind'],
+                'sector_id': data['sector'],
+                'year': data['year'],
+                'quarter': data['quarter'],
+                'file_format': data['file_format'],
+            },
+            # Identical requests while one is being built share its job.
+            dedupe_key=(
+                f"report:{data['kind']}:{data['sector']}:{data['year']}:{data['quarter']}:"
+                f"{data['file_format']}:{version[:16]}"
+            ),
+            user=request.user,
+        )
+        return accepted_response(request, job)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        report = self.get_object()
+        response = HttpResponse(bytes(report.content), content_type=render.CONTENT_TYPES[report.file_format])
+        response['Content-Disposition'] = f'attachment; filename="{report.filename}"'
+        response['ETag'] = f'"{report.data_version}"'
+        return response
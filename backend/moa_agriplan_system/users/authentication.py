@@ -0,0 +1,117 @@
+"""
+Token authentication backed by an in-process LRU cache.
+
+DRF's ``TokenAuthentication`` joins ``authtoken_token`` to ``users_user`` on
+every API call, and a dashboard page load fires several calls. Here each
+worker remembers token -> user row (role, sector_id, department_id,
+is_superuser, ...) for a short TTL in a bounded LRU.
+
+Any change that could affect authentication -- logout (token deleted), a
+profile or admin update, a password change, deactivation -- saves the User
+or Token row, which bumps a shared version stamp (see ``users.signals``) and
+empties the cache in every worker on its next request.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from moa_agriplan_system.shared_state import get_version, bump_version
+
+VERSION_NAME = 'auth-tokens'
+
+
+class TokenUserCache:
+    """Bounded LRU of token key -> (user row, token row, expiry)."""
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def _sync(self):
+        version = get_version(VERSION_NAME)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._entries.clear()
+                    self._version = version
+
+    def get(self, key):
+        self._sync()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            db, user_values, token_values, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Hand out fresh instances per request so per-request mutations of
+        # request.user never leak into the cached copy.
+        user = get_user_model().from_db(db, _field_names(get_user_model()), user_values)
+        token = Token.from_db(db, _field_names(Token), token_values)
+        return user, token
+
+    def set(self, key, user, token):
+        entry = (
+            token._state.db,
+            _field_values(user),
+            _field_values(token),
+            time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _field_names(model):
+    return [f.attname for f in model._meta.concrete_fields]
+
+
+def _field_values(instance):
+    return [getattr(instance, f.attname) for f in instance._meta.concrete_fields]
+
+
+token_cache = TokenUserCache(
+    max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 300),
+)
+
+
+def invalidate_token_cache():
+    """Forget every cached token -> user mapping in all workers."""
+    token_cache.clear()
+    bump_version(VERSION_NAME)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for ``TokenAuthentication`` that skips the
+    per-request token/user query while the cached entry is fresh."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
@@ -0,0 +1,592 @@
+"""
+Minister dashboard data, split into independent loaders and a pure builder.
+
+Each ``load_*`` function is one query returning plain rows, and none depends
+on another, so ``MinisterDashboardView`` runs them one after the other
+while ``minister_dashboard_async`` runs them concurrently. ``build_minister_dashboard``
+turns the rows into the response body without touching the database.
+
+``build_indicator_performance`` computes the ``IndicatorPerformanceView``
+body; like the minister dashboard it is also precomputed into snapshots
+(see ``users.snapshots``).
+"""
+
+from django.utils import timezone
+
+from indicators.models import IndicatorGroup
+from plans.models import AnnualPlan, QuarterlyBreakdown, QuarterlyPerformance, PlanStatus, PerformanceStatus
+
+APPROVED_PLAN_STATUSES = [PlanStatus.APPROVED, PlanStatus.VALIDATED, PlanStatus.FINAL_APPROVED]
+APPROVED_PERFORMANCE_STATUSES = [PerformanceStatus.APPROVED, PerformanceStatus.VALIDATED, PerformanceStatus.FINAL_APPROVED]
+
+QUARTER_MONTHS = {1: 3, 2: 6, 3: 9, 4: 12}
+
+EMPTY_MINISTER_DASHBOARD = {
+    'kpis': {
+        'total_annual_target': 0,
+        'total_achieved_performance': 0,
+        'achievement_percentage': 0,
+        'indicators_on_track': 0,
+        'indicators_lagging': 0,
+    },
+    'sector_comparison': [],
+    'quarterly_trend': [
+        {'quarter': 'Q1', 'planned': 0, 'actual': 0},
+        {'quarter': 'Q2', 'planned': 0, 'actual': 0},
+        {'quarter': 'Q3', 'planned': 0, 'actual': 0},
+        {'quarter': 'Q4', 'planned': 0, 'actual': 0},
+    ],
+    'approval_status': {'approved': 0, 'pending': 0, 'rejected': 0},
+    'approval_stages': {
+        'draft': 0, 'submitted': 0, 'approved': 0,
+        'validated': 0, 'final_approved': 0, 'rejected': 0,
+    },
+    'sector_summaries': [],
+    'indicators_at_risk': [],
+    'late_or_rejected': [],
+}
+
+
+def latest_plan_year():
+    return AnnualPlan.objects.order_by('-year').values_list('year', flat=True).first()
+
+
+def load_plans(year):
+    return list(AnnualPlan.objects.filter(year=year).order_by('id').values(
+        'id',
+        'target',
+        'indicator__name',
+        'indicator__is_incremental',
+        'indicator__department__name',
+        'indicator__department__sector_id',
+        'indicator__department__sector__name',
+    ))
+
+
+def load_approved_breakdowns(year):
+    return list(QuarterlyBreakdown.objects.filter(
+        plan__year=year, status__in=APPROVED_PLAN_STATUSES,
+    ).order_by('id').values('plan_id', 'q1', 'q2', 'q3', 'q4'))
+
+
+def load_approved_performances(year):
+    return list(QuarterlyPerformance.objects.filter(
+        plan__year=year, status__in=APPROVED_PERFORMANCE_STATUSES,
+    ).order_by('id').values('plan_id', 'quarter', 'value'))
+
+
+def load_breakdown_statuses(year):
+    return list(QuarterlyBreakdown.objects.filter(plan__year=year).order_by('id').values(
+        'plan_id', 'status', 'submitted_at', 'reviewed_at', 'review_comment',
+    ))
+
+
+def load_performance_statuses(year):
+    return list(QuarterlyPerformance.objects.filter(plan__year=year).order_by('id').values(
+        'plan_id', 'quarter', 'status', 'submitted_at', 'reviewed_at', 'review_comment',
+    ))
+
+
+# Loaders in the order build_minister_dashboard takes their results.
+MINISTER_DASHBOARD_LOADERS = (
+    load_plans,
+    load_approved_breakdowns,
+    load_approved_performances,
+    load_breakdown_statuses,
+    load_performance_statuses,
+)
+
+
+def _period_target(breakdown, quarter_months):
+    """Breakdown target for the first ``quarter_months`` months (3, 6 or 9)."""
+    if quarter_months == 3:
+        return float(breakdown['q1'] or 0)
+    if quarter_months == 6:
+        return float(breakdown['q1'] or 0) + float(breakdown['q2'] or 0)
+    if quarter_months == 9:
+        return float(breakdown['q1'] or 0) + float(breakdown['q2'] or 0) + float(breakdown['q3'] or 0)
+    return 0
+
+
+def _of_loaded_plans(rows, plans_by_id):
+    # The loaders are separate queries with no shared snapshot, so a plan
+    # created after load_plans ran can show up in the later ones; leave such
+    # rows to the next load rather than fail on them.
+    return [row for row in rows if row['plan_id'] in plans_by_id]
+
+
+def _late_or_rejected_entry(kind, row, plan, now):
+    entry = {
+        'type': kind,
+        'indicator_name': plan['indicator__name'],
+        'sector_name': plan['indicator__department__sector__name'],
+        'department_name': plan['indicator__department__name'],
+    }
+    if kind == 'PERFORMANCE':
+        entry['quarter'] = row['quarter']
+    if row['status'] == 'REJECTED':
+        entry.update({
+            'status': 'REJECTED',
+            'submitted_at': row['submitted_at'].isoformat() if row['submitted_at'] else None,
+            'reviewed_at': row['reviewed_at'].isoformat() if row['reviewed_at'] else None,
+            'comment': row['review_comment'] or '',
+        })
+        return entry
+    if row['status'] == 'SUBMITTED' and row['submitted_at']:
+        days_since_submission = (now - row['submitted_at']).days
+        if days_since_submission > 30:
+            entry.update({
+                'status': 'LATE',
+                'submitted_at': row['submitted_at'].isoformat(),
+                'days_late': days_since_submission - 30,
+                'comment': '',
+            })
+            return entry
+    return None
+
+
+def _filtered_performances(quarter_months, plans_by_id, approved_perfs):
+    """Approved performances counted for the period: the quarters up to
+    ``quarter_months``, or for the full year every quarter except Q1-Q3 of
+    incremental indicators (Q4 already has the cumulative value)."""
+    if quarter_months:
+        return [p for p in approved_perfs if QUARTER_MONTHS[p['quarter']] <= quarter_months]
+    return [
+        p for p in approved_perfs
+        if not plans_by_id[p['plan_id']]['indicator__is_incremental'] or p['quarter'] == 4
+    ]
+
+
+def _indicator_performance(quarter_months, plans_by_id, breakdown_by_plan, filtered_perfs):
+    """``{plan_id: {'target', 'achieved', 'indicator_name'}}`` for the plans
+    with performance in the period, targets cut to the period."""
+    indicator_performance = {}
+    for perf in filtered_perfs:
+        plan_id = perf['plan_id']
+        if plan_id not in indicator_performance:
+            plan = plans_by_id[plan_id]
+            indicator_performance[plan_id] = {
+                'target': float(plan['target']),
+                'achieved': 0,
+                'indicator_name': plan['indicator__name'],
+            }
+        indicator_performance[plan_id]['achieved'] += float(perf['value']) if perf['value'] is not None else 0
+
+    if quarter_months:
+        for plan_id in indicator_performance:
+            breakdown = breakdown_by_plan.get(plan_id)
+            if breakdown is not None:
+                indicator_performance[plan_id]['target'] = _period_target(breakdown, quarter_months)
+            else:
+                # Fallback to proportional if no breakdown exists
+                indicator_performance[plan_id]['target'] = (indicator_performance[plan_id]['target'] * quarter_months) / 12
+    return indicator_performance
+
+
+def _at_risk_entries(indicator_performance, plans_by_id, sector_id=None):
+    """Lagging indicators (under 75% of the period target), worst first."""
+    entries = []
+    for plan_id, perf_data in indicator_performance.items():
+        plan = plans_by_id[plan_id]
+        if sector_id is not None and plan['indicator__department__sector_id'] != sector_id:
+            continue
+        progress_pct = (perf_data['achieved'] / perf_data['target'] * 100) if perf_data['target'] > 0 else 0
+        if progress_pct < 50:
+            risk_level = 'HIGH'
+        elif progress_pct < 75:
+            risk_level = 'MEDIUM'
+        else:
+            continue  # Only include if lagging
+        entries.append({
+            'indicator_name': perf_data['indicator_name'],
+            'sector_name': plan['indicator__department__sector__name'],
+            'department_name': plan['indicator__department__name'],
+            'target': perf_data['target'],
+            'achieved': perf_data['achieved'],
+            'gap': perf_data['target'] - perf_data['achieved'],
+            'progress_pct': progress_pct,
+            'risk_level': risk_level,
+        })
+    entries.sort(key=lambda x: x['progress_pct'])
+    return entries
+
+
+def indicators_at_risk(quarter_months, plans, approved_breakdowns, approved_perfs, sector_id=None):
+    """Every indicator at risk, worst first, optionally only ``sector_id``'s.
+
+    The minister dashboard shows the first 20 of the ministry-wide list; this
+    is the untruncated list, for callers that need all of a sector's
+    indicators at risk.
+    """
+    plans_by_id = {p['id']: p for p in plans}
+    approved_breakdowns = _of_loaded_plans(approved_breakdowns, plans_by_id)
+    approved_perfs = _of_loaded_plans(approved_perfs, plans_by_id)
+    breakdown_by_plan = {bd['plan_id']: bd for bd in approved_breakdowns}
+    filtered_perfs = _filtered_performances(quarter_months, plans_by_id, approved_perfs)
+    indicator_performance = _indicator_performance(quarter_months, plans_by_id, breakdown_by_plan, filtered_perfs)
+    return _at_risk_entries(indicator_performance, plans_by_id, sector_id)
+
+
+def build_minister_dashboard(quarter_months, plans, approved_breakdowns, approved_perfs, all_breakdowns, all_perfs, now=None):
+    now = now or timezone.now()
+    plans_by_id = {p['id']: p for p in plans}
+    approved_breakdowns = _of_loaded_plans(approved_breakdowns, plans_by_id)
+    approved_perfs = _of_loaded_plans(approved_perfs, plans_by_id)
+    all_breakdowns = _of_loaded_plans(all_breakdowns, plans_by_id)
+    all_perfs = _of_loaded_plans(all_perfs, plans_by_id)
+    breakdown_by_plan = {bd['plan_id']: bd for bd in approved_breakdowns}
+
+    # 1. KPI Cards
+    total_annual_target = sum(float(p['target']) for p in plans)
+
+    # Total achieved performance (sum of quarterly performances, filtered by quarter_months)
+    filtered_perfs = _filtered_performances(quarter_months, plans_by_id, approved_perfs)
+
+    total_achieved = sum(float(p['value']) for p in filtered_perfs if p['value'] is not None)
+
+    # Calculate target based on quarterly breakdowns for the specified period
+    target_for_percentage = total_annual_target
+    if quarter_months:
+        quarterly_target_totals = {'Q1': 0, 'Q2': 0, 'Q3': 0, 'Q4': 0}
+        for bd in approved_breakdowns:
+            quarterly_target_totals['Q1'] += float(bd['q1'] or 0)
+            quarterly_target_totals['Q2'] += float(bd['q2'] or 0)
+            quarterly_target_totals['Q3'] += float(bd['q3'] or 0)
+            quarterly_target_totals['Q4'] += float(bd['q4'] or 0)
+
+        if quarter_months == 3:
+            target_for_percentage = quarterly_target_totals['Q1']
+        elif quarter_months == 6:
+            target_for_percentage = quarterly_target_totals['Q1'] + quarterly_target_totals['Q2']
+        elif quarter_months == 9:
+            target_for_percentage = quarterly_target_totals['Q1'] + quarterly_target_totals['Q2'] + quarterly_target_totals['Q3']
+        # If quarter_months is 12 or None, use total annual target
+
+    achievement_percentage = (total_achieved / target_for_percentage * 100) if target_for_percentage > 0 else 0
+
+    # Indicators on track vs lagging (using same quarter filtering)
+    indicator_performance = _indicator_performance(quarter_months, plans_by_id, breakdown_by_plan, filtered_perfs)
+
+    on_track = 0
+    lagging = 0
+    for perf_data in indicator_performance.values():
+        progress_pct = (perf_data['achieved'] / perf_data['target'] * 100) if perf_data['target'] > 0 else 0
+        if progress_pct >= 75:
+            on_track += 1
+        else:
+            lagging += 1
+
+    # 2. Sector-wise performance comparison
+    sector_data = {}
+    for plan in plans:
+        sector_id = plan['indicator__department__sector_id']
+        if sector_id not in sector_data:
+            sector_data[sector_id] = {
+                'sector_id': sector_id,
+                'sector_name': plan['indicator__department__sector__name'],
+                'target': 0,
+                'achieved': 0,
+            }
+        sector_data[sector_id]['target'] += float(plan['target'])
+
+    if quarter_months:
+        sector_quarterly_targets = {sector_id: 0 for sector_id in sector_data}
+        for plan in plans:
+            breakdown = breakdown_by_plan.get(plan['id'])
+            if breakdown is not None:
+                target = _period_target(breakdown, quarter_months)
+            else:
+                # Fallback to proportional if no breakdown exists
+                target = (float(plan['target']) * quarter_months) / 12
+            sector_quarterly_targets[plan['indicator__department__sector_id']] += target
+        for sector_id, target in sector_quarterly_targets.items():
+            sector_data[sector_id]['target'] = target
+
+    for perf in filtered_perfs:
+        sector_id = plans_by_id[perf['plan_id']]['indicator__department__sector_id']
+        sector_data[sector_id]['achieved'] += float(perf['value']) if perf['value'] is not None else 0
+
+    sector_comparison = list(sector_data.values())
+
+    # 3. Quarterly trend data
+    quarterly_planned = {'Q1': 0, 'Q2': 0, 'Q3': 0, 'Q4': 0}
+    quarterly_actual = {'Q1': 0, 'Q2': 0, 'Q3': 0, 'Q4': 0}
+
+    for bd in approved_breakdowns:
+        quarterly_planned['Q1'] += float(bd['q1'] or 0)
+        quarterly_planned['Q2'] += float(bd['q2'] or 0)
+        quarterly_planned['Q3'] += float(bd['q3'] or 0)
+        quarterly_planned['Q4'] += float(bd['q4'] or 0)
+
+    for perf in filtered_perfs:
+        quarterly_actual[f"Q{perf['quarter']}"] += float(perf['value']) if perf['value'] is not None else 0
+
+    quarterly_trend = [
+        {'quarter': q, 'planned': quarterly_planned[q], 'actual': quarterly_actual[q]}
+        for q in ('Q1', 'Q2', 'Q3', 'Q4')
+    ]
+
+    # 4. Approval status and stages (all breakdowns and performances, not just approved)
+    approval_status = {'approved': 0, 'pending': 0, 'rejected': 0}
+    stage_counts = {
+        'draft': 0,
+        'submitted': 0,
+        'approved': 0,
+        'validated': 0,
+        'final_approved': 0,
+        'rejected': 0,
+    }
+    for row in (*all_breakdowns, *all_perfs):
+        status = row['status'].upper()
+        if status == 'FINAL_APPROVED':
+            approval_status['approved'] += 1
+        elif status == 'REJECTED':
+            approval_status['rejected'] += 1
+        else:
+            approval_status['pending'] += 1
+        status_lower = row['status'].lower()
+        if status_lower in stage_counts:
+            stage_counts[status_lower] += 1
+
+    # 5. Sector summary cards
+    sector_summaries = []
+    for sector_id, data in sector_data.items():
+        progress_rate = (data['achieved'] / data['target'] * 100) if data['target'] > 0 else 0
+        sector_summaries.append({
+            'sector_id': sector_id,
+            'sector_name': data['sector_name'],
+            'annual_target': data['target'],
+            'performance_achieved': data['achieved'],
+            'progress_rate': progress_rate,
+        })
+    sector_summaries.sort(key=lambda x: x['sector_name'])
+
+    # 6. Indicators at Risk
+    indicators_at_risk = _at_risk_entries(indicator_performance, plans_by_id)
+
+    # 7. Late or rejected submissions
+    late_or_rejected = []
+    for kind, rows in (('BREAKDOWN', all_breakdowns), ('PERFORMANCE', all_perfs)):
+        for row in rows:
+            entry = _late_or_rejected_entry(kind, row, plans_by_id[row['plan_id']], now)
+            if entry is not None:
+                late_or_rejected.append(entry)
+
+    return {
+        'kpis': {
+            'total_annual_target': total_annual_target,
+            'total_achieved_performance': total_achieved,
+            'achievement_percentage': achievement_percentage,
+            'indicators_on_track': on_track,
+            'indicators_lagging': lagging,
+        },
+        'sector_comparison': sector_comparison,
+        'quarterly_trend': quarterly_trend,
+        'approval_status': approval_status,
+        'approval_stages': stage_counts,
+        'sector_summaries': sector_summaries,
+        'indicators_at_risk': indicators_at_risk[:20],
+        'late_or_rejected': late_or_rejected[:50],
+    }
+
+
+def build_indicator_performance(year, quarter_months):
+    """Sector / department / group / indicator performance tree for
+    ``IndicatorPerformanceView``."""
+    plans_qs = AnnualPlan.objects.select_related(
+        'indicator__department__sector'
+    ).prefetch_related(
+        'indicator__groups'
+    ).filter(year=year)
+
+    perfs_qs = QuarterlyPerformance.objects.select_related(
+        'plan__indicator__department__sector'
+    ).filter(
+        plan__year=year,
+        status__in=[PerformanceStatus.APPROVED, PerformanceStatus.VALIDATED, PerformanceStatus.FINAL_APPROVED]
+    )
+
+    breakdowns_qs = QuarterlyBreakdown.objects.select_related(
+        'plan__indicator__department__sector'
+    ).filter(
+        plan__year=year,
+        status__in=[PlanStatus.APPROVED, PlanStatus.VALIDATED, PlanStatus.FINAL_APPROVED]
+    )
+
+    # Build data structure
+    sectors_dict = {}
+    
+    for plan in plans_qs:
+        sector = plan.indicator.department.sector
+        dept = plan.indicator.department
+        
+        if sector.id not in sectors_dict:
+            sectors_dict[sector.id] = {
+                'id': sector.id,
+                'name': sector.name,
+                'departments': {}
+            }
+            
+        if dept.id not in sectors_dict[sector.id]['departments']:
+            sectors_dict[sector.id]['departments'][dept.id] = {
+                'id': dept.id,
+                'name': dept.name,
+                'indicators': [],
+            }
+            
+        indicator_perfs = perfs_qs.filter(plan_id=plan.id)
+        
+        if quarter_months:
+            quarter_months_map = {1: 3, 2: 6, 3: 9, 4: 12}
+            filtered_perfs = [p for p in indicator_perfs if quarter_months_map.get(p.quarter, 12) <= quarter_months]
+        else:
+            # For full year: incremental indicators use Q4 only
+            if plan.indicator.is_incremental:
+                filtered_perfs = [p for p in indicator_perfs if p.quarter == 4]
+            else:
+                filtered_perfs = indicator_perfs
+            
+        is_na_target = (plan.target is None or plan.target == '' or plan.target == 'N/A')
+        target = 0
+        if not is_na_target:
+            try:
+                target = float(plan.target)
+                if quarter_months:
+                    try:
+                        breakdown = breakdowns_qs.get(plan_id=plan.id)
+                        qt = 0
+                        if quarter_months >= 3: qt += float(breakdown.q1 or 0)
+                        if quarter_months >= 6: qt += float(breakdown.q2 or 0)
+                        if quarter_months >= 9: qt += float(breakdown.q3 or 0)
+                        if quarter_months >= 12: qt += float(breakdown.q4 or 0)
+                        target = qt
+                    except QuarterlyBreakdown.DoesNotExist:
+                        target = (target * quarter_months) / 12
+            except (ValueError, TypeError):
+                is_na_target = True
+                target = 0
+                
+        all_performances_na = all(p.value is None or p.value == '' or str(p.value).upper() == 'N/A' for p in filtered_perfs)
+        total_achieved = sum(float(p.value) for p in filtered_perfs if p.value is not None and p.value != '' and str(p.value).upper() != 'N/A')
+        
+        if is_na_target or all_performances_na or target <= 0:
+            performance_pct = None
+        else:
+            performance_pct = (total_achieved / target) * 100
+            if performance_pct > 100:
+                performance_pct = 100.0
+                
+        groups = plan.indicator.groups.all()
+        group_id = groups.first().id if groups.exists() else None
+        group_name = groups.first().name if groups.exists() else None
+        
+        sectors_dict[sector.id]['departments'][dept.id]['indicators'].append({
+            'id': plan.indicator.id,
+            'plan_id': plan.id,
+            'name': plan.indicator.name,
+            'unit': plan.indicator.unit,
+            'description': plan.indicator.description,
+            'is_aggregatable': plan.indicator.is_aggregatable,
+            'target': 0 if is_na_target else target,
+            'achieved': 0 if all_performances_na else total_achieved,
+            'performance_percentage': performance_pct,
+            'group_id': group_id,
+            'group_name': group_name
+        })
+
+    # Calculate percentages
+    sectors_result = []
+    for s_id, s_data in sectors_dict.items():
+        depts_result = []
+        for d_id, d_data in s_data['departments'].items():
+            
+            # Department percent: average of all aggregatable indicators
+            agg_ind_pcts = [
+                ind['performance_percentage'] 
+                for ind in d_data['indicators'] 
+                if ind.get('is_aggregatable', True) and ind['performance_percentage'] is not None
+            ]
+            dept_perf = sum(agg_ind_pcts) / len(agg_ind_pcts) if agg_ind_pcts else None
+            
+            # Group indicators by group
+            groups_dict = {}
+            ungrouped = []
+            for ind in d_data['indicators']:
+                if ind['group_id']:
+                    if ind['group_id'] not in groups_dict:
+                        groups_dict[ind['group_id']] = {
+                            'id': ind['group_id'],
+                            'name': ind['group_name'],
+                            'indicators': []
+                        }
+                    groups_dict[ind['group_id']]['indicators'].append(ind)
+                else:
+                    ungrouped.append(ind)
+                    
+            groups_result = []
+            for g_id, g_data in groups_dict.items():
+                # Group percent: average of aggregatable indicators only
+                # Skip label groups - they don't participate in calculations
+                g_agg_pcts = [
+                    ind['performance_percentage']
+                    for ind in g_data['indicators']
+                    if ind.get('is_aggregatable', True) and ind['performance_percentage'] is not None
+                ]
+                g_perf = sum(g_agg_pcts) / len(g_agg_pcts) if g_agg_pcts else None
+                
+                # Check if this is a label group by querying the database
+                try:
+                    group_obj = IndicatorGroup.objects.get(id=g_id)
+                    is_label_group = group_obj.is_label
+                except IndicatorGroup.DoesNotExist:
+                    is_label_group = False
+                
+                # Label groups get None performance percentage
+                if is_label_group:
+                    g_perf = None
+                
+                groups_result.append({
+                    'id': g_data['id'],
+                    'name': g_data['name'],
+                    'performance_percentage': g_perf,
+                    'indicators': g_data['indicators'],
+                    'is_label': is_label_group
+                })
+            
+            depts_result.append({
+                'id': d_data['id'],
+                'name': d_data['name'],
+                'performance_percentage': dept_perf,
+                'groups': groups_result,
+                'ungrouped_indicators': ungrouped
+            })
+            
+        # Sector percent: average of departments
+        dept_pcts = [
+            d['performance_percentage']
+            for d in depts_result
+            if d['performance_percentage'] is not None
+        ]
+        sector_perf = sum(dept_pcts) / len(dept_pcts) if dept_pcts else None
+        
+        sectors_result.append({
+            'id': s_data['id'],
+            'name': s_data['name'],
+            'performance_percentage': sector_perf,
+            'departments': depts_result
+        })
+        
+    # Ministry percent: average of sectors
+    sector_pcts = [
+        s['performance_percentage']
+        for s in sectors_result
+        if s['performance_percentage'] is not None
+    ]
+    ministry_perf = sum(sector_pcts) / len(sector_pcts) if sector_pcts else None
+    
+    return {
+        'year': year,
+        'quarter_months': quarter_months,
+        'ministry_performance': ministry_perf,
+        'sectors': sectors_result
+    }
@@ -0,0 +1,20 @@
+import factory
+
+from .models import User
+
+DEFAULT_PASSWORD = 'password'
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+        django_get_or_create = ('username',)
+
+    username = factory.Sequence(lambda n: f'user{n}')
+    email = factory.LazyAttribute(lambda o: f'{o.username}@example.com')
+    first_name = factory.Faker('first_name')
+    last_name = factory.Faker('last_name')
+    role = User.Roles.ADVISOR
+    sector = None
+    department = None
+    password = factory.django.Password(DEFAULT_PASSWORD)
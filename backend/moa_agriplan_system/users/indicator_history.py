@@ -0,0 +1,164 @@
+"""
+Yearly and quarterly target/achievement series of indicators.
+
+``load_plans`` and ``load_performances`` fetch everything for any number of
+indicators and years in one query each; the ``*_series`` builders then work
+on plain rows. ``IndicatorDetailView`` uses them for one indicator, and
+``IndicatorDetailBatchView`` for many with the same number of queries.
+"""
+
+from plans.models import AnnualPlan, QuarterlyPerformance
+from .dashboards import APPROVED_PERFORMANCE_STATUSES
+
+QUARTERS = (1, 2, 3, 4)
+
+# Years of history returned when the caller does not pass ``years``.
+DEFAULT_YEARS = 4
+MAX_YEARS = 30
+
+# Indicators one batch request may ask for.
+MAX_BATCH_INDICATORS = 100
+
+
+def parse_year_count(value):
+    """``years`` query parameter: DEFAULT_YEARS when absent; ValueError
+    with a message for the client when invalid."""
+    if not value:
+        return DEFAULT_YEARS
+    try:
+        count = int(value)
+    except ValueError:
+        raise ValueError('invalid years')
+    if not 1 <= count <= MAX_YEARS:
+        raise ValueError(f'years must be between 1 and {MAX_YEARS}')
+    return count
+
+
+def year_range(last_year, count):
+    return list(range(last_year - count + 1, last_year + 1))
+
+
+def indicator_info(indicator):
+    """The ``indicator`` block of the detail responses; needs ``department``."""
+    return {
+        'id': indicator.id,
+        'name': indicator.name,
+        'unit': indicator.unit or '',
+        'description': indicator.description or '',
+        'department_name': indicator.department.name,
+        'kpi_characteristics': getattr(indicator, 'kpi_characteristics', '')
+    }
+
+
+def load_plans(indicator_ids, years):
+    """``{(indicator_id, year): plan row}``, each row with its quarterly
+    breakdown (``has_breakdown``, ``q1``..``q4``)."""
+    rows = AnnualPlan.objects.filter(indicator_id__in=indicator_ids, year__in=years).values(
+        'id',
+        'indicator_id',
+        'year',
+        'target',
+        'quarterly_breakdown__id',
+        'quarterly_breakdown__q1',
+        'quarterly_breakdown__q2',
+        'quarterly_breakdown__q3',
+        'quarterly_breakdown__q4',
+    )
+    plans = {}
+    for row in rows:
+        plans[(row['indicator_id'], row['year'])] = {
+            'id': row['id'],
+            'target': row['target'],
+            'has_breakdown': row['quarterly_breakdown__id'] is not None,
+            **{f'q{q}': row[f'quarterly_breakdown__q{q}'] for q in QUARTERS},
+        }
+    return plans
+
+
+def load_performances(indicator_ids, years):
+    """``{plan_id: {quarter: value}}`` of approved performances."""
+    rows = QuarterlyPerformance.objects.filter(
+        plan__indicator_id__in=indicator_ids,
+        plan__year__in=years,
+        status__in=APPROVED_PERFORMANCE_STATUSES,
+    ).order_by('plan_id', 'quarter').values_list('plan_id', 'quarter', 'value')
+    performances = {}
+    for plan_id, quarter, value in rows:
+        performances.setdefault(plan_id, {})[quarter] = value
+    return performances
+
+
+def _target(plan):
+    target = plan['target']
+    return float(target) if target and str(target).upper() != 'N/A' else 0
+
+
+def _value(value):
+    return float(value) if value is not None and str(value).upper() != 'N/A' else None
+
+
+def _capped_percentage(achieved, target):
+    if target <= 0 or achieved is None:
+        return None
+    return min(achieved / target * 100, 100.0)
+
+
+def yearly_series(indicator_id, is_incremental, years, plans, performances):
+    """Target, achievement and percentage per year; for incremental
+    indicators the year's achievement is its Q4 value."""
+    series = []
+    for year in years:
+        plan = plans.get((indicator_id, year))
+        if plan is None:
+            series.append({'year': year, 'target': 0, 'achieved': 0, 'percentage': None})
+            continue
+        target = _target(plan)
+        values = performances.get(plan['id'], {})
+        if is_incremental:
+            achieved = _value(values.get(4))
+            if achieved is None:
+                achieved = 0
+        else:
+            achieved = sum(v for v in map(_value, values.values()) if v is not None)
+        series.append({
+            'year': year,
+            'target': target,
+            'achieved': achieved,
+            'percentage': _capped_percentage(achieved, target),
+        })
+    return series
+
+
+def quarter_series(plan, performances):
+    """Target, achievement and percentage per quarter of one plan row (or
+    None). Without a breakdown each quarter's target is a quarter of the
+    annual one."""
+    if plan is None:
+        return [{'quarter': q, 'target': 0, 'achieved': None, 'percentage': None} for q in QUARTERS]
+    values = performances.get(plan['id'], {})
+    series = []
+    for q in QUARTERS:
+        if plan['has_breakdown']:
+            q_target = float(plan[f'q{q}'] or 0)
+        else:
+            q_target = _target(plan) / 4
+        q_achieved = _value(values.get(q))
+        series.append({
+            'quarter': q,
+            'target': q_target,
+            'achieved': q_achieved,
+            'percentage': _capped_percentage(q_achieved, q_target),
+        })
+    return series
+
+
+def indicator_detail(indicator, current_year, years, plans, performances):
+    """``IndicatorDetailView``'s body for one indicator from loaded rows;
+    ``plans`` and ``performances`` must cover ``years`` and the year before
+    ``current_year``."""
+    return {
+        'indicator': indicator_info(indicator),
+        'yearly_data': yearly_series(indicator.id, indicator.is_incremental, years, plans, performances),
+        'current_year_quarters': quarter_series(plans.get((indicator.id, current_year)), performances),
+        'last_year_quarters': quarter_series(plans.get((indicator.id, current_year - 1)), performances),
+    }
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import DashboardSnapshot
+from users.snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the minister dashboard, indicator-performance tree and each "
+        "sector's state-minister dashboard for every plan year and quarter_months, "
+        "for callers that accept stale data (Cache-Control: max-stale). Meant to "
+        "run nightly, e.g. from cron: 'python manage.py build_dashboard_snapshots'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, action="append", dest="years", help="Only this plan year; repeatable.")
+        parser.add_argument(
+            "--kind", action="append", dest="kinds", choices=DashboardSnapshot.Kinds.values,
+            help="Only this dashboard; repeatable.",
+        )
+
+    def handle(self, *args, **options):
+        started_at = timezone.now()
+        started = time.perf_counter()
+        built = failed = 0
+        size = compressed = 0
+        for snapshot, kind, year, quarter_months, sector_id in build_snapshots(options["years"], options["kinds"]):
+            label = f"{kind} {year}/{quarter_months or 'year'}" + (f" sector {sector_id}" if sector_id else "")
+            if snapshot is None:
+                failed += 1
+                self.stderr.write(f"{label}: failed")
+                continue
+            built += 1
+            size += snapshot.size
+            compressed += len(snapshot.data)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{label}: {snapshot.size} -> {len(snapshot.data)} bytes in {snapshot.build_seconds:.2f}s")
+
+        # A full rebuild drops snapshots of years and sectors that no longer exist.
+        pruned = 0
+        if not options["years"] and not options["kinds"]:
+            pruned, _ = DashboardSnapshot.objects.filter(built_at__lt=started_at).delete()
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(
+            f"Built {built} snapshots ({size / 1e6:.1f} MB, {compressed / 1e6:.1f} MB gzipped) "
+            f"in {time.perf_counter() - started:.1f}s; {failed} failed, {pruned} pruned."
+        ))
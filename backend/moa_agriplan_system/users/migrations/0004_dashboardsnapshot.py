@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_profile_picture_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('MINISTER', 'Minister dashboard'), ('INDICATOR_PERFORMANCE', 'Indicator performance'), ('STATE_MINISTER', 'State minister dashboard')], max_length=32)),
+                ('year', models.PositiveIntegerField()),
+                ('quarter_months', models.PositiveSmallIntegerField(default=0, help_text='0 for the full year.')),
+                ('sector_id', models.PositiveIntegerField(default=0, help_text='Sector of a state minister dashboard, else 0.')),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed size in bytes.')),
+                ('built_at', models.DateTimeField()),
+                ('build_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'year', 'quarter_months', 'sector_id'), name='unique_dashboard_snapshot')],
+            },
+        ),
+    ]
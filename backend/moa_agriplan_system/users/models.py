@@ -18,5 +18,37 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+
+class DashboardSnapshot(models.Model):
+    """A dashboard response precomputed by ``build_dashboard_snapshots``.
+
+    ``data`` is the rendered JSON body, gzip-compressed.
+    """
+
+    class Kinds(models.TextChoices):
+        MINISTER = 'MINISTER', 'Minister dashboard'
+        INDICATOR_PERFORMANCE = 'INDICATOR_PERFORMANCE', 'Indicator performance'
+        STATE_MINISTER = 'STATE_MINISTER', 'State minister dashboard'
+
+    kind = models.CharField(max_length=32, choices=Kinds.choices)
+    year = models.PositiveIntegerField()
+    quarter_months = models.PositiveSmallIntegerField(default=0, help_text='0 for the full year.')
+    sector_id = models.PositiveIntegerField(default=0, help_text='Sector of a state minister dashboard, else 0.')
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(help_text='Uncompressed size in bytes.')
+    built_at = models.DateTimeField()
+    build_seconds = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'year', 'quarter_months', 'sector_id'],
+                name='unique_dashboard_snapshot',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.year}/{self.quarter_months or 'year'} ({self.built_at:%Y-%m-%d %H:%M})"
+
 # Create your models here.
 
@@ -0,0 +1,111 @@
+"""
+Per-request role scope.
+
+Viewsets and dashboards used to repeat
+``getattr(getattr(user, 'department', None), 'id', None) or ...`` to find the
+caller's sector and department, which loads the related
+``Department``/``StateMinisterSector`` rows (once per access when the user
+comes from the token cache). ``get_scope(request)`` resolves role and ids
+once from the user's foreign key columns and attaches the result to the
+request, so every filter in the request is built from plain ids.
+"""
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class RoleScope:
+    def __init__(self, user):
+        self.user_id = getattr(user, 'pk', None)
+        self.is_authenticated = bool(user and user.is_authenticated)
+        self.is_superuser = bool(getattr(user, 'is_superuser', False))
+        self.role = (getattr(user, 'role', '') or '').upper()
+        self.sector_id = getattr(user, 'sector_id', None)
+        self.department_id = getattr(user, 'department_id', None)
+
+    def __repr__(self):
+        return (
+            f'<RoleScope user={self.user_id} role={self.role} '
+            f'sector={self.sector_id} department={self.department_id}>'
+        )
+
+    # Role predicates
+
+    @property
+    def is_state_minister(self):
+        return self.role == 'STATE_MINISTER'
+
+    @property
+    def is_advisor(self):
+        return self.role == 'ADVISOR'
+
+    @property
+    def is_strategic_staff(self):
+        return self.role == 'STRATEGIC_STAFF'
+
+    @property
+    def is_executive(self):
+        return self.role == 'EXECUTIVE'
+
+    @property
+    def is_lead_executive_body(self):
+        return self.role == 'LEAD_EXECUTIVE_BODY'
+
+    @property
+    def is_minister_view(self):
+        return self.role == 'MINISTER_VIEW'
+
+    # Derived scope
+
+    @cached_property
+    def department_sector_id(self):
+        """Sector of the user's department, falling back to the user's sector.
+
+        Only needed for advisors, whose visible sector follows their
+        department; costs one ``values_list`` query the first time.
+        """
+        if self.department_id:
+            from indicators.models import Department
+            sector_id = (
+                Department.objects.filter(id=self.department_id)
+                .values_list('sector_id', flat=True)
+                .first()
+            )
+            if sector_id:
+                return sector_id
+        return self.sector_id
+
+    def owns_department(self, department_id):
+        """True unless the user is tied to a different department."""
+        return not self.department_id or department_id == self.department_id
+
+    def department_q(self, prefix=''):
+        """Q restricting ``<prefix>department`` to the user's department."""
+        return Q(**{f'{prefix}department_id': self.department_id})
+
+    def sector_q(self, prefix=''):
+        """Q restricting ``<prefix>department__sector`` to the user's sector."""
+        return Q(**{f'{prefix}department__sector_id': self.sector_id})
+
+    def department_or_sector_q(self, prefix=''):
+        """Department filter if the user has one, else sector, else no filter."""
+        if self.department_id:
+            return self.department_q(prefix)
+        if self.sector_id:
+            return self.sector_q(prefix)
+        return Q()
+
+
+def get_scope(request):
+    """Return the RoleScope for ``request``, resolving it at most once.
+
+    Works with both DRF ``Request`` objects and plain ``HttpRequest``; the
+    scope is stored on the underlying ``HttpRequest``.
+    """
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    scope = getattr(http_request, 'role_scope', None)
+    if scope is None or scope.user_id != getattr(user, 'pk', None):
+        scope = RoleScope(user)
+        http_request.role_scope = scope
+    return scope
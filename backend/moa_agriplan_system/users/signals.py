@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def auth_identity_changed(sender, instance, **kwargs):
+    # Covers logout (token deleted), profile/admin updates, password changes
+    # and deactivation: all of them save the user or token row.
+    transaction.on_commit(invalidate_token_cache)
@@ -0,0 +1,162 @@
+"""
+Precomputed dashboard snapshots.
+
+``manage.py build_dashboard_snapshots`` (run nightly, or queued as the
+``users.build_dashboard_snapshots`` job) renders the minister dashboard, the
+indicator-performance tree and every sector's state-minister dashboard for
+each plan year and quarter_months, and stores the JSON bodies gzip-compressed
+in ``DashboardSnapshot``.
+
+Those dashboards mostly show approved data that changes a few times a day,
+so a caller that can live with data a few hours old may ask for a snapshot
+with ``Cache-Control: max-stale[=<seconds>]`` or ``?max_stale=[<seconds>]``.
+Served snapshots carry an ``Age`` header and ``X-Data-Snapshot`` with the
+build time; without a usable snapshot the view computes live as usual.
+"""
+
+import gzip
+import logging
+import math
+import time
+
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from rest_framework.settings import api_settings
+
+from indicators.dashboards import build_state_minister_dashboard
+from indicators.models import StateMinisterSector
+from moa_agriplan_system.compression import GZIP, attach_precompressed, choose_encoding
+from plans.models import AnnualPlan
+from .dashboards import MINISTER_DASHBOARD_LOADERS, build_indicator_performance, build_minister_dashboard
+from .models import DashboardSnapshot
+
+logger = logging.getLogger(__name__)
+
+Kinds = DashboardSnapshot.Kinds
+
+# None is the full year, stored as 0.
+QUARTER_MONTH_OPTIONS = (None, 3, 6, 9, 12)
+
+SNAPSHOT_HEADER = 'X-Data-Snapshot'
+
+
+def _max_stale_value(value):
+    """Seconds from a ``max-stale`` value; no value means any age."""
+    value = (value or '').strip().strip('"')
+    if not value:
+        return math.inf
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def accepted_staleness(request):
+    """How old (in seconds) a snapshot the caller accepts may be, or None
+    when it wants live data."""
+    param = request.GET.get('max_stale')
+    if param is not None:
+        return _max_stale_value(param)
+    for directive in request.META.get('HTTP_CACHE_CONTROL', '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name.strip().lower() == 'max-stale':
+            return _max_stale_value(value)
+    return None
+
+
+def _renderer():
+    return api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+
+def render_body(data):
+    """The response body the API renders for ``data``."""
+    renderer = _renderer()
+    return renderer.render(data, renderer.media_type, {})
+
+
+def rendered_response(body):
+    """An HttpResponse for a body from ``render_body``."""
+    return HttpResponse(body, content_type=_renderer().media_type)
+
+
+def store(kind, year, quarter_months, data, sector_id=0, build_seconds=0.0):
+    body = render_body(data)
+    snapshot, _ = DashboardSnapshot.objects.update_or_create(
+        kind=kind, year=year, quarter_months=quarter_months or 0, sector_id=sector_id,
+        defaults={
+            'data': gzip.compress(body, mtime=0),
+            'size': len(body),
+            'built_at': timezone.now(),
+            'build_seconds': build_seconds,
+        },
+    )
+    return snapshot
+
+
+def snapshot_response(request, kind, year, quarter_months, sector_id=0):
+    """A response serving the stored snapshot, or None if the caller wants
+    live data or there is no snapshot young enough."""
+    max_stale = accepted_staleness(request)
+    if max_stale is None or not year:
+        return None
+    try:
+        sector_id = int(sector_id)
+    except (TypeError, ValueError):
+        return None
+    snapshot = DashboardSnapshot.objects.filter(
+        kind=kind, year=year, quarter_months=quarter_months or 0, sector_id=sector_id,
+    ).only('data', 'size', 'built_at').first()
+    if snapshot is None:
+        return None
+    age = (timezone.now() - snapshot.built_at).total_seconds()
+    if age > max_stale:
+        return None
+
+    compressed = bytes(snapshot.data)
+    response = rendered_response(gzip.decompress(compressed))
+    response['Age'] = str(int(age))
+    response[SNAPSHOT_HEADER] = snapshot.built_at.isoformat()
+    patch_vary_headers(response, ('Cache-Control',))
+    # Hand the stored gzip bytes to CompressionMiddleware when it would pick gzip.
+    if len(compressed) < snapshot.size and choose_encoding(request) == GZIP:
+        attach_precompressed(response, {GZIP: compressed})
+    return response
+
+
+def build_snapshots(years=None, kinds=None):
+    """Rebuild snapshots; yields ``(snapshot or None, kind, year, quarter_months,
+    sector_id)`` per entry, None when building it failed."""
+    if years is None:
+        years = sorted(AnnualPlan.objects.values_list('year', flat=True).distinct())
+    kinds = kinds or Kinds.values
+    sector_ids = list(StateMinisterSector.objects.order_by('id').values_list('id', flat=True))
+
+    for year in years:
+        minister_rows = None
+        if Kinds.MINISTER in kinds:
+            minister_rows = [load(year) for load in MINISTER_DASHBOARD_LOADERS]
+        for quarter_months in QUARTER_MONTH_OPTIONS:
+            builders = []
+            if Kinds.MINISTER in kinds:
+                builders.append((Kinds.MINISTER, 0, lambda: build_minister_dashboard(quarter_months, *minister_rows)))
+            if Kinds.INDICATOR_PERFORMANCE in kinds:
+                builders.append((Kinds.INDICATOR_PERFORMANCE, 0, lambda: build_indicator_performance(year, quarter_months)))
+            if Kinds.STATE_MINISTER in kinds:
+                for sector_id in sector_ids:
+                    builders.append((
+                        Kinds.STATE_MINISTER, sector_id,
+                        lambda sector_id=sector_id: build_state_minister_dashboard(sector_id, year, quarter_months),
+                    ))
+            for kind, sector_id, build in builders:
+                started = time.perf_counter()
+                try:
+                    data = build()
+                except Exception:
+                    logger.exception(
+                        'Building %s snapshot for %s/%s (sector %s) failed', kind, year, quarter_months, sector_id,
+                    )
+                    yield None, kind, year, quarter_months, sector_id
+                    continue
+                snapshot = store(kind, year, quarter_months, data, sector_id, time.perf_counter() - started)
+                yield snapshot, kind, year, quarter_months, sector_id
@@ -0,0 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from jobs.registry import task
+
+
+@task('users.build_dashboard_snapshots', max_attempts=2, api=True)
+def build_dashboard_snapshots(job, years=None, kinds=None):
+    """Rebuild dashboard snapshots in the background."""
+    out = StringIO()
+    call_command('build_dashboard_snapshots', years=years, kinds=kinds, stdout=out, stderr=out)
+    return {'output': out.getvalue().strip()}
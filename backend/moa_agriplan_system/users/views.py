@@ -1,15 +1,28 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import viewsets, permissions
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.authtoken.models import Token
 from django.db.models import Sum, Count
-from django.utils import timezone
-from .models import User
+from .models import User, DashboardSnapshot
+from .snapshots import render_body, rendered_response, snapshot_response
 from .serializers import UserSerializer, ProfileSerializer
-from indicators.models import Indicator, StateMinisterSector, Department, IndicatorGroup
-from plans.models import AnnualPlan, QuarterlyBreakdown, QuarterlyPerformance, PlanStatus, PerformanceStatus
+from moa_agriplan_system.async_api import authorize, gather_queries, render as render_api
+from moa_agriplan_system.single_flight import SingleFlight
+from . import indicator_history
+from .dashboards import (
+    EMPTY_MINISTER_DASHBOARD,
+    MINISTER_DASHBOARD_LOADERS,
+    build_indicator_performance,
+    build_minister_dashboard,
+    latest_plan_year,
+)
+from indicators.models import Indicator, StateMinisterSector, Department
+from plans.models import AnnualPlan, QuarterlyBreakdown, QuarterlyPerformance
 
 
 class IsSuperAdmin(permissions.BasePermission):
@@ -60,6 +73,20 @@ class ChangePasswordView(APIView):
         return Response({'detail': 'Password changed successfully.'})
 
 
+class LogoutView(APIView):
+    """Revoke the caller's API token.
+
+    Deleting the token also evicts it from the token authentication cache
+    in every worker (see users.signals).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if isinstance(request.auth, Token):
+            Token.objects.filter(key=request.auth.key).delete()
+        return Response({'detail': 'Logged out.'})
+
+
 class AdminTargetsBySectorView(APIView):
     permission_classes = [IsAuthenticated, IsSuperAdmin]
 
@@ -307,402 +334,55 @@ class MinisterDashboardView(APIView):
 
         # If no year provided, use the most recent year with data
         if not year:
-            latest_plan = AnnualPlan.objects.order_by('-year').first()
-            if latest_plan:
-                year = latest_plan.year
-            else:
+            year = latest_plan_year()
+            if not year:
                 # No data at all, return empty response
-                return Response({
-                    'kpis': {
-                        'total_annual_target': 0,
-                        'total_achieved_performance': 0,
-                        'achievement_percentage': 0,
-                        'indicators_on_track': 0,
-                        'indicators_lagging': 0,
-                    },
-                    'sector_comparison': [],
-                    'quarterly_trend': [
-                        {'quarter': 'Q1', 'planned': 0, 'actual': 0},
-                        {'quarter': 'Q2', 'planned': 0, 'actual': 0},
-                        {'quarter': 'Q3', 'planned': 0, 'actual': 0},
-                        {'quarter': 'Q4', 'planned': 0, 'actual': 0},
-                    ],
-                    'approval_status': {'approved': 0, 'pending': 0, 'rejected': 0},
-                    'approval_stages': {
-                        'draft': 0, 'submitted': 0, 'approved': 0,
-                        'validated': 0, 'final_approved': 0, 'rejected': 0,
-                    },
-                    'sector_summaries': [],
-                    'indicators_at_risk': [],
-                    'late_or_rejected': [],
-                })
+                return Response(EMPTY_MINISTER_DASHBOARD)
 
-        # Get all plans (Minister can see all) - filter by year
-        plans_qs = AnnualPlan.objects.select_related(
-            'indicator__department__sector'
-        ).filter(year=year)
-
-        # Get breakdowns and performances (only approved or higher) - filter by year
-        breakdowns_qs = QuarterlyBreakdown.objects.select_related(
-            'plan__indicator__department__sector'
-        ).filter(
-            plan__year=year,
-            status__in=[PlanStatus.APPROVED, PlanStatus.VALIDATED, PlanStatus.FINAL_APPROVED]
-        )
+        snapshot = snapshot_response(request, DashboardSnapshot.Kinds.MINISTER, year, quarter_months)
+        if snapshot is not None:
+            return snapshot
 
-        perfs_qs = QuarterlyPerformance.objects.select_related(
-            'plan__indicator__department__sector'
-        ).filter(
-            plan__year=year,
-            status__in=[PerformanceStatus.APPROVED, PerformanceStatus.VALIDATED, PerformanceStatus.FINAL_APPROVED]
-        )
+        rows = [load(year) for load in MINISTER_DASHBOARD_LOADERS]
+        return Response(build_minister_dashboard(quarter_months, *rows))
 
-        # 1. KPI Cards
-        total_annual_target = sum(float(p.target) for p in plans_qs)
-        
-        # Total achieved performance (sum of quarterly performances, filtered by quarter_months)
-        if quarter_months:
-            quarter_months_map = {1: 3, 2: 6, 3: 9, 4: 12}
-            filtered_perfs = [
-                p for p in perfs_qs 
-                if quarter_months_map[p.quarter] <= quarter_months
-            ]
-        else:
-            # For full year: exclude Q1-Q3 for incremental indicators (Q4 already has cumulative)
-            filtered_perfs = [
-                p for p in perfs_qs
-                if not p.plan.indicator.is_incremental or p.quarter == 4
-            ]
-        
-        total_achieved = sum(float(p.value) for p in filtered_perfs if p.value is not None)
-        
-        # Calculate target based on quarterly breakdowns for the specified period
-        target_for_percentage = total_annual_target
-        if quarter_months:
-            # Get actual quarterly targets from breakdowns
-            quarterly_target_totals = {'Q1': 0, 'Q2': 0, 'Q3': 0, 'Q4': 0}
-            for bd in breakdowns_qs:
-                quarterly_target_totals['Q1'] += float(bd.q1 or 0)
-                quarterly_target_totals['Q2'] += float(bd.q2 or 0)
-                quarterly_target_totals['Q3'] += float(bd.q3 or 0)
-                quarterly_target_totals['Q4'] += float(bd.q4 or 0)
-            
-            # Sum targets for the specified months
-            if quarter_months == 3:
-                target_for_percentage = quarterly_target_totals['Q1']
-            elif quarter_months == 6:
-                target_for_percentage = quarterly_target_totals['Q1'] + quarterly_target_totals['Q2']
-            elif quarter_months == 9:
-                target_for_percentage = quarterly_target_totals['Q1'] + quarterly_target_totals['Q2'] + quarterly_target_totals['Q3']
-            # If quarter_months is 12 or None, use total annual target
-        
-        achievement_percentage = (total_achieved / target_for_percentage * 100) if target_for_percentage > 0 else 0
-
-        # Indicators on track vs lagging (using same quarter filtering)
-        indicator_performance = {}
-        for perf in filtered_perfs:
-            plan_id = perf.plan_id
-            if plan_id not in indicator_performance:
-                try:
-                    plan = plans_qs.get(id=plan_id)
-                    indicator_performance[plan_id] = {
-                        'target': float(plan.target),
-                        'achieved': 0,
-                        'indicator_name': plan.indicator.name,
-                    }
-                except AnnualPlan.DoesNotExist:
-                    continue
-            indicator_performance[plan_id]['achieved'] += float(perf.value) if perf.value is not None else 0
-
-        # Apply quarterly targets for quarter filtering
-        if quarter_months:
-            for plan_id in indicator_performance:
-                # Get quarterly breakdown for this plan
-                try:
-                    breakdown = breakdowns_qs.get(plan_id=plan_id)
-                    quarterly_target = 0
-                    if quarter_months == 3:
-                        quarterly_target = float(breakdown.q1 or 0)
-                    elif quarter_months == 6:
-                        quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0)
-                    elif quarter_months == 9:
-                        quarterly_target = float(breakdown.q1 or 0) + float(breakdown.q2 or 0) + float(breakdown.q3 or 0)
-                    indicator_performance[plan_id]['target'] = quarterly_target
-                except QuarterlyBreakdown.DoesNotExist:
-                    # Fallback to proportional if no breakdown exists
-                    indicator_performance[plan_id]['target'] = (indicator_performance[plan_id]['target'] * quarter_months) / 12
-
-        on_track = 0
-        lagging = 0
-        for perf_data in indicator_performance.values():
-            progress_pct = (perf_data['achieved'] / perf_data['target'] * 100) if perf_data['target'] > 0 else 0
-            if progress_pct >= 75:
-                on_track += 1
-            else:
-                lagging += 1
-
-        # 2. Sector-wise performance comparison
-        sector_data = {}
-        for plan in plans_qs:
-            sector_id = plan.indicator.department.sector.id
-            sector_name = plan.indicator.department.sector.name
-            if sector_id not in sector_data:
-                sector_data[sector_id] = {
-                    'sector_id': sector_id,
-                    'sector_name': sector_name,
-                    'target': 0,
-                    'achieved': 0,
-                }
-            sector_data[sector_id]['target'] += float(plan.target)
-
-        # Apply quarterly targets for sector filtering
-        if quarter_months:
-            for sector_id in sector_data:
-                # Get all plans for this sector
-                sector_plans = plans_qs.filter(indicator__department__sector_id=sector_id)
-                sector_quarterly_target = 0
-                
-                for plan in sector_plans:
-                    try:
-                        breakdown = breakdowns_qs.get(plan_id=plan.id)
-                        if quarter_months == 3:
-                            sector_quarterly_target += float(breakdown.q1 or 0)
-                        elif quarter_months == 6:
-                            sector_quarterly_target += float(breakdown.q1 or 0) + float(breakdown.q2 or 0)
-                        elif quarter_months == 9:
-                            sector_quarterly_target += float(breakdown.q1 or 0) + float(breakdown.q2 or 0) + float(breakdown.q3 or 0)
-                    except QuarterlyBreakdown.DoesNotExist:
-                        # Fallback to proportional if no breakdown exists
-                        sector_quarterly_target += (float(plan.target) * quarter_months) / 12
-                
-                sector_data[sector_id]['target'] = sector_quarterly_target
-
-        for perf in filtered_perfs:
-            try:
-                plan = plans_qs.get(id=perf.plan_id)
-                sector_id = plan.indicator.department.sector.id
-                if sector_id in sector_data:
-                    sector_data[sector_id]['achieved'] += float(perf.value) if perf.value is not None else 0
-            except AnnualPlan.DoesNotExist:
-                continue
-
-        sector_comparison = list(sector_data.values())
-
-        # 3. Quarterly trend data
-        quarterly_planned = {'Q1': 0, 'Q2': 0, 'Q3': 0, 'Q4': 0}
-        quarterly_actual = {'Q1': 0, 'Q2': 0, 'Q3': 0, 'Q4': 0}
-
-        for bd in breakdowns_qs:
-            quarterly_planned['Q1'] += float(bd.q1 or 0)
-            quarterly_planned['Q2'] += float(bd.q2 or 0)
-            quarterly_planned['Q3'] += float(bd.q3 or 0)
-            quarterly_planned['Q4'] += float(bd.q4 or 0)
-
-        # Use filtered performances for quarterly actuals
-        for perf in filtered_perfs:
-            q_key = f'Q{perf.quarter}'
-            if q_key in quarterly_actual:
-                quarterly_actual[q_key] += float(perf.value) if perf.value is not None else 0
-
-        quarterly_trend = [
-            {'quarter': 'Q1', 'planned': quarterly_planned['Q1'], 'actual': quarterly_actual['Q1']},
-            {'quarter': 'Q2', 'planned': quarterly_planned['Q2'], 'actual': quarterly_actual['Q2']},
-            {'quarter': 'Q3', 'planned': quarterly_planned['Q3'], 'actual': quarterly_actual['Q3']},
-            {'quarter': 'Q4', 'planned': quarterly_planned['Q4'], 'actual': quarterly_actual['Q4']},
-        ]
 
-        # 4. Approval status (for all breakdowns and performances, not just approved) - filter by year
-        all_breakdowns = QuarterlyBreakdown.objects.select_related(
-            'plan__indicator__department__sector'
-        ).filter(plan__year=year)
-        all_perfs = QuarterlyPerformance.objects.select_related(
-            'plan__indicator__department__sector'
-        ).filter(plan__year=year)
-
-        approved_count = 0
-        pending_count = 0
-        rejected_count = 0
-
-        for bd in all_breakdowns:
-            status = bd.status.upper()
-            if status == 'FINAL_APPROVED':
-                approved_count += 1
-            elif status == 'REJECTED':
-                rejected_count += 1
-            else:
-                pending_count += 1
-
-        for perf in all_perfs:
-            status = perf.status.upper()
-            if status == 'FINAL_APPROVED':
-                approved_count += 1
-            elif status == 'REJECTED':
-                rejected_count += 1
-            else:
-                pending_count += 1
+async def minister_dashboard_async(request):
+    """``MinisterDashboardView`` with its independent queries run concurrently."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    drf_request, denied = await authorize(request, MinisterDashboardView.permission_classes)
+    if denied is not None:
+        return denied
 
-        approval_status = {
-            'approved': approved_count,
-            'pending': pending_count,
-            'rejected': rejected_count,
-        }
+    year = drf_request.query_params.get('year')
+    quarter_months = drf_request.query_params.get('quarter_months')
+    if year:
+        try:
+            year = int(year)
+        except ValueError:
+            year = None
+    if quarter_months:
+        try:
+            quarter_months = int(quarter_months)
+        except ValueError:
+            quarter_months = None
 
-        # Approval stage breakdown
-        stage_counts = {
-            'draft': 0,
-            'submitted': 0,
-            'approved': 0,
-            'validated': 0,
-            'final_approved': 0,
-            'rejected': 0,
-        }
+    if not year:
+        year = await sync_to_async(latest_plan_year)()
+        if not year:
+            return render_api(EMPTY_MINISTER_DASHBOARD)
 
-        for bd in all_breakdowns:
-            status_lower = bd.status.lower()
-            if status_lower in stage_counts:
-                stage_counts[status_lower] += 1
-
-        for perf in all_perfs:
-            status_lower = perf.status.lower()
-            if status_lower in stage_counts:
-                stage_counts[status_lower] += 1
-
-        # 5. Sector summary cards
-        sector_summaries = []
-        for sector_id, data in sector_data.items():
-            progress_rate = (data['achieved'] / data['target'] * 100) if data['target'] > 0 else 0
-            sector_summaries.append({
-                'sector_id': sector_id,
-                'sector_name': data['sector_name'],
-                'annual_target': data['target'],
-                'performance_achieved': data['achieved'],
-                'progress_rate': progress_rate,
-            })
-        sector_summaries.sort(key=lambda x: x['sector_name'])
-
-        # 6. Indicators at Risk
-        indicators_at_risk = []
-        for plan_id, perf_data in indicator_performance.items():
-            try:
-                plan = plans_qs.get(id=plan_id)
-                progress_pct = (perf_data['achieved'] / perf_data['target'] * 100) if perf_data['target'] > 0 else 0
-                gap = perf_data['target'] - perf_data['achieved']
-                
-                # Determine risk level
-                if progress_pct < 50:
-                    risk_level = 'HIGH'
-                elif progress_pct < 75:
-                    risk_level = 'MEDIUM'
-                else:
-                    risk_level = 'LOW'
-
-                # Only include if lagging
-                if progress_pct < 75:
-                    indicators_at_risk.append({
-                        'indicator_name': perf_data['indicator_name'],
-                        'sector_name': plan.indicator.department.sector.name,
-                        'department_name': plan.indicator.department.name,
-                        'target': perf_data['target'],
-                        'achieved': perf_data['achieved'],
-                        'gap': gap,
-                        'progress_pct': progress_pct,
-                        'risk_level': risk_level,
-                    })
-            except AnnualPlan.DoesNotExist:
-                continue
-
-        indicators_at_risk.sort(key=lambda x: x['progress_pct'])
-
-        # 7. Late or rejected submissions
-        late_or_rejected = []
-        now = timezone.now()
-        
-        for bd in all_breakdowns:
-            if bd.status == 'REJECTED':
-                try:
-                    plan = plans_qs.get(id=bd.plan_id)
-                    late_or_rejected.append({
-                        'type': 'BREAKDOWN',
-                        'indicator_name': plan.indicator.name,
-                        'sector_name': plan.indicator.department.sector.name,
-                        'department_name': plan.indicator.department.name,
-                        'status': 'REJECTED',
-                        'submitted_at': bd.submitted_at.isoformat() if bd.submitted_at else None,
-                        'reviewed_at': bd.reviewed_at.isoformat() if bd.reviewed_at else None,
-                        'comment': bd.review_comment or '',
-                    })
-                except AnnualPlan.DoesNotExist:
-                    continue
-            elif bd.status == 'SUBMITTED' and bd.submitted_at:
-                days_since_submission = (now - bd.submitted_at).days
-                if days_since_submission > 30:
-                    try:
-                        plan = plans_qs.get(id=bd.plan_id)
-                        late_or_rejected.append({
-                            'type': 'BREAKDOWN',
-                            'indicator_name': plan.indicator.name,
-                            'sector_name': plan.indicator.department.sector.name,
-                            'department_name': plan.indicator.department.name,
-                            'status': 'LATE',
-                            'submitted_at': bd.submitted_at.isoformat(),
-                            'days_late': days_since_submission - 30,
-                            'comment': '',
-                        })
-                    except AnnualPlan.DoesNotExist:
-                        continue
-
-        for perf in all_perfs:
-            if perf.status == 'REJECTED':
-                try:
-                    plan = plans_qs.get(id=perf.plan_id)
-                    late_or_rejected.append({
-                        'type': 'PERFORMANCE',
-                        'indicator_name': plan.indicator.name,
-                        'sector_name': plan.indicator.department.sector.name,
-                        'department_name': plan.indicator.department.name,
-                        'quarter': perf.quarter,
-                        'status': 'REJECTED',
-                        'submitted_at': perf.submitted_at.isoformat() if perf.submitted_at else None,
-                        'reviewed_at': perf.reviewed_at.isoformat() if perf.reviewed_at else None,
-                        'comment': perf.review_comment or '',
-                    })
-                except AnnualPlan.DoesNotExist:
-                    continue
-            elif perf.status == 'SUBMITTED' and perf.submitted_at:
-                days_since_submission = (now - perf.submitted_at).days
-                if days_since_submission > 30:
-                    try:
-                        plan = plans_qs.get(id=perf.plan_id)
-                        late_or_rejected.append({
-                            'type': 'PERFORMANCE',
-                            'indicator_name': plan.indicator.name,
-                            'sector_name': plan.indicator.department.sector.name,
-                            'department_name': plan.indicator.department.name,
-                            'quarter': perf.quarter,
-                            'status': 'LATE',
-                            'submitted_at': perf.submitted_at.isoformat(),
-                            'days_late': days_since_submission - 30,
-                            'comment': '',
-                        })
-                    except AnnualPlan.DoesNotExist:
-                        continue
+    snapshot = await sync_to_async(snapshot_response)(request, DashboardSnapshot.Kinds.MINISTER, year, quarter_months)
+    if snapshot is not None:
+        return snapshot
+
+    rows = await gather_queries(*((load, year) for load in MINISTER_DASHBOARD_LOADERS))
+    return render_api(build_minister_dashboard(quarter_months, *rows))
 
-        return Response({
-            'kpis': {
-                'total_annual_target': total_annual_target,
-                'total_achieved_performance': total_achieved,
-                'achievement_percentage': achievement_percentage,
-                'indicators_on_track': on_track,
-                'indicators_lagging': lagging,
-            },
-            'sector_comparison': sector_comparison,
-            'quarterly_trend': quarterly_trend,
-            'approval_status': approval_status,
-            'approval_stages': stage_counts,
-            'sector_summaries': sector_summaries,
-            'indicators_at_risk': indicators_at_risk[:20],
-            'late_or_rejected': late_or_rejected[:50],
-        })
+
+# Concurrent requests for the same (year, quarter_months) share one computation.
+indicator_performance_flight = SingleFlight('indicator_performance')
 
 
 class IndicatorPerformanceView(APIView):
@@ -731,210 +411,27 @@ class IndicatorPerformanceView(APIView):
             else:
                 return Response({'ministry_performance': None, 'sectors': []})
 
-        plans_qs = AnnualPlan.objects.select_related(
-            'indicator__department__sector'
-        ).prefetch_related(
-            'indicator__groups'
-        ).filter(year=year)
-
-        perfs_qs = QuarterlyPerformance.objects.select_related(
-            'plan__indicator__department__sector'
-        ).filter(
-            plan__year=year,
-            status__in=[PerformanceStatus.APPROVED, PerformanceStatus.VALIDATED, PerformanceStatus.FINAL_APPROVED]
-        )
+        snapshot = snapshot_response(request, DashboardSnapshot.Kinds.INDICATOR_PERFORMANCE, year, quarter_months)
+        if snapshot is not None:
+            return snapshot
 
-        breakdowns_qs = QuarterlyBreakdown.objects.select_related(
-            'plan__indicator__department__sector'
-        ).filter(
-            plan__year=year,
-            status__in=[PlanStatus.APPROVED, PlanStatus.VALIDATED, PlanStatus.FINAL_APPROVED]
+        body = indicator_performance_flight.do(
+            f'{year}:{quarter_months or 0}',
+            lambda: render_body(build_indicator_performance(year, quarter_months)),
+            shared=True,
         )
-
-        # Build data structure
-        sectors_dict = {}
-        
-        for plan in plans_qs:
-            sector = plan.indicator.department.sector
-            dept = plan.indicator.department
-            
-            if sector.id not in sectors_dict:
-                sectors_dict[sector.id] = {
-                    'id': sector.id,
-                    'name': sector.name,
-                    'departments': {}
-                }
-                
-            if dept.id not in sectors_dict[sector.id]['departments']:
-                sectors_dict[sector.id]['departments'][dept.id] = {
-                    'id': dept.id,
-                    'name': dept.name,
-                    'indicators': [],
-                }
-                
-            indicator_perfs = perfs_qs.filter(plan_id=plan.id)
-            
-            if quarter_months:
-                quarter_months_map = {1: 3, 2: 6, 3: 9, 4: 12}
-                filtered_perfs = [p for p in indicator_perfs if quarter_months_map.get(p.quarter, 12) <= quarter_months]
-            else:
-                # For full year: incremental indicators use Q4 only
-                if plan.indicator.is_incremental:
-                    filtered_perfs = [p for p in indicator_perfs if p.quarter == 4]
-                else:
-                    filtered_perfs = indicator_perfs
-                
-            is_na_target = (plan.target is None or plan.target == '' or plan.target == 'N/A')
-            target = 0
-            if not is_na_target:
-                try:
-                    target = float(plan.target)
-                    if quarter_months:
-                        try:
-                            breakdown = breakdowns_qs.get(plan_id=plan.id)
-                            qt = 0
-                            if quarter_months >= 3: qt += float(breakdown.q1 or 0)
-                            if quarter_months >= 6: qt += float(breakdown.q2 or 0)
-                            if quarter_months >= 9: qt += float(breakdown.q3 or 0)
-                            if quarter_months >= 12: qt += float(breakdown.q4 or 0)
-                            target = qt
-                        except QuarterlyBreakdown.DoesNotExist:
-                            target = (target * quarter_months) / 12
-                except (ValueError, TypeError):
-                    is_na_target = True
-                    target = 0
-                    
-            all_performances_na = all(p.value is None or p.value == '' or str(p.value).upper() == 'N/A' for p in filtered_perfs)
-            total_achieved = sum(float(p.value) for p in filtered_perfs if p.value is not None and p.value != '' and str(p.value).upper() != 'N/A')
-            
-            if is_na_target or all_performances_na or target <= 0:
-                performance_pct = None
-            else:
-                performance_pct = (total_achieved / target) * 100
-                if performance_pct > 100:
-                    performance_pct = 100.0
-                    
-            groups = plan.indicator.groups.all()
-            group_id = groups.first().id if groups.exists() else None
-            group_name = groups.first().name if groups.exists() else None
-            
-            sectors_dict[sector.id]['departments'][dept.id]['indicators'].append({
-                'id': plan.indicator.id,
-                'plan_id': plan.id,
-                'name': plan.indicator.name,
-                'unit': plan.indicator.unit,
-                'description': plan.indicator.description,
-                'is_aggregatable': plan.indicator.is_aggregatable,
-                'target': 0 if is_na_target else target,
-                'achieved': 0 if all_performances_na else total_achieved,
-                'performance_percentage': performance_pct,
-                'group_id': group_id,
-                'group_name': group_name
-            })
-
-        # Calculate percentages
-        sectors_result = []
-        for s_id, s_data in sectors_dict.items():
-            depts_result = []
-            for d_id, d_data in s_data['departments'].items():
-                
-                # Department percent: average of all aggregatable indicators
-                agg_ind_pcts = [
-                    ind['performance_percentage'] 
-                    for ind in d_data['indicators'] 
-                    if ind.get('is_aggregatable', True) and ind['performance_percentage'] is not None
-                ]
-                dept_perf = sum(agg_ind_pcts) / len(agg_ind_pcts) if agg_ind_pcts else None
-                
-                # Group indicators by group
-                groups_dict = {}
-                ungrouped = []
-                for ind in d_data['indicators']:
-                    if ind['group_id']:
-                        if ind['group_id'] not in groups_dict:
-                            groups_dict[ind['group_id']] = {
-                                'id': ind['group_id'],
-                                'name': ind['group_name'],
-                                'indicators': []
-                            }
-                        groups_dict[ind['group_id']]['indicators'].append(ind)
-                    else:
-                        ungrouped.append(ind)
-                        
-                groups_result = []
-                for g_id, g_data in groups_dict.items():
-                    # Group percent: average of aggregatable indicators only
-                    # Skip label groups - they don't participate in calculations
-                    g_agg_pcts = [
-                        ind['performance_percentage']
-                        for ind in g_data['indicators']
-                        if ind.get('is_aggregatable', True) and ind['performance_percentage'] is not None
-                    ]
-                    g_perf = sum(g_agg_pcts) / len(g_agg_pcts) if g_agg_pcts else None
-                    
-                    # Check if this is a label group by querying the database
-                    try:
-                        group_obj = IndicatorGroup.objects.get(id=g_id)
-                        is_label_group = group_obj.is_label
-                    except IndicatorGroup.DoesNotExist:
-                        is_label_group = False
-                    
-                    # Label groups get None performance percentage
-                    if is_label_group:
-                        g_perf = None
-                    
-                    groups_result.append({
-                        'id': g_data['id'],
-                        'name': g_data['name'],
-                        'performance_percentage': g_perf,
-                        'indicators': g_data['indicators'],
-                        'is_label': is_label_group
-                    })
-                
-                depts_result.append({
-                    'id': d_data['id'],
-                    'name': d_data['name'],
-                    'performance_percentage': dept_perf,
-                    'groups': groups_result,
-                    'ungrouped_indicators': ungrouped
-                })
-                
-            # Sector percent: average of departments
-            dept_pcts = [
-                d['performance_percentage']
-                for d in depts_result
-                if d['performance_percentage'] is not None
-            ]
-            sector_perf = sum(dept_pcts) / len(dept_pcts) if dept_pcts else None
-            
-            sectors_result.append({
-                'id': s_data['id'],
-                'name': s_data['name'],
-                'performance_percentage': sector_perf,
-                'departments': depts_result
-            })
-            
-        # Ministry percent: average of sectors
-        sector_pcts = [
-            s['performance_percentage']
-            for s in sectors_result
-            if s['performance_percentage'] is not None
-        ]
-        ministry_perf = sum(sector_pcts) / len(sector_pcts) if sector_pcts else None
-        
-        return Response({
-            'year': year,
-            'quarter_months': quarter_months,
-            'ministry_performance': ministry_perf,
-            'sectors': sectors_result
-        })
+        return rendered_response(body)
 
 
 class IndicatorDetailView(APIView):
     permission_classes = [IsAuthenticated, IsIndicatorDashboardViewer]
 
     def get(self, request):
-        """Returns yearly and quarterly performance data for a specific indicator."""
+        """Returns yearly and quarterly performance data for a specific indicator.
+
+        ``years`` (default 4) sets how many years of yearly data, ending in
+        ``year``, are returned; the cost is the same three queries.
+        """
         indicator_id = request.query_params.get('indicator_id')
         if not indicator_id:
             return Response({'error': 'indicator_id is required'}, status=400)
@@ -951,11 +448,14 @@ class IndicatorDetailView(APIView):
             except ValueError:
                 current_year = None
 
+        try:
+            year_count = indicator_history.parse_year_count(request.query_params.get('years'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
         if not current_year:
-            latest_plan = AnnualPlan.objects.filter(indicator_id=indicator_id).order_by('-year').first()
-            if latest_plan:
-                current_year = latest_plan.year
-            else:
+            current_year = AnnualPlan.objects.filter(indicator_id=indicator_id).order_by('-year').values_list('year', flat=True).first()
+            if not current_year:
                 return Response({
                     'indicator': None,
                     'yearly_data': [],
@@ -964,101 +464,72 @@ class IndicatorDetailView(APIView):
                 })
 
         try:
-            indicator = Indicator.objects.select_related('department', 'department__sector').get(id=indicator_id)
+            indicator = Indicator.objects.select_related('department').get(id=indicator_id)
         except Indicator.DoesNotExist:
             return Response({'error': 'indicator not found'}, status=404)
 
-        # Get yearly data (4 consecutive years ending in current_year)
-        years_list = list(range(current_year - 3, current_year + 1))
-        yearly_data = []
-        for y in years_list:
-            try:
-                plan = AnnualPlan.objects.get(indicator_id=indicator_id, year=y)
-                target = float(plan.target) if plan.target and str(plan.target).upper() != 'N/A' else 0
-
-                perfs = QuarterlyPerformance.objects.filter(
-                    plan_id=plan.id,
-                    status__in=[PerformanceStatus.APPROVED, PerformanceStatus.VALIDATED, PerformanceStatus.FINAL_APPROVED]
-                )
-                # For incremental indicators, full-year performance = Q4 value only
-                if indicator.is_incremental:
-                    q4_perf = perfs.filter(quarter=4).first()
-                    achieved = float(q4_perf.value) if q4_perf and q4_perf.value is not None and str(q4_perf.value).upper() != 'N/A' else 0
-                else:
-                    achieved = sum(float(p.value) for p in perfs if p.value is not None and str(p.value).upper() != 'N/A')
-                pct = (achieved / target * 100) if target > 0 else None
-                if pct is not None and pct > 100: pct = 100.0
-
-                yearly_data.append({
-                    'year': y,
-                    'target': target,
-                    'achieved': achieved,
-                    'percentage': pct
-                })
-            except AnnualPlan.DoesNotExist:
-                yearly_data.append({
-                    'year': y,
-                    'target': 0,
-                    'achieved': 0,
-                    'percentage': None
-                })
+        # Yearly data for the `years` consecutive years ending in current_year
+        years = indicator_history.year_range(current_year, year_count)
+        loaded_years = set(years) | {current_year - 1}
+        plans = indicator_history.load_plans([indicator_id], loaded_years)
+        performances = indicator_history.load_performances([indicator_id], loaded_years)
 
-        def get_quarters_for_year(y):
-            data = []
+        return Response(indicator_history.indicator_detail(indicator, current_year, years, plans, performances))
+
+
+class IndicatorDetailBatchView(APIView):
+    permission_classes = [IsAuthenticated, IsIndicatorDashboardViewer]
+
+    def get(self, request):
+        """``IndicatorDetailView`` data for several indicators at once.
+
+        ``indicator_ids`` is a comma-separated list (or a repeated
+        parameter); ``year`` defaults to the latest plan year among them and
+        ``years`` works as for the single view. Costs three queries (four
+        without ``year``) whatever the number of indicators and years.
+        """
+        raw_ids = ','.join(request.query_params.getlist('indicator_ids'))
+        try:
+            indicator_ids = list(dict.fromkeys(int(v) for v in raw_ids.split(',') if v.strip()))
+        except ValueError:
+            return Response({'error': 'invalid indicator_ids'}, status=400)
+        if not indicator_ids:
+            return Response({'error': 'indicator_ids is required'}, status=400)
+        if len(indicator_ids) > indicator_history.MAX_BATCH_INDICATORS:
+            return Response(
+                {'error': f'at most {indicator_history.MAX_BATCH_INDICATORS} indicator_ids per request'},
+                status=400,
+            )
+
+        current_year = request.query_params.get('year')
+        if current_year:
             try:
-                plan = AnnualPlan.objects.get(indicator_id=indicator_id, year=y)
-                try:
-                    breakdown = QuarterlyBreakdown.objects.get(plan_id=plan.id)
-                except QuarterlyBreakdown.DoesNotExist:
-                    breakdown = None
-
-                perfs = QuarterlyPerformance.objects.filter(
-                    plan_id=plan.id,
-                    status__in=[PerformanceStatus.APPROVED, PerformanceStatus.VALIDATED, PerformanceStatus.FINAL_APPROVED]
-                )
-
-                for q in [1, 2, 3, 4]:
-                    if breakdown:
-                        if q == 1: q_target = float(breakdown.q1 or 0)
-                        elif q == 2: q_target = float(breakdown.q2 or 0)
-                        elif q == 3: q_target = float(breakdown.q3 or 0)
-                        else: q_target = float(breakdown.q4 or 0)
-                    else:
-                        target_val = float(plan.target) if plan.target and str(plan.target).upper() != 'N/A' else 0
-                        q_target = target_val / 4
-
-                    q_perf = perfs.filter(quarter=q).first()
-                    q_achieved = float(q_perf.value) if q_perf and q_perf.value is not None and str(q_perf.value).upper() != 'N/A' else None
-                    
-                    q_percentage = None
-                    if q_target > 0 and q_achieved is not None:
-                        q_percentage = (q_achieved / q_target) * 100
-                        if q_percentage > 100: q_percentage = 100.0
-
-                    data.append({
-                        'quarter': q,
-                        'target': q_target,
-                        'achieved': q_achieved,
-                        'percentage': q_percentage
-                    })
-            except AnnualPlan.DoesNotExist:
-                for q in [1, 2, 3, 4]:
-                    data.append({'quarter': q, 'target': 0, 'achieved': None, 'percentage': None})
-            return data
-
-        current_year_quarters = get_quarters_for_year(current_year)
-        last_year_quarters = get_quarters_for_year(current_year - 1)
+                current_year = int(current_year)
+            except ValueError:
+                current_year = None
+
+        try:
+            year_count = indicator_history.parse_year_count(request.query_params.get('years'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        if not current_year:
+            current_year = AnnualPlan.objects.filter(indicator_id__in=indicator_ids).order_by('-year').values_list('year', flat=True).first()
+            if not current_year:
+                return Response({'year': None, 'years': [], 'indicators': [], 'not_found': []})
+
+        indicators = Indicator.objects.select_related('department').in_bulk(indicator_ids)
+        years = indicator_history.year_range(current_year, year_count)
+        loaded_years = set(years) | {current_year - 1}
+        plans = indicator_history.load_plans(list(indicators), loaded_years)
+        performances = indicator_history.load_performances(list(indicators), loaded_years)
 
         return Response({
-            'indicator': {
-                'id': indicator.id,
-                'name': indicator.name,
-                'unit': indicator.unit or '',
-                'description': indicator.description or '',
-                'department_name': indicator.department.name,
-                'kpi_characteristics': getattr(indicator, 'kpi_characteristics', '')
-            },
-            'yearly_data': yearly_data,
-            'current_year_quarters': current_year_quarters,
-            'last_year_quarters': last_year_quarters,
+            'year': current_year,
+            'years': years,
+            'indicators': [
+                indicator_history.indicator_detail(indicators[i], current_year, years, plans, performances)
+                for i in indicator_ids if i in indicators
+            ],
+            'not_found': [i for i in indicator_ids if i not in indicators],
         })
@@ -63,6 +63,10 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
   };
 
   const logout = () => {
+    // Revoke the token server-side; local logout proceeds regardless
+    if (token) {
+      api.post('/api/auth/logout/').catch(() => {});
+    }
     setToken(null);
     localStorage.removeItem('auth_username');
   };